@@ -0,0 +1,13 @@
+"""Benchmarks for gamelib and the chapter games.
+
+Run from the repository root:
+
+    python -m bench                  # hot paths; see bench.harness
+    python -m bench --save-baseline  # store them in bench/baseline.json
+    python -m bench.startup          # cold start of each game
+    python -m bench.differential     # the original games vs their ports
+
+Later runs are compared against the stored baseline, and exit non-zero if
+any benchmark slowed down by more than the tolerance (-t). Baselines are
+machine-specific; record one on the machine the comparison runs on.
+"""
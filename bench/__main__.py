@@ -0,0 +1,7 @@
+import logging
+import sys
+
+from bench import harness
+
+logging.basicConfig(level=logging.WARNING)
+sys.exit(harness.main())
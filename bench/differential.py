@@ -0,0 +1,988 @@
+#!/usr/bin/env python3
+"""Drive each original game and its port through the same input script.
+
+Each pair (e.g., ch6/wormy.py and ch6/elegans.py) is run headlessly, in
+fresh processes, with the same seed and the same scripted input, and the
+outcomes (score, game over, final board...) are compared. Per-frame CPU
+time, allocations and draw calls are reported side by side, to show which
+refactors helped and which hurt.
+
+Inside the child process, the game's main() runs unchanged; pygame is
+patched around it:
+
+    - pygame.display.update/flip end a frame: timings are taken and the
+      script's input for the frame is queued.
+    - pygame.event.get/post/poll/clear read a fake event queue.
+    - pygame.time (Clock, wait, get_ticks) and the game's time.time run
+      on a virtual clock, advanced by Clock.tick and wait. The script is
+      timed on this clock, so games running at different frame rates get
+      the same input at the same (virtual) moment.
+    - pygame.display.set_mode returns a Surface counting blits and fills;
+      pygame.draw and pygame.transform calls are counted too.
+    - pygame.mixer.music is silenced (MIDI needs a soundfont).
+    - gamelib.rng.get_rng hands the ports the global random module, so
+      both sides draw from the same seeded stream.
+
+Functions reporting the outcome (drawScore, show_game_over_screen, ...)
+are wrapped to record it; game over ends the run. Where the two draw
+something at random in different ways (a scramble, the pieces), both
+are handed the same instead (see Replacements).
+
+Each side is run twice: once for CPU time and once under tracemalloc
+(for the peak Python memory allocated within each frame; pygame's own
+buffers aren't traced), as tracing slows everything down. The outcomes
+of the two runs must agree, as a check that the run is deterministic.
+
+Each pair is set up to play the same game on both sides:
+
+    - memory: memorypuzzle plays on the port's 6x4 board (both shuffle
+      the icons the same way). Clicks are spaced out, and stop before
+      the end, so memorypuzzle's blocking animations are over by each.
+    - slide: both start from the same scramble, and the key presses are
+      spaced out past slidepuzzle's blocking slide.
+    - snake: only quarter turns (see snake_script).
+    - tetris: blocks runs at tetromino's 25 FPS and both get the same
+      pieces; the lines cleared are compared, as the scores count
+      differently.
+
+Outcomes that can't be made to agree are listed per pair
+(Pair.expected), reported, and left out of the comparison (and --check):
+
+    - simon: simulate blocks input while it animates and patterns
+      doesn't, so presses land in different phases of the sequence (and
+      simulate's background colors come from the pattern's random
+      stream). Nothing is compared.
+
+Usage:
+    python -m bench.differential [--seed N] [--seconds S] [pair ...]
+"""
+
+import argparse
+import collections
+import contextlib
+import json
+import logging
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import pygame
+from bench.startup import child_env
+from gamelib import rng as gamerng
+from gamelib.games import GAMES, ROOT_DIR, load_game
+from pygame.locals import (
+    K_DOWN, K_LEFT, K_RETURN, K_RIGHT, K_UP, KEYDOWN, KEYUP,
+    MOUSEBUTTONDOWN, MOUSEBUTTONUP, MOUSEMOTION, K_a, K_q, K_s, K_w,
+)
+
+log = logging.getLogger(__name__)
+
+SEED = 1
+SECONDS = 90  # of virtual time per run
+START_MS = 100  # when the script presses a key to leave start screens
+MEMORY_START_MS = 3500  # the first click (see memory_script)
+UNCAPPED_FRAME_MS = 1000 / 60  # virtual length of Clock.tick() frames
+MAX_IDLE_CALLS = 100000  # event.get calls without a frame before giving up
+SETTLE_MS = 2000  # without input at the end, for blocking animations
+SCRAMBLE_SLIDES = 80  # as slidepuzzle makes
+
+ARROWS = (K_LEFT, K_RIGHT, K_UP, K_DOWN)
+
+
+class _StopRun(BaseException):
+    """End the game loop (BaseException, so games can't swallow it)."""
+
+
+#
+#   #####
+#  #     #  ####  #####  # #####  #####  ####
+#  #       #    # #    # # #    #   #   #
+#   #####  #      #    # # #    #   #    ####
+#        # #      #####  # #####    #        #
+#  #     # #    # #   #  # #        #   #    #
+#   #####   ####  #    # # #        #    ####
+#
+#  A script is a list of (ms, action), where an action is ('key', key,
+#  hold ms) or ('click', (box x, box y)). Clicks are given in board
+#  coordinates, as the original and port lay out their boards differently.
+
+def snake_script(rng, duration):
+    # only quarter turns: wormy ignores turning back on itself, elegans
+    #   turns (and runs into itself)
+    script = [(START_MS, ('key', K_RETURN, 50))]
+    t = START_MS
+    key = K_RIGHT  # both start heading right
+    while t < duration:
+        t += rng.randint(150, 600)
+        key = rng.choice(
+            (K_UP, K_DOWN) if key in (K_LEFT, K_RIGHT) else (K_LEFT, K_RIGHT))
+        script.append((t, ('key', key, 50)))
+    return script
+
+
+def tetris_script(rng, duration):
+    # no space or p: they drop and pause in one, pause and do nothing in
+    #   the other
+    script = [(START_MS, ('key', K_RETURN, 50))]
+    t = START_MS
+    while t < duration:
+        t += rng.randint(100, 400)
+        key = rng.choice(ARROWS + (K_q,))
+        script.append((t, ('key', key, rng.randint(50, 300))))
+    return script
+
+
+def slide_script(rng, duration):
+    # slidepuzzle takes 10 frames (333 ms) to slide, and takes only the
+    #   last of the keys pressed meanwhile
+    script = []
+    t = 0
+    while t < duration - SETTLE_MS:
+        t += rng.randint(400, 900)
+        script.append((t, ('key', rng.choice(ARROWS), 50)))
+    return script
+
+
+def simon_script(rng, duration):
+    script = []
+    t = 0
+    while t < duration:
+        t += rng.randint(300, 1000)
+        script.append((t, ('key', rng.choice((K_q, K_w, K_a, K_s)), 50)))
+    return script
+
+
+def memory_script(rng, duration):
+    # after the start animations (2.9 s in memory), and no faster than
+    #   memorypuzzle shows a mismatch (1.4 s), as it takes only the last
+    #   of the clicks made meanwhile
+    script = []
+    t = MEMORY_START_MS
+    while t < duration - SETTLE_MS:
+        target = (rng.randint(0, 5), rng.randint(0, 3))
+        script.append((t, ('click', target)))
+        t += rng.randint(1600, 2400)
+    return script
+
+
+#
+#  ######
+#  #     # ######  ####   ####  #####  #####  ###### #####   ####
+#  #     # #      #    # #    # #    # #    # #      #    # #
+#  ######  #####  #      #    # #    # #    # #####  #    #  ####
+#  #   #   #      #      #    # #####  #    # #      #####       #
+#  #    #  #      #    # #    # #   #  #    # #      #   #  #    #
+#  #     # ###### #    #  ####  #    # #####  ###### #    #  ####
+#
+#  Recorders are called with the run and the arguments of the function
+#  they wrap (self included, for methods).
+
+def game_over(run, *args):
+    run.stop('game over')
+
+
+def record(name, index, attr=None):
+    """Record an argument (or one of its attributes) as an outcome."""
+    def recorder(run, *args):
+        value = args[index]
+        run.outcome[name] = getattr(value, attr) if attr else value
+    return recorder
+
+
+def count(name):
+    """Count the calls as an outcome."""
+    def recorder(run, *args):
+        run.outcome[name] = run.outcome.get(name, 0) + 1
+    return recorder
+
+
+def text_screen_game_over(index):
+    """End the run when the text screen shows 'Game Over'."""
+    def recorder(run, *args):
+        if args[index] == 'Game Over':
+            run.stop('game over')
+    return recorder
+
+
+def record_slidepuzzle_board(run, board, message=None):
+    # board[x][y], with None as the blank
+    tiles = [
+        board[x][y] or 0
+        for y in range(len(board[0]))
+        for x in range(len(board))
+    ]
+    run.outcome['board'] = tiles
+    run.outcome['solved'] = tiles == sorted(tiles)[1:] + [0]
+
+
+def record_slide_board(run, board, msg=None):
+    tiles = [int(box.text) if box.text else 0 for box in board.box_list]
+    run.outcome['board'] = tiles
+    run.outcome['solved'] = tiles == sorted(tiles)[1:] + [0]
+
+
+def record_memorypuzzle_revealed(run, board, revealed):
+    run.outcome['revealed'] = sum(sum(column) for column in revealed)
+
+
+def record_memory_revealed(run, board):
+    run.outcome['revealed'] = sum(
+        box.revealed for box in board.board.values())
+
+
+def record_tetromino_lines(run, board):
+    # board[x][y]; called to remove the complete lines
+    blank = run.module.BLANK
+    n_lines = sum(
+        all(column[y] != blank for column in board)
+        for y in range(len(board[0])))
+    run.outcome['lines'] = run.outcome.get('lines', 0) + n_lines
+
+
+def record_blocks_lines(run, board):
+    n_lines = sum(n == board.BOARD_W for n in board.row_fill)
+    run.outcome['lines'] = run.outcome.get('lines', 0) + n_lines
+
+
+def memorypuzzle_click_pos(module, target):
+    left, top = module.leftTopCoordsOfBox(*target)
+    half = module.BOXSIZE // 2
+    return (left + half, top + half)
+
+
+def memory_click_pos(module, target):
+    if getattr(module.GameBox, 'box_size', None) is None:
+        return None  # no board yet
+    left, top = module.GameBox.upper_left_coord_of_box(*target)
+    half = module.GameBox.box_size // 2
+    return (left + half, top + half)
+
+
+#
+#  replacements
+#
+#  Called with the run (and the arguments) in place of the function they
+#  replace, to hand both sides the same input.
+
+def slide_scramble(seed, n_slides=SCRAMBLE_SLIDES):
+    """Return random slides from the solved puzzle, and where they lead.
+
+    Return:
+        (moves, tiles): the slidepuzzle moves ('up' slides the tile
+        below the blank up, ...), and the tiles after, row by row (0 is
+        the blank).
+    """
+    rng = random.Random('slide {}'.format(seed))
+    offsets = {'up': (0, 1), 'down': (0, -1), 'left': (1, 0),
+               'right': (-1, 0)}  # of the tile that moves, from the blank
+    tiles = list(range(1, 16)) + [0]
+    x, y = 3, 3
+    moves = []
+    for _ in range(n_slides):
+        move = rng.choice(sorted(
+            move for move, (dx, dy) in offsets.items()
+            if 0 <= x + dx < 4 and 0 <= y + dy < 4))
+        dx, dy = offsets[move]
+        tiles[y * 4 + x] = tiles[(y + dy) * 4 + x + dx]
+        x, y = x + dx, y + dy
+        tiles[y * 4 + x] = 0
+        moves.append(move)
+    return moves, tiles
+
+
+def slidepuzzle_new_puzzle(run, num_slides):
+    # generateNewPuzzle, without the animation
+    moves, _ = slide_scramble(run.seed)
+    board = run.module.getStartingBoard()
+    for move in moves:
+        run.module.makeMove(board, move)
+    return board, moves
+
+
+def slide_shuffle(run, board):
+    # SlideBoard.shuffle
+    _, tiles = slide_scramble(run.seed)
+    text_list = [str(tile) if tile else '' for tile in tiles]
+    for text, box in zip(text_list, board.box_list):
+        box.text = text
+    board.set_tile_lookup()
+    board.initial_order = text_list
+    board.n_moves = 0
+
+
+def tetris_pieces(seed):
+    """Yield the (shape, rotation) of each piece."""
+    rng = random.Random('tetris {}'.format(seed))
+    n_rotations = {'S': 2, 'Z': 2, 'J': 4, 'L': 4, 'I': 2, 'O': 1, 'T': 4}
+    while True:
+        shape = rng.choice(sorted(n_rotations))
+        yield shape, rng.randrange(n_rotations[shape])
+
+
+def next_piece(run):
+    if 'pieces' not in run.streams:
+        run.streams['pieces'] = tetris_pieces(run.seed)
+    return next(run.streams['pieces'])
+
+
+def tetromino_new_piece(run):
+    # getNewPiece
+    module = run.module
+    shape, rotation = next_piece(run)
+    return {'shape': shape,
+            'rotation': rotation,
+            'x': int(module.BOARDWIDTH / 2) - int(module.TEMPLATEWIDTH / 2),
+            'y': -2,
+            'color': random.randint(0, len(module.COLORS) - 1)}
+
+
+def blocks_new_piece(run, piece, rng=None):
+    # TetrisPiece.__init__
+    module = run.module
+    piece.name, piece.rotation = next_piece(run)
+    piece.shape, piece.color, piece.highlight = module.SHAPES[piece.name]
+    piece.x = int(module.TetrisBoard.BOARD_W / 2) - \
+        int(module.TEMPLATE_WIDTH / 2)
+    piece.y = -2
+
+
+#
+#  ######
+#  #     #   ##   # #####   ####
+#  #     #  #  #  # #    # #
+#  ######  #    # # #    #  ####
+#  #       ###### # #####       #
+#  #       #    # # #   #  #    #
+#  #       #    # # #    #  ####
+
+class Side():
+    """One game of a pair: its module and how to read its outcome."""
+
+    def __init__(self, game, module, hooks=None, click_pos=None,
+                 settings=None, replace=None,
+                 uncapped_ms=UNCAPPED_FRAME_MS):
+        """Initialize.
+
+        Arguments:
+            game: The gamelib.games.GAMES key, for the chapter directory.
+            module: The name of the module with main().
+            hooks: A dict of {'function' or 'Class.method': recorder}.
+            click_pos: A function (module, board coord) returning the
+                pixel to click, or None to drop the click.
+            settings: A dict of {global: value} to set in the module for
+                the run (e.g., the board size).
+            replace: A dict of {'function' or 'Class.method':
+                replacement}.
+            uncapped_ms: The virtual length of Clock.tick() frames.
+        """
+        self.game = game
+        self.module = module
+        self.hooks = hooks or {}
+        self.click_pos = click_pos
+        self.settings = settings or {}
+        self.replace = replace or {}
+        self.uncapped_ms = uncapped_ms
+
+
+class Pair():
+    """An original game, its port and the input script they share."""
+
+    def __init__(self, original, port, make_script, expected=None):
+        """Initialize.
+
+        Arguments:
+            original, port: The Sides.
+            make_script: A function (rng, duration ms) returning the
+                script (a list of (ms, action), see above).
+            expected: A dict of {outcome: why} for outcomes the two
+                aren't expected to agree on ('ended at ms' included).
+        """
+        self.original = original
+        self.port = port
+        self.make_script = make_script
+        self.expected = expected or {}
+
+    def side(self, name):
+        return {'original': self.original, 'port': self.port}[name]
+
+
+PAIRS = collections.OrderedDict([
+    ('memory', Pair(
+        Side('memory', 'memorypuzzle', {
+            'drawBoard': record_memorypuzzle_revealed,
+            'gameWonAnimation': count('wins'),
+        }, click_pos=memorypuzzle_click_pos, settings={
+            # memory's board, with memorypuzzle's margins worked out
+            'BOARDWIDTH': 6, 'BOARDHEIGHT': 4,
+            'XMARGIN': 170, 'YMARGIN': 140,
+        }),
+        Side('memory', 'memory', {
+            'GameBoard.draw_board': record_memory_revealed,
+            'GameBoard.game_won_animation': count('wins'),
+        }, click_pos=memory_click_pos),
+        memory_script,
+    )),
+    ('slide', Pair(
+        Side('slide', 'slidepuzzle', {
+            'drawBoard': record_slidepuzzle_board,
+        }, replace={'generateNewPuzzle': slidepuzzle_new_puzzle}),
+        Side('slide', 'slide', {
+            'SlideBoard.draw_board': record_slide_board,
+        }, replace={'SlideBoard.shuffle': slide_shuffle}),
+        slide_script,
+    )),
+    ('simon', Pair(
+        Side('patterns', 'simulate', {
+            'flashButtonAnimation': count('flashes'),
+            'gameOverAnimation': count('game_overs'),
+        }),
+        Side('patterns', 'patterns', {
+            'SimonBoard.flash_button_animation': count('flashes'),
+            'SimonBoard.game_over_animation': count('game_overs'),
+        }),
+        simon_script,
+        {'flashes': 'presses land in different phases',
+         'game_overs': 'presses land in different phases'},
+    )),
+    ('snake', Pair(
+        Side('elegans', 'wormy', {
+            'drawScore': record('score', 0),
+            'showGameOverScreen': game_over,
+        }),
+        Side('elegans', 'elegans', {
+            'draw_score': record('score', 1),
+            'show_game_over_screen': game_over,
+        }),
+        snake_script,
+    )),
+    ('tetris', Pair(
+        Side('blocks', 'tetromino', {
+            'removeCompleteLines': record_tetromino_lines,
+            'showTextScreen': text_screen_game_over(0),
+        }, replace={'getNewPiece': tetromino_new_piece},
+            uncapped_ms=40),  # its start screen, as long as blocks' frames
+        Side('blocks', 'blocks', {
+            'TetrisBoard.remove_completed_lines': record_blocks_lines,
+            'show_text_screen': text_screen_game_over(1),
+        }, settings={'FPS': 25}, replace={
+            'TetrisPiece.__init__': blocks_new_piece,
+        }),
+        tetris_script,
+    )),
+])
+
+
+#
+#  ######
+#  #     # #    # #    #
+#  #     # #    # ##   #
+#  ######  #    # # #  #
+#  #   #   #    # #  # #
+#  #    #  #    # #   ##
+#  #     #  ####  #    #
+
+class Run():
+    """The state of a game being driven: virtual clock, input, metrics."""
+
+    def __init__(self, side, script, seconds, seed=SEED,
+                 trace_malloc=False):
+        self.side = side
+        self.module = None
+        self.duration = seconds * 1000
+        self.seed = seed  # for the replacements' input
+        self.streams = {}  # the replacements' generators, by name
+        self.trace_malloc = trace_malloc
+
+        self.now = 0.0  # virtual ms
+        self.script = collections.deque(self.expand(script))
+        self.queue = []
+        self.idle_calls = 0
+
+        self.outcome = {}
+        self.stop_reason = None
+        self.frame_times = []  # CPU ms per frame
+        self.frame_allocs = []  # peak KiB allocated per frame
+        self.calls = collections.Counter()
+        self.frame_calls = []
+        self._cpu = 0.0
+        self._traced = 0
+
+    @staticmethod
+    def expand(script):
+        """Turn a script's actions into time-ordered (ms, event) pairs."""
+        event_list = []
+        for t, action in script:
+            if action[0] == 'key':
+                _, key, hold = action
+                event_list.append((t, ('key', KEYDOWN, key)))
+                event_list.append((t + hold, ('key', KEYUP, key)))
+            elif action[0] == 'click':
+                event_list.append((t, action))
+        event_list.sort(key=lambda item: item[0])
+        return event_list
+
+    def make_events(self, spec):
+        if spec[0] == 'key':
+            _, event_type, key = spec
+            return [pygame.event.Event(
+                event_type, key=key, mod=0, unicode='', scancode=0)]
+        pos = self.side.click_pos(self.module, spec[1])
+        if pos is None:
+            return []
+        return [
+            pygame.event.Event(MOUSEMOTION, pos=pos, rel=(0, 0),
+                               buttons=(0, 0, 0)),
+            pygame.event.Event(MOUSEBUTTONDOWN, pos=pos, button=1),
+            pygame.event.Event(MOUSEBUTTONUP, pos=pos, button=1),
+        ]
+
+    def stop(self, reason):
+        self.stop_reason = reason
+        raise _StopRun(reason)
+
+    def advance(self, ms):
+        self.now += ms
+        if self.now >= self.duration:
+            self.stop('time')
+
+    #
+    #  frames
+    #
+
+    def start(self):
+        if self.trace_malloc:
+            tracemalloc.start()
+            self._traced = tracemalloc.get_traced_memory()[0]
+        self._cpu = time.thread_time()
+
+    def end_frame(self):
+        """Take the frame's metrics, then queue the input that is due."""
+        cpu = time.thread_time()
+        self.frame_times.append((cpu - self._cpu) * 1000)
+        if self.trace_malloc:
+            current, peak = tracemalloc.get_traced_memory()
+            self.frame_allocs.append((peak - self._traced) / 1024)
+            tracemalloc.reset_peak()
+            self._traced = current
+        self.frame_calls.append(sum(self.calls.values()))
+
+        self.idle_calls = 0
+        while self.script and self.script[0][0] <= self.now:
+            _, spec = self.script.popleft()
+            self.queue.extend(self.make_events(spec))
+        self._cpu = time.thread_time()
+
+    def summary(self):
+        n_frames = len(self.frame_times)
+        return {
+            'stop': self.stop_reason,
+            'outcome': self.outcome,
+            'frames': n_frames,
+            'virtual_ms': round(self.now),
+            'cpu_ms': self.frame_times,
+            'alloc_kib': self.frame_allocs if self.trace_malloc else None,
+            'calls': {
+                name: total / max(1, n_frames)
+                for name, total in sorted(self.calls.items())
+            },
+        }
+
+    #
+    #  pygame replacements
+    #
+
+    def event_get(self, eventtype=None, pump=True, exclude=None):
+        self.idle_calls += 1
+        if self.idle_calls > MAX_IDLE_CALLS:
+            self.stop('stalled')  # waiting on input without drawing
+        if eventtype is None:
+            types = None
+        elif isinstance(eventtype, int):
+            types = {eventtype}
+        else:
+            types = set(eventtype)
+        excluded = set() if exclude is None else (
+            {exclude} if isinstance(exclude, int) else set(exclude))
+
+        matched, kept = [], []
+        for event in self.queue:
+            if (types is None or event.type in types) and \
+                    event.type not in excluded:
+                matched.append(event)
+            else:
+                kept.append(event)
+        self.queue = kept
+        return matched
+
+    def event_poll(self):
+        events = self.event_get()
+        if not events:
+            return pygame.event.Event(pygame.NOEVENT)
+        self.queue = events[1:] + self.queue
+        return events[0]
+
+    def event_post(self, event):
+        self.queue.append(event)
+        return True
+
+    def event_clear(self, eventtype=None, pump=True):
+        self.event_get(eventtype)
+
+    def time_wait(self, ms):
+        self.advance(ms)
+        return ms
+
+    def get_ticks(self):
+        return int(self.now)
+
+    def set_mode(self, size=(0, 0), *args, **kwargs):
+        # a real (dummy driver) mode, so Surface.convert() works
+        self._set_mode(size, *args, **kwargs)
+        return _counting_surface(self)(size)
+
+    def counted(self, name, func):
+        def wrapper(*args, **kwargs):
+            self.calls[name] += 1
+            return func(*args, **kwargs)
+        return wrapper
+
+
+class _Clock():
+    """A pygame.time.Clock on the run's virtual clock."""
+
+    def __init__(self, run):
+        self.run = run
+        self.last = 0
+
+    def tick(self, framerate=0):
+        self.last = 1000 / framerate if framerate else \
+            self.run.side.uncapped_ms
+        self.run.advance(self.last)
+        return int(self.last)
+
+    tick_busy_loop = tick
+
+    def get_time(self):
+        return int(self.last)
+
+    get_rawtime = get_time
+
+    def get_fps(self):
+        return 1000 / self.last if self.last else 0.0
+
+
+class _VirtualTime():
+    """Stands in for the time module inside a game module."""
+
+    def __init__(self, run):
+        self.run = run
+
+    def time(self):
+        return self.run.now / 1000
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+
+def _counting_surface(run):
+    class CountingSurface(pygame.Surface):
+        """The display Surface, counting what is drawn on it."""
+
+        def blit(self, *args, **kwargs):
+            run.calls['blit'] += 1
+            return super().blit(*args, **kwargs)
+
+        def blits(self, *args, **kwargs):
+            run.calls['blit'] += 1
+            return super().blits(*args, **kwargs)
+
+        def fill(self, *args, **kwargs):
+            run.calls['fill'] += 1
+            return super().fill(*args, **kwargs)
+    return CountingSurface
+
+
+def _resolve(module, path):
+    """Return (owner, attribute name) for 'func' or 'Class.method'."""
+    owner = module
+    *parents, name = path.split('.')
+    for parent in parents:
+        owner = getattr(owner, parent)
+    return owner, name
+
+
+def _hook(run, func, recorder):
+    def wrapper(*args, **kwargs):
+        recorder(run, *args)
+        return func(*args, **kwargs)
+    return wrapper
+
+
+def _replace(run, replacement):
+    def wrapper(*args, **kwargs):
+        return replacement(run, *args, **kwargs)
+    return wrapper
+
+
+def drive(pair_name, side_name, seed=SEED, seconds=SECONDS,
+          trace_malloc=False):
+    """Run one side of a pair in this process.
+
+    Arguments:
+        pair_name: A key of PAIRS.
+        side_name: 'original' or 'port'.
+        seed: Seeds the global random module, the input script and
+            the replacements' input.
+        seconds: The virtual time to play for, unless the game ends.
+        trace_malloc: Record per-frame allocations (slow).
+    Return:
+        The summary of the run (see Run.summary).
+    """
+    pair = PAIRS[pair_name]
+    side = pair.side(side_name)
+    script = pair.make_script(random.Random(seed), seconds * 1000)
+    run = Run(side, script, seconds, seed=seed, trace_malloc=trace_malloc)
+
+    load_game(side.game)  # puts the chapter directory on sys.path
+    module = __import__(side.module)
+    run.module = module
+
+    with contextlib.ExitStack() as stack:
+        def patch(owner, name, value):
+            stack.enter_context(_patch(owner, name, value))
+
+        run._set_mode = pygame.display.set_mode
+        patch(pygame.display, 'set_mode', run.set_mode)
+        patch(pygame.display, 'update', lambda *args: run.end_frame())
+        patch(pygame.display, 'flip', lambda *args: run.end_frame())
+        patch(pygame.event, 'get', run.event_get)
+        patch(pygame.event, 'poll', run.event_poll)
+        patch(pygame.event, 'post', run.event_post)
+        patch(pygame.event, 'clear', run.event_clear)
+        patch(pygame.event, 'pump', lambda: None)
+        patch(pygame.time, 'Clock', lambda: _Clock(run))
+        patch(pygame.time, 'wait', run.time_wait)
+        patch(pygame.time, 'delay', run.time_wait)
+        patch(pygame.time, 'get_ticks', run.get_ticks)
+        for name in ('load', 'play', 'stop', 'pause', 'unpause'):
+            patch(pygame.mixer.music, name, lambda *args, **kwargs: None)
+        for group in ('draw', 'transform'):
+            submodule = getattr(pygame, group)
+            for name in dir(submodule):
+                func = getattr(submodule, name)
+                if not name.startswith('_') and callable(func):
+                    patch(submodule, name, run.counted(group, func))
+        patch(gamerng, 'get_rng',
+              lambda rng=None: random if rng is None else rng)
+        if hasattr(module, 'time'):
+            patch(module, 'time', _VirtualTime(run))
+        patch(sys, 'argv', [module.__file__])  # the ports parse options
+        for name, value in side.settings.items():
+            patch(module, name, value)
+        for path, replacement in side.replace.items():
+            owner, name = _resolve(module, path)
+            patch(owner, name, _replace(run, replacement))
+        for path, recorder in side.hooks.items():
+            owner, name = _resolve(module, path)
+            patch(owner, name, _hook(run, getattr(owner, name), recorder))
+
+        random.seed(seed)
+        run.start()
+        try:
+            module.main()
+        except _StopRun:
+            pass
+        finally:
+            if trace_malloc:
+                tracemalloc.stop()
+    return run.summary()
+
+
+@contextlib.contextmanager
+def _patch(owner, name, value):
+    original = getattr(owner, name)
+    setattr(owner, name, value)
+    try:
+        yield
+    finally:
+        setattr(owner, name, original)
+
+
+#
+#  ######
+#  #     # ###### #####   ####  #####  #####
+#  #     # #      #    # #    # #    #   #
+#  ######  #####  #    # #    # #    #   #
+#  #   #   #      #####  #    # #####    #
+#  #    #  #      #      #    # #   #    #
+#  #     # ###### #       ####  #    #   #
+
+def run_child(pair_name, side_name, seed, seconds, trace_malloc=False):
+    """Run one side of a pair in a fresh interpreter; return its summary."""
+    chapter, _ = GAMES[PAIRS[pair_name].side(side_name).game]
+    cmd = [
+        sys.executable, '-m', 'bench.differential',
+        '--child', pair_name, side_name,
+        '--seed', str(seed), '--seconds', str(seconds),
+    ]
+    if trace_malloc:
+        cmd.append('--trace-malloc')
+    output = subprocess.run(
+        cmd, env=child_env(chapter), cwd=ROOT_DIR, check=True,
+        stdout=subprocess.PIPE, universal_newlines=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of a list (0 if empty)."""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    last = len(values) - 1
+    return values[min(last, int(round(p / 100 * last)))]
+
+
+def compare_outcomes(original, port, expected=()):
+    """Return {key: (original, port)} for outcomes that differ.
+
+    Only the keys recorded by both sides are compared, along with the
+    reason the run stopped and (if the game ended) when; keys in
+    expected are left out.
+    """
+    diff = {}
+    if original['stop'] != port['stop']:
+        diff['stop'] = (original['stop'], port['stop'])
+    elif original['stop'] != 'time' and \
+            original['virtual_ms'] != port['virtual_ms']:
+        diff['ended at ms'] = (original['virtual_ms'], port['virtual_ms'])
+    for key in sorted(set(original['outcome']) & set(port['outcome'])):
+        if original['outcome'][key] != port['outcome'][key]:
+            diff[key] = (original['outcome'][key], port['outcome'][key])
+    for key in expected:
+        diff.pop(key, None)
+    return diff
+
+
+def compared_outcomes(original, port, expected=()):
+    """Return the outcomes compare_outcomes compares (but 'stop')."""
+    keys = set(original['outcome']) & set(port['outcome'])
+    if original['stop'] == port['stop'] != 'time':
+        keys.add('ended at ms')
+    return sorted(keys - set(expected))
+
+
+def compare_pair(pair_name, seed=SEED, seconds=SECONDS):
+    """Run both sides of a pair, with and without tracemalloc.
+
+    Return:
+        A dict of {'original': row, 'port': row, 'diff': {...},
+        'compared': [...]}, where a row summarizes the metrics of that
+        side.
+    """
+    result = {}
+    for side_name in ('original', 'port'):
+        timed = run_child(pair_name, side_name, seed, seconds)
+        traced = run_child(pair_name, side_name, seed, seconds,
+                           trace_malloc=True)
+        if compare_outcomes(timed, traced):
+            log.warning('{} {} is not deterministic: {}'.format(
+                pair_name, side_name, compare_outcomes(timed, traced)))
+        result[side_name] = {
+            'stop': timed['stop'],
+            'outcome': timed['outcome'],
+            'frames': timed['frames'],
+            'virtual_ms': timed['virtual_ms'],
+            'cpu_ms_p50': percentile(timed['cpu_ms'], 50),
+            'cpu_ms_p95': percentile(timed['cpu_ms'], 95),
+            'cpu_ms_total': sum(timed['cpu_ms']),
+            'alloc_kib_mean': statistics.mean(traced['alloc_kib'] or [0]),
+            'calls_per_frame': timed['calls'],
+        }
+    expected = PAIRS[pair_name].expected
+    result['diff'] = compare_outcomes(
+        result['original'], result['port'], expected)
+    result['compared'] = compared_outcomes(
+        result['original'], result['port'], expected)
+    return result
+
+
+def print_report(results):
+    header = '{:<8} {:<13} {:>6} {:>7} {:>8} {:>8} {:>9} {:>7} {:>7}'
+    row = '{:<8} {:<13} {:>6} {:>7.1f} {:>8.3f} {:>8.3f} {:>9.1f} ' \
+        '{:>7.1f} {:>7.1f}'
+    print(header.format(
+        'pair', 'side', 'frames', 'time s', 'cpu p50', 'cpu p95',
+        'alloc KiB', 'draws', 'blits'))
+    for pair_name, result in results.items():
+        for side_name in ('original', 'port'):
+            side = result[side_name]
+            calls = side['calls_per_frame']
+            print(row.format(
+                pair_name, PAIRS[pair_name].side(side_name).module,
+                side['frames'], side['virtual_ms'] / 1000, side['cpu_ms_p50'],
+                side['cpu_ms_p95'], side['alloc_kib_mean'],
+                calls.get('draw', 0) + calls.get('transform', 0),
+                calls.get('blit', 0) + calls.get('fill', 0),
+            ))
+        expected = PAIRS[pair_name].expected
+        if result['diff']:
+            for key, (original, port) in sorted(result['diff'].items()):
+                print('{:<8} outcome differs: {}: {} vs {}'.format(
+                    '', key, original, port))
+        elif result['compared']:
+            print('{:<8} outcomes match: {}'.format(
+                '', ', '.join(result['compared'])))
+        else:
+            print('{:<8} no outcomes compared'.format(''))
+        if expected:
+            print('{:<8} not compared: {}'.format('', ', '.join(
+                '{} ({})'.format(key, why)
+                for key, why in sorted(expected.items()))))
+    print('(cpu in ms per frame; alloc is the mean per-frame peak; draws '
+          'and blits are per frame)')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m bench.differential',
+        description='Compare the original games with their ports.')
+    parser.add_argument('pairs', nargs='*', default=list(PAIRS),
+                        help='pairs to compare (default: all)')
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--seconds', type=float, default=SECONDS,
+                        help='virtual seconds to play each game for')
+    parser.add_argument('--json', help='write the results to this file')
+    parser.add_argument('--check', action='store_true',
+                        help='exit non-zero if any outcomes differ')
+    parser.add_argument('--child', nargs=2, help=argparse.SUPPRESS)
+    parser.add_argument('--trace-malloc', action='store_true',
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        summary = drive(*args.child, seed=args.seed, seconds=args.seconds,
+                        trace_malloc=args.trace_malloc)
+        print(json.dumps(summary))
+        return 0
+
+    results = collections.OrderedDict(
+        (name, compare_pair(name, seed=args.seed, seconds=args.seconds))
+        for name in args.pairs
+    )
+    print_report(results)
+    if args.json:
+        with open(args.json, 'w') as fh:
+            json.dump(results, fh, indent=2, sort_keys=True)
+
+    if args.check and any(result['diff'] for result in results.values()):
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.WARNING)
+    sys.exit(main())
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""Time registered benchmarks and compare them against a baseline.
+
+A benchmark is a function that does its setup and returns the callable
+to time:
+
+    @benchmark('tetris.is_valid_pos')
+    def bench_is_valid_pos():
+        board = ...
+        return lambda: board.is_valid_pos(piece)
+
+Each callable is run in batches large enough to last at least MIN_TIME
+seconds, and the batch is repeated; the per-call min, median, mean and
+standard deviation are reported. The min is the least noisy, so it is
+what's compared against the baseline.
+
+Results are written as JSON along with machine metadata, as that decides
+whether two runs are comparable at all.
+"""
+
+import argparse
+import gc
+import importlib
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+from gamelib.games import ROOT_DIR
+
+log = logging.getLogger(__name__)
+
+REPEAT = 5
+MIN_TIME = 0.05  # seconds per batch
+TOLERANCE = 0.10  # slowdown (as a fraction) that counts as a regression
+BASELINE_PATH = os.path.join(ROOT_DIR, 'bench', 'baseline.json')
+
+BENCHMARKS = {}
+
+
+class Benchmark():
+    """A named function returning the callable to time."""
+
+    def __init__(self, name, setup):
+        self.name = name
+        self.setup = setup
+
+    def __repr__(self):
+        return '<Benchmark {}>'.format(self.name)
+
+
+def benchmark(name):
+    """Register the decorated setup function under the given name."""
+    def decorator(setup):
+        if name in BENCHMARKS:
+            raise ValueError('Duplicate benchmark: {}'.format(name))
+        BENCHMARKS[name] = Benchmark(name, setup)
+        return setup
+    return decorator
+
+
+#
+#  ######
+#  #     # #    # #    #
+#  #     # #    # ##   #
+#  ######  #    # # #  #
+#  #   #   #    # #  # #
+#  #    #  #    # #   ##
+#  #     #  ####  #    #
+
+def calibrate(func, min_time=MIN_TIME):
+    """Return the number of calls per batch lasting at least min_time."""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return number
+        # aim a little past min_time, at most 10x more calls per step
+        if elapsed > 0:
+            number = int(number * min(10, 1.2 * min_time / elapsed)) + 1
+        else:
+            number *= 10
+
+
+def time_func(func, repeat=REPEAT, min_time=MIN_TIME):
+    """Time a callable.
+
+    Garbage collection is disabled while timing, as timeit does.
+
+    Return:
+        A dict of per-call times (in seconds) and the batch sizes.
+    """
+    number = calibrate(func, min_time)
+
+    times = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(number):
+                func()
+            times.append((time.perf_counter() - start) / number)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    return {
+        'min': min(times),
+        'median': statistics.median(times),
+        'mean': statistics.mean(times),
+        'stdev': statistics.stdev(times) if len(times) > 1 else 0.0,
+        'repeat': repeat,
+        'number': number,
+    }
+
+
+def run(names=None, repeat=REPEAT, min_time=MIN_TIME):
+    """Run the registered benchmarks.
+
+    Arguments:
+        names: Substrings selecting the benchmarks to run (default: all).
+    Return:
+        A dict of {name: timings}.
+    """
+    results = {}
+    for name, bench in sorted(BENCHMARKS.items()):
+        if names and not any(n in name for n in names):
+            continue
+        func = bench.setup()
+        results[name] = time_func(func, repeat=repeat, min_time=min_time)
+        log.debug('{}: {:.3g} s'.format(name, results[name]['min']))
+    return results
+
+
+def get_metadata():
+    """Describe the machine and software versions behind a run."""
+    meta = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'pygame': None,
+        'commit': None,
+    }
+    try:
+        import pygame
+        meta['pygame'] = pygame.version.ver
+    except ImportError:
+        pass
+    try:
+        meta['commit'] = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR,
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            universal_newlines=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    return meta
+
+
+#
+#   #####
+#  #     #  ####  #    # #####    ##   #####  ######
+#  #       #    # ##  ## #    #  #  #  #    # #
+#  #       #    # # ## # #    # #    # #    # #####
+#  #       #    # #    # #####  ###### #####  #
+#  #     # #    # #    # #      #    # #   #  #
+#   #####   ####  #    # #      #    # #    # ######
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """Compare results against a baseline.
+
+    Arguments:
+        results, baseline: Dicts of {name: timings}.
+        tolerance: The fraction a benchmark may slow down by before it
+            counts as a regression.
+    Return:
+        A list of (name, baseline s, current s, ratio, status) tuples,
+        where status is 'regression', 'improved', 'ok' or 'new'.
+    """
+    row_list = []
+    for name, timings in sorted(results.items()):
+        current = timings['min']
+        if name not in baseline:
+            row_list.append((name, None, current, None, 'new'))
+            continue
+        previous = baseline[name]['min']
+        ratio = current / previous if previous else float('inf')
+        if ratio > 1 + tolerance:
+            status = 'regression'
+        elif ratio < 1 - tolerance:
+            status = 'improved'
+        else:
+            status = 'ok'
+        row_list.append((name, previous, current, ratio, status))
+    return row_list
+
+
+def format_time(seconds):
+    """Format a time with a sensible unit."""
+    if seconds is None:
+        return '-'
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return '{:.2f} {}'.format(seconds / scale, unit)
+    return '{:.0f} ns'.format(seconds / 1e-9)
+
+
+def load(path):
+    """Load a results file as (metadata, results)."""
+    with open(path) as fh:
+        data = json.load(fh)
+    return data['meta'], data['results']
+
+
+def save(path, meta, results):
+    """Write a results file."""
+    with open(path, 'w') as fh:
+        json.dump({'meta': meta, 'results': results},
+                  fh, indent=2, sort_keys=True)
+    return
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m bench',
+        description='Time the hot paths of gamelib and the games.')
+    parser.add_argument('names', nargs='*',
+                        help='run benchmarks whose names contain these')
+    parser.add_argument('-l', '--list', action='store_true',
+                        help='list the benchmarks and exit')
+    parser.add_argument('-n', '--repeat', type=int, default=REPEAT,
+                        help='batches per benchmark')
+    parser.add_argument('--min-time', type=float, default=MIN_TIME,
+                        help='minimum seconds per batch')
+    parser.add_argument('--json', help='write the results to this file')
+    parser.add_argument('--baseline', default=BASELINE_PATH,
+                        help='results to compare against')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='store the results as the new baseline')
+    parser.add_argument('-t', '--tolerance', type=float, default=TOLERANCE,
+                        help='allowed slowdown, e.g., 0.1 for 10%%')
+    args = parser.parse_args(argv)
+
+    importlib.import_module('bench.suite')  # registers the benchmarks
+
+    if args.list:
+        for name in sorted(BENCHMARKS):
+            print(name)
+        return 0
+
+    meta = get_metadata()
+    results = run(args.names, repeat=args.repeat, min_time=args.min_time)
+    if args.json:
+        save(args.json, meta, results)
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        base_meta, baseline = load(args.baseline)
+        for key in ('machine', 'processor', 'python', 'pygame'):
+            if base_meta.get(key) != meta.get(key):
+                log.warning('baseline {} differs: {} vs {}'.format(
+                    key, base_meta.get(key), meta.get(key)))
+
+    row_list = compare(results, baseline, tolerance=args.tolerance)
+    print('{:<36} {:>11} {:>11} {:>8}  {}'.format(
+        'benchmark', 'baseline', 'current', 'change', 'status'))
+    for name, previous, current, ratio, status in row_list:
+        change = '-' if ratio is None else '{:+.1%}'.format(ratio - 1)
+        print('{:<36} {:>11} {:>11} {:>8}  {}'.format(
+            name, format_time(previous), format_time(current),
+            change, status))
+
+    if args.save_baseline:
+        save(args.baseline, meta, results)
+        print('saved baseline to {}'.format(args.baseline))
+
+    n_regressed = sum(1 for row in row_list if row[-1] == 'regression')
+    if n_regressed:
+        print('{} benchmark(s) regressed by more than {:.0%}'.format(
+            n_regressed, args.tolerance), file=sys.stderr)
+        return 1
+    return 0
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Time the cold start of each chapter's game.
+
+Every sample runs in a fresh interpreter, so nothing is cached between
+runs. Three times are reported per game:
+
+    process: wall time of the whole child process (interpreter included)
+    import: time to import the game module (gamelib, pygame, assets)
+    init: time of pygame.init() (display and mixer subsystems)
+
+The SDL dummy drivers are used, so no window is opened.
+
+Usage:
+    python -m bench.startup [-n REPEAT] [--json PATH] [game ...]
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from gamelib.games import GAMES, ROOT_DIR
+
+log = logging.getLogger(__name__)
+
+# run inside the child; prints "<import seconds> <init seconds>"
+CHILD_SCRIPT = '''
+import time
+t0 = time.perf_counter()
+import {module}
+t1 = time.perf_counter()
+import pygame
+pygame.init()
+t2 = time.perf_counter()
+print(t1 - t0, t2 - t1)
+'''
+
+
+def child_env(chapter):
+    """Return the environment for a headless child process."""
+    env = dict(os.environ)
+    path_list = [ROOT_DIR, os.path.join(ROOT_DIR, chapter)]
+    if env.get('PYTHONPATH'):
+        path_list.append(env['PYTHONPATH'])
+    env['PYTHONPATH'] = os.pathsep.join(path_list)
+    env.setdefault('SDL_VIDEODRIVER', 'dummy')
+    env.setdefault('SDL_AUDIODRIVER', 'dummy')
+    env.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+    env['GAMELIB_SCORES'] = ''  # scripted games aren't high scores
+    return env
+
+
+def time_cold_start(game, repeat=5):
+    """Time `repeat` cold starts of the given game.
+
+    Arguments:
+        game: A key of GAMES.
+        repeat: The number of fresh processes to start.
+    Return:
+        A dict of {'process': [...], 'import': [...], 'init': [...]}
+        with one time (in seconds) per sample.
+    Raises:
+        subprocess.CalledProcessError if the game fails to import.
+    """
+    chapter, module = GAMES[game]
+    cmd = [sys.executable, '-c', CHILD_SCRIPT.format(module=module)]
+    env = child_env(chapter)
+
+    samples = {'process': [], 'import': [], 'init': []}
+    for i in range(repeat):
+        start = time.perf_counter()
+        output = subprocess.run(
+            cmd, env=env, cwd=ROOT_DIR, check=True,
+            stdout=subprocess.PIPE, universal_newlines=True,
+        ).stdout
+        samples['process'].append(time.perf_counter() - start)
+
+        import_time, init_time = output.split()[-2:]
+        samples['import'].append(float(import_time))
+        samples['init'].append(float(init_time))
+    return samples
+
+
+def summarize(samples):
+    """Reduce each list of samples to its min and median."""
+    return {
+        name: {'min': min(values), 'median': statistics.median(values)}
+        for name, values in samples.items()
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('games', nargs='*', default=sorted(GAMES),
+                        help='games to time (default: all)')
+    parser.add_argument('-n', '--repeat', type=int, default=5,
+                        help='cold starts per game')
+    parser.add_argument('--json', help='write the results to this file')
+    args = parser.parse_args(argv)
+
+    results = {}
+    print('{:<10} {:>12} {:>12} {:>12}'.format(
+        'game', 'process ms', 'import ms', 'init ms'))
+    for game in args.games:
+        results[game] = summarize(time_cold_start(game, args.repeat))
+        print('{:<10} {:>12.1f} {:>12.1f} {:>12.1f}'.format(
+            game, *(results[game][k]['median'] * 1000
+                    for k in ('process', 'import', 'init'))))
+
+    if args.json:
+        with open(args.json, 'w') as fh:
+            json.dump(results, fh, indent=2, sort_keys=True)
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+"""The hot paths of each game, registered with bench.harness.
+
+Every game is set up on a headless Display (an off-screen Surface, with
+animations fast-forwarded) with an RNG seeded from SEED, so runs do the
+same work. The full-frame benchmarks draw everything the game loop draws
+in a frame, short of the flip.
+"""
+
+import itertools
+import logging
+import os
+import traceback
+
+import pygame
+from bench.harness import benchmark
+from gamelib import capture as gamecapture
+from gamelib import rng as gamerng
+from gamelib import colors, fonts, icons, sprites, streamlog
+from gamelib.display import headless_display
+from gamelib.games import load_game
+
+SEED = 20170901
+ICON_SIZE = 40
+
+
+#
+#  #######
+#     #    ###### ##### #####  #  ####
+#     #    #        #   #    # # #
+#     #    #####    #   #    # #  ####
+#     #    #        #   #####  #      #
+#     #    #        #   #   #  # #    #
+#     #    ######   #   #    # #  ####
+
+def make_tetris_board():
+    """Return (blocks, board): a board with a ragged stack of pieces."""
+    blocks = load_game('blocks')
+    display = headless_display(
+        fps=blocks.FPS, win_width=blocks.WIN_WIDTH,
+        win_height=blocks.WIN_HEIGHT)
+    blocks.REG_FONT = pygame.font.Font(fonts.open_sans, 18)
+
+    rng = gamerng.RNG(SEED)
+    board = blocks.TetrisBoard(display, rng=rng)
+    for y in range(board.BOARD_H // 2, board.BOARD_H):
+        for x in range(board.BOARD_W):
+            if rng.random() < 0.7:
+                board.board[y][x] = rng.choice(list(blocks.COLOR_LOOKUP))
+    return blocks, board
+
+
+@benchmark('tetris.is_valid_pos')
+def bench_tetris_is_valid_pos():
+    blocks, board = make_tetris_board()
+    piece = blocks.TetrisPiece(rng=board.rng)
+    piece.y = board.BOARD_H // 2 - 3  # just above the stack
+    moves = [(0, 0), (-1, 0), (1, 0), (0, 1)]
+
+    def run():
+        for adj_x, adj_y in moves:
+            board.is_valid_pos(piece, adj_x=adj_x, adj_y=adj_y)
+    return run
+
+
+@benchmark('tetris.remove_completed_lines')
+def bench_tetris_remove_completed_lines():
+    blocks, board = make_tetris_board()
+    color = next(iter(blocks.COLOR_LOOKUP))
+    for y in (board.BOARD_H - 1, board.BOARD_H - 3):
+        board.board[y] = [color] * board.BOARD_W
+    template = [row[:] for row in board.board]
+
+    # includes restoring the board: a 20x10 list copy, and (as it's a new
+    # board) counting its stats; see tetris.count_stats
+    def run():
+        board.board = [row[:] for row in template]
+        board.score = 0
+        board.remove_completed_lines()
+    return run
+
+
+@benchmark('tetris.count_stats')
+def bench_tetris_count_stats():
+    blocks, board = make_tetris_board()
+    return board.count_stats  # (add_piece etc. keep them up to date)
+
+
+@benchmark('tetris.draw_frame')
+def bench_tetris_draw_frame():
+    blocks, board = make_tetris_board()
+    piece = blocks.TetrisPiece(rng=board.rng)
+    next_piece = blocks.TetrisPiece(rng=board.rng)
+
+    def run():
+        board.draw(next_piece)
+        piece.draw(board._display)
+    return run
+
+
+@benchmark('tetris.redraw_layer')
+def bench_tetris_redraw_layer():
+    blocks, board = make_tetris_board()
+    return board.redraw_layer  # every locked box (e.g., a replay keyframe)
+
+
+#
+#  #######
+#  #       #      ######  ####    ##   #    #  ####
+#  #       #      #      #    #  #  #  ##   # #
+#  #####   #      #####  #      #    # # #  #  ####
+#  #       #      #      #  ### ###### #  # #      #
+#  #       #      #      #    # #    # #   ## #    #
+#  ####### ###### ######  ####  #    # #    #  ####
+
+def make_worm(length=60):
+    """Return (elegans, worm): a worm coiled back and forth."""
+    elegans = load_game('elegans')
+    worm = elegans.Elegans(rng=gamerng.RNG(SEED))
+    coord_list = []
+    for i in range(length):
+        row, col = divmod(i, 10)
+        col = col if row % 2 == 0 else 9 - col
+        coord_list.append({'x': 5 + col, 'y': 2 + row})
+    worm.coord = coord_list
+    return elegans, worm
+
+
+@benchmark('elegans.move')
+def bench_elegans_move():
+    elegans, worm = make_worm()
+    directions = itertools.cycle(
+        [elegans.UP, elegans.LEFT, elegans.DOWN, elegans.RIGHT])
+
+    def run():  # move in a tight circle; shrink keeps the length fixed
+        worm.move(next(directions))
+        worm.shrink()
+    return run
+
+
+@benchmark('elegans.has_self_collision')
+def bench_elegans_has_self_collision():
+    elegans, worm = make_worm()
+    return worm.has_self_collision
+
+
+@benchmark('elegans.draw_frame')
+def bench_elegans_draw_frame():
+    elegans, worm = make_worm()
+    display = headless_display(
+        fps=elegans.FPS, win_width=elegans.WIN_WIDTH,
+        win_height=elegans.WIN_HEIGHT)
+    apple = {'x': 20, 'y': 20}
+    board = elegans.make_board()
+
+    def run():
+        elegans.clear_board(board)
+        worm.draw(board)
+        elegans.draw_apple(board, apple)
+        board.draw(display.display)
+        elegans.draw_score(display, worm.length - 3)
+    return run
+
+
+@benchmark('elegans.draw_title')
+def bench_elegans_draw_title():
+    elegans = load_game('elegans')
+    display = headless_display(
+        fps=elegans.FPS, win_width=elegans.WIN_WIDTH,
+        win_height=elegans.WIN_HEIGHT)
+    font = pygame.font.Font(fonts.open_sans, 100)
+    rotate_list = [3, -7]
+    title_list = [  # as show_start_screen, but built up front
+        sprites.RotationCache(
+            font.render('elegans!', True, color), step=rot, prebuild=True)
+        for color, rot in zip(
+            (colors.colorblind_14.dark_blue, colors.colorblind_14.blue),
+            rotate_list,
+        )
+    ]
+    center = (display.width / 2, display.height / 2)
+    frames = itertools.count()
+
+    def run():
+        frame = next(frames)
+        for title, rot in zip(title_list, rotate_list):
+            title.blit(display.display, frame * rot, center)
+    return run
+
+
+#
+#   #####
+#  #     # #      # #####  ######
+#  #       #      # #    # #
+#   #####  #      # #    # #####
+#        # #      # #    # #
+#  #     # #      # #    # #
+#   #####  ###### # #####  ######
+
+def make_slide_board():
+    """Return (slide, board): a shuffled board, with buttons."""
+    slide = load_game('slide')
+    display = headless_display(
+        fps=slide.FPS, win_width=slide.WIN_WIDTH,
+        win_height=slide.WIN_HEIGHT, bg_color=slide.BG_COLOR,
+        bg_color_light=slide.BG_COLOR_LIGHT, font=slide.FONT,
+        font_size=slide.FONT_SIZE,
+    )
+    buttons = [
+        slide.GameButton(
+            display, 'New Game', action=slide.new_game,
+            coord=(display.width - slide.SIDE_BAR_WIDTH,
+                   display.height - 90),
+        ),
+        slide.GameButton(
+            display, 'Reset', action=slide.reset_game,
+            coord=(display.width - slide.SIDE_BAR_WIDTH,
+                   display.height - 60),
+        ),
+    ]
+    board = slide.SlideBoard(display, buttons, rng=gamerng.RNG(SEED))
+    return slide, board
+
+
+@benchmark('slide.slide_to_blank')
+def bench_slide_slide_to_blank():
+    slide, board = make_slide_board()
+    # headless, so the slide animation finishes as soon as it's added
+    directions = itertools.cycle(
+        [slide.LEFT, slide.UP, slide.RIGHT, slide.DOWN])
+
+    def run():
+        direction = next(directions)
+        while not board.is_valid_move(direction):
+            direction = next(directions)
+        board.slide_to_blank(direction)
+    return run
+
+
+@benchmark('slide.is_solved')
+def bench_slide_is_solved():
+    slide, board = make_slide_board()
+    return board.is_solved
+
+
+@benchmark('slide.draw_frame')
+def bench_slide_draw_frame():
+    slide, board = make_slide_board()
+    return lambda: board.draw_board(msg='New Game')
+
+
+#
+#  #     #
+#  ##   ## ###### #    #  ####  #####  #   #
+#  # # # # #      ##  ## #    # #    #  # #
+#  #  #  # #####  # ## # #    # #    #   #
+#  #     # #      #    # #    # #####    #
+#  #     # #      #    # #    # #   #    #
+#  #     # ###### #    #  ####  #    #   #
+
+def make_memory_board(revealed=True):
+    """Return (memory, board), with every box revealed by default."""
+    memory = load_game('memory')
+    display = headless_display(
+        fps=memory.FPS, win_width=memory.WIN_WIDTH,
+        win_height=memory.WIN_HEIGHT, bg_color=memory.BG_COLOR,
+        bg_color_light=memory.BG_COLOR_LIGHT,
+    )
+    board = memory.GameBoard(display, rng=gamerng.RNG(SEED))
+    for box in board.board.values():
+        box.revealed = revealed
+    return memory, board
+
+
+@benchmark('memory.get_randomized_board')
+def bench_memory_get_randomized_board():
+    memory, board = make_memory_board()
+    return lambda: board.get_randomized_board(
+        board.n_col, board.n_row, rng=board.rng)
+
+
+@benchmark('memory.draw_frame')
+def bench_memory_draw_frame():
+    memory, board = make_memory_board()
+
+    def run():
+        board.display_obj.fill()
+        board.draw_board()
+    return run
+
+
+#
+#  ######
+#  #     #   ##   ##### ##### ###### #####  #    #  ####
+#  #     #  #  #    #     #   #      #    # ##   # #
+#  ######  #    #   #     #   #####  #    # # #  #  ####
+#  #       ######   #     #   #      #####  #  # #      #
+#  #       #    #   #     #   #      #   #  #   ## #    #
+#  #       #    #   #     #   ###### #    # #    #  ####
+
+@benchmark('patterns.draw_frame')
+def bench_patterns_draw_frame():
+    patterns = load_game('patterns')
+    display = headless_display()
+    board = patterns.SimonBoard(display, rng=gamerng.RNG(SEED))
+    board.fg_color = colors.black  # as set by patterns.main
+    board.box_list[0].flash_alpha = 128  # one pad mid-flash
+    return board.draw
+
+
+#
+#   #####
+#  #     #   ##   #####  ##### #    # #####  ######
+#  #        #  #  #    #   #   #    # #    # #
+#  #       #    # #    #   #   #    # #    # #####
+#  #       ###### #####    #   #    # #####  #
+#  #     # #    # #        #   #    # #   #  #
+#   #####  #    # #        #    ####  #    # ######
+
+def make_capture_bench(make_draw):
+    """Time grabbing an 84x84 grayscale observation of a drawn frame."""
+    def setup():
+        surface = make_draw()
+        capture = gamecapture.Capture(size=(84, 84), grayscale=True,
+                                      n_stack=4)
+
+        def run():
+            capture.grab(surface)
+            capture.get_stack()
+        return run
+    return setup
+
+
+def draw_tetris():
+    blocks, board = make_tetris_board()
+    board.draw(blocks.TetrisPiece(rng=board.rng))
+    return board._display
+
+
+def draw_elegans():
+    elegans, worm = make_worm()
+    display = headless_display(
+        fps=elegans.FPS, win_width=elegans.WIN_WIDTH,
+        win_height=elegans.WIN_HEIGHT)
+    board = elegans.make_board()
+    elegans.clear_board(board)
+    worm.draw(board)
+    board.draw(display.display)
+    return display.display
+
+
+def draw_slide():
+    slide, board = make_slide_board()
+    board.draw_board()
+    return board.display.display
+
+
+benchmark('capture.tetris')(make_capture_bench(draw_tetris))
+benchmark('capture.elegans')(make_capture_bench(draw_elegans))
+benchmark('capture.slide')(make_capture_bench(draw_slide))
+
+
+#
+#  ###
+#   #   ####   ####  #    #  ####
+#   #  #    # #    # ##   # #
+#   #  #      #    # # #  #  ####
+#   #  #      #    # #  # #      #
+#   #  #    # #    # #   ## #    #
+#  ###  ####   ####  #    #  ####
+
+def make_icon_bench(func):
+    def setup():
+        headless_display()
+        surface = pygame.Surface((ICON_SIZE, ICON_SIZE))
+        return lambda: func(
+            surface, (0, 0), ICON_SIZE, colors.colorblind.red, colors.white)
+    return setup
+
+
+for _shape, _func in sorted(icons.get_shape_dict().items()):
+    benchmark('icons.draw_{}'.format(_shape))(make_icon_bench(_func))
+
+
+#
+#  #
+#  #        ####   ####   ####  # #    #  ####
+#  #       #    # #    # #    # # ##   # #    #
+#  #       #    # #      #      # # #  # #
+#  #       #    # #  ### #  ### # #  # # #  ###
+#  #       #    # #    # #    # # #   ## #    #
+#  #######  ####   ####   ####  # #    #  ####
+
+def make_null_logger():
+    """Return a logger that formats records and writes them to devnull."""
+    logger = logging.getLogger('bench.null')
+    if not logger.handlers:
+        handler = logging.StreamHandler(open(os.devnull, 'w'))
+        handler.setFormatter(logging.Formatter(
+            '[%(asctime)s - %(name)s:%(lineno)s - %(levelname)s] '
+            '%(message)s'))
+        logger.addHandler(handler)
+        logger.propagate = False
+    return logger
+
+
+def get_traceback_lines():
+    try:
+        {}['missing']
+    except KeyError as e:
+        return traceback.format_exception(type(e), e, e.__traceback__)
+
+
+@benchmark('streamlog.log_line')
+def bench_streamlog_log_line():
+    logger = make_null_logger()  # a logger call per line, on the caller
+    return lambda: logger.log(logging.ERROR, 'pygame warning: a line')
+
+
+@benchmark('streamlog.write_line')
+def bench_streamlog_write_line():
+    stream = streamlog.StreamLogger(make_null_logger(), logging.ERROR)
+    return lambda: stream.write('pygame warning: a line\n')
+
+
+@benchmark('streamlog.write_traceback')
+def bench_streamlog_write_traceback():
+    stream = streamlog.StreamLogger(make_null_logger(), logging.ERROR)
+    line_list = get_traceback_lines()
+
+    def run():  # as print_exc writes it: a line at a time
+        for line in line_list:
+            stream.write(line)
+    return run
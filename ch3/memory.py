@@ -5,11 +5,11 @@ Based on memorypuzzle by Al Sweigart
 """
 
 import logging
-import random
 import sys
 
 import pygame
-from gamelib import colors, icons, sounds
+from gamelib import rng as gamerng
+from gamelib import Display, animation, colors, icons, sounds
 from pygame.locals import K_ESCAPE, KEYUP, MOUSEBUTTONUP, MOUSEMOTION, QUIT
 
 log = logging.getLogger(__name__)
@@ -31,45 +31,10 @@ BOX_COLOR = colors.dark_gray
 BOX_BG_COLOR = colors.white
 HIGHLIGHT_COLOR = colors.blue
 
-
-#
-#  ######
-#  #     # #  ####  #####  #        ##   #   #
-#  #     # # #      #    # #       #  #   # #
-#  #     # #  ####  #    # #      #    #   #
-#  #     # #      # #####  #      ######   #
-#  #     # # #    # #      #      #    #   #
-#  ######  #  ####  #      ###### #    #   #
-
-class Display():
-    """Store and handle data related to pygame.display."""
-
-    def __init__(
-            self, fps=FPS, win_width=WIN_WIDTH, win_height=WIN_HEIGHT,
-            bg_color=BG_COLOR, bg_color_light=BG_COLOR_LIGHT, caption='',
-    ):
-        """Initialize a pygame display."""
-        self.fps = fps
-        self.fps_clock = pygame.time.Clock()
-        self.width = win_width
-        self.height = win_height
-        self.size = (win_width, win_height)
-        self.display = pygame.display.set_mode(self.size)
-
-        self.caption = caption
-        pygame.display.set_caption(self.caption)
-
-        self.bg_color = bg_color
-        self.bg_color_light = bg_color_light
-        self.display.fill(self.bg_color)
-
-    def fill(self, color=None):
-        """Fill in the background."""
-        color = color if color else self.bg_color
-        self.display.fill(color)
-
-    def tick(self):
-        self.fps_clock.tick(self.fps)
+# sounds
+MATCH_SOUND = 'pickup'
+FIRST_SOUND = 'beep2'
+SECOND_SOUND = 'beep4'
 
 
 #
@@ -102,6 +67,7 @@ class GameBox():
         self.icon = icon
         self.shape, self.color = icon
         self.revealed = False
+        self.coverage = None  # width of the cover while animating
 
         self.pixel_coord = self.upper_left_coord_of_box(*coord)
         self.pixel_x, self.pixel_y = self.pixel_coord
@@ -151,13 +117,20 @@ class GameBox():
                 regardless of the value of self.revealed.
         Returns: None.
         """
-        if self.revealed or force_reveal:
+        if self.revealed or force_reveal or self.coverage is not None:
             # draw the icon
             pygame.draw.rect(display, self.box_bg_color, self.box)
             icons.draw(
                 display, self.shape, self.pixel_coord, self.box_size,
                 color=self.color, bg_color=self.box_bg_color,
             )
+            if self.coverage:
+                # partly covered (being revealed or covered)
+                left, top = self.pixel_coord
+                pygame.draw.rect(
+                    display, self.box_color,
+                    (left, top, self.coverage, self.box_size),
+                )
         else:
             # just draw the rectangle
             pygame.draw.rect(display, self.box_color, self.box)
@@ -198,11 +171,20 @@ class GameBoard():
             box_size=BOX_SIZE, gap_size=GAP_SIZE,
             box_color=BOX_COLOR, box_bg_color=BOX_BG_COLOR,
             highlight_color=HIGHLIGHT_COLOR,
-            reveal_speed=REVEAL_SPEED,
+            reveal_speed=REVEAL_SPEED, rng=None,
     ):
-        """Initialize the game board."""
+        """Initialize the game board.
+
+        Arguments:
+            rng: A random.Random (see gamelib.rng) for the layout and the
+                start animation; a new substream of the root if None.
+        """
         self.display_obj = display
+        self.rng = gamerng.get_rng(rng)
         self.display = display.display
+        self.animations = display.animations
+        self.intro = None  # the start (or won) animation
+        self.finished = False
 
         # validate variables
         if (n_col * n_row) % 2 != 0:
@@ -260,14 +242,16 @@ class GameBoard():
             'box_color': self.box_color,
             'box_bg_color': self.box_bg_color,
         })
-        self.board = self.get_randomized_board(self.n_col, self.n_row)
+        self.board = self.get_randomized_board(
+            self.n_col, self.n_row, rng=self.rng)
 
     @classmethod
-    def get_randomized_board(cls, n_col, n_row):
+    def get_randomized_board(cls, n_col, n_row, rng=None):
         """Get a dictionary of GameBox items, with random shapes and colors.
 
         Arguments:
             n_col, n_row: The dimensions of the board.
+            rng: A random.Random (see gamelib.rng) to shuffle with.
         Return:
             A dict with of GameBox objects, {coord: box}.
         """
@@ -276,10 +260,11 @@ class GameBoard():
             for color in cls.COLORS
             for shape in cls.SHAPES
         ]
-        random.shuffle(icons)  # shake up the order
+        rng = gamerng.get_rng(rng)
+        rng.shuffle(icons)  # shake up the order
         n_used = int(n_col * n_row / 2)
         icons = icons[:n_used] * 2
-        random.shuffle(icons)
+        rng.shuffle(icons)
 
         # create the board structure
         coord = [(x, y) for x in range(n_col) for y in range(n_row)]
@@ -318,56 +303,93 @@ class GameBoard():
     #  #    # #   ## # #    # #    #   #   # #    # #   ##
     #  #    # #    # # #    # #    #   #   #  ####  #    #
 
+    def is_locked(self):
+        """Check if input should wait for the start or won animation."""
+        return self.intro is not None and not self.intro.done
+
     def start_game_animation(self):
         """Randomly reveal boxes (n_col at a time) at game start."""
         boxes = list(self.board.values())
-        random.shuffle(boxes)
+        self.rng.shuffle(boxes)
         box_groups = [boxes[i::self.n_row] for i in range(self.n_row)]
 
-        self.draw_board()
+        steps = [animation.Wait(1000)]
         for box_group in box_groups:
-            self.reveal_boxes_animation(box_group)
-            self.cover_boxes_animation(box_group)
+            steps.append(self.reveal_boxes_animation(box_group))
+            steps.append(self.cover_boxes_animation(box_group))
+        self.intro = self.animations.add(animation.Sequence(*steps))
+        return self.intro
+
+    def get_coverage_duration(self):
+        """Return the ms to reveal (or cover) a box.
+
+        Matches the old frame-by-frame animation: one frame per
+        reveal_speed pixels.
+        """
+        n_frames = len(range(
+            0, self.box_size + self.reveal_speed, self.reveal_speed))
+        return n_frames * 1000 / self.display_obj.fps
+
+    def coverage_animation(self, boxes, start, end):
+        """Return an animation of the cover over the boxes moving.
+
+        Arguments:
+            boxes: A list of box objects.
+            start, end: The cover widths, from 0 to box_size.
+        Returns: The (unscheduled) animation.
+        """
+        def set_coverage(coverage):
+            for box in boxes:
+                box.coverage = int(coverage)
+
+        def clear_coverage():
+            for box in boxes:
+                box.coverage = None
+
+        return animation.Tween(
+            self.get_coverage_duration(), start, end,
+            on_update=set_coverage, on_complete=clear_coverage,
+        )
 
     def reveal_boxes_animation(self, boxes_to_reveal):
         """Animate the box revealing.
 
         Arguments: A list of box objects.
-        Returns: None.
+        Returns: The (unscheduled) animation.
         """
-        cov_list = range(
-            self.box_size,
-            (-1 * self.reveal_speed) - 1,
-            -1 * self.reveal_speed,
-        )
-        for coverage in cov_list:
-            self.draw_box_covers(boxes_to_reveal, coverage)
-        return
+        return self.coverage_animation(boxes_to_reveal, self.box_size, 0)
 
     def cover_boxes_animation(self, boxes_to_cover):
         """Animate the box covering.
 
         Arguments: A list of box objects.
-        Returns: None.
+        Returns: The (unscheduled) animation.
         """
-        cov_list = range(
-            0, self.box_size + self.reveal_speed, self.reveal_speed)
-        for coverage in cov_list:
-            self.draw_box_covers(boxes_to_cover, coverage)
-        return
+        return self.coverage_animation(boxes_to_cover, 0, self.box_size)
 
     def game_won_animation(self):
-        """Flash the background color when the player has won."""
+        """Flash the background color when the player has won.
+
+        Sets self.finished once done.
+        """
         color1 = self.display_obj.bg_color
         color2 = self.display_obj.bg_color_light
 
+        def set_bg_color(color):
+            self.display_obj.bg_color = color
+
+        def finish():
+            self.finished = True
+
+        steps = []
         for i in range(4):
             color1, color2 = color2, color1
-            self.display.fill(color1)
-            self.draw_board()
-            pygame.display.update()
-            pygame.time.wait(300)
-        return
+            steps.append(animation.Call(set_bg_color, color1))
+            steps.append(animation.Wait(300))
+        steps.append(animation.Wait(1000))
+        self.intro = self.animations.add(
+            animation.Sequence(*steps, on_complete=finish))
+        return self.intro
 
     #
     #  ######
@@ -378,33 +400,6 @@ class GameBoard():
     #  #     # #   #  #    # ##  ## # #   ## #    #
     #  ######  #    # #    # #    # # #    #  ####
 
-    def draw_box_covers(self, boxes, coverage):
-        """Draw boxes being covered/revealed.
-
-        Draw a single frame for the animation of covering and
-        revealing boxes.
-
-        Arguments:
-            boxes: The list of boxes to cover/reveal.
-            coverage: Portion of box to cover.
-        Returns: None.
-        """
-        coverage = min(coverage, self.box_size)
-        for box in boxes:
-            left, top = box.pixel_coord
-
-            # draw the card and it's icon
-            box.draw(self.display, force_reveal=True)
-
-            if coverage > 0:  # huh?
-                pygame.draw.rect(
-                    self.display, self.box_color,
-                    (left, top, coverage, self.box_size),
-                )
-        pygame.display.update()
-        self.display_obj.tick()
-        return
-
     def draw_board(self):
         """Draws all boxes in their covered or reavealed state."""
         for box_coord, box in sorted(self.board.items()):
@@ -432,14 +427,69 @@ class GameBoard():
 #  #    # #    # # #    #
 
 
+def handle_click(board, box, first_box):
+    """Reveal a clicked box and check it against the first choice.
+
+    Arguments:
+        board: The GameBoard.
+        box: The (unrevealed) box clicked.
+        first_box: The first box picked, or None if this is the first.
+    Return:
+        The new first box.
+    """
+    animations = board.animations
+    box.revealed = True
+
+    if first_box is None:
+        # first choice -- keep it open
+        animations.add(animation.Sequence(
+            board.reveal_boxes_animation([box]),
+            animation.Call(sounds.bank.play, FIRST_SOUND),
+        ))
+        return box
+
+    if box != first_box:
+        # second choice -- icon's don't match
+        # -- play a sound then cover the two boxes
+        pair = [first_box, box]
+
+        def cover():
+            for covered in pair:
+                covered.revealed = False
+
+        animations.add(animation.Sequence(
+            board.reveal_boxes_animation([box]),
+            animation.Call(sounds.bank.play, SECOND_SOUND),
+            animation.Wait(100),
+            board.cover_boxes_animation(pair),
+            animation.Call(cover),
+        ))
+    elif board.has_won():
+        # all boxes matched -- flash screen and reload
+        board.intro = animations.add(animation.Sequence(
+            board.reveal_boxes_animation([box]),
+            animation.Call(board.game_won_animation),
+        ))
+    else:
+        animations.add(animation.Sequence(
+            board.reveal_boxes_animation([box]),
+            animation.Call(sounds.bank.play, MATCH_SOUND),
+        ))
+    return None  # done handling the choices
+
+
 def main():
     """Entrypoint."""
+    sounds.init_mixer()
     pygame.init()
-    display_obj = Display(caption='Memory!')
+    sounds.bank.preload(
+        [MATCH_SOUND, FIRST_SOUND, SECOND_SOUND], background=True)
+    display_obj = Display(
+        fps=FPS, win_width=WIN_WIDTH, win_height=WIN_HEIGHT,
+        bg_color=BG_COLOR, bg_color_light=BG_COLOR_LIGHT, caption='Memory!',
+    )
+    rng = gamerng.get_rng()
     main_board = None
-    match_sound = pygame.mixer.Sound(sounds.pickup)
-    first_sound = pygame.mixer.Sound(sounds.beep2)
-    second_sound = pygame.mixer.Sound(sounds.beep4)
 
     mouse_coord = (0, 0)
     first_box = None  # store the (x, y) coord of the first box clicked
@@ -447,75 +497,49 @@ def main():
     while True:  # main game board
         mouse_clicked = False
 
-        if main_board:
+        with display_obj.phase('event'):
+            for event in pygame.event.get():
+                if event.type == QUIT or \
+                        (event.type == KEYUP and event.key == K_ESCAPE):
+                    pygame.quit()
+                    sys.exit()
+                elif event.type == MOUSEMOTION:
+                    mouse_coord = event.pos
+                elif event.type == MOUSEBUTTONUP:
+                    mouse_coord = event.pos
+                    mouse_clicked = True
+
+        with display_obj.phase('update'):
+            display_obj.animations.update(display_obj.dt)
+
+            if main_board and main_board.finished:
+                main_board = None  # won; start over
+
+            if not main_board:
+                # get a new board
+                main_board = GameBoard(display_obj, rng=rng)
+                main_board.start_game_animation()
+                mouse_coord = (-1, -1)
+
+            # box_coord = PIXEL_LOOKUP[mouse_coord]
+            box = main_board.get_box_at_pixel(mouse_coord)
+            if main_board.is_locked() or (box and box.coverage is not None):
+                box = None  # wait for the animation
+
+            if box and not box.revealed and mouse_clicked:
+                # reveal the box!
+                first_box = handle_click(main_board, box, first_box)
+
+        with display_obj.phase('draw'):
             # clear the board (remove highlights)
             display_obj.fill()
             main_board.draw_board()
-
-        # event handling loop
-        for event in pygame.event.get():
-            if event.type == QUIT or \
-                    (event.type == KEYUP and event.key == K_ESCAPE):
-                pygame.quit()
-                sys.exit()
-            elif event.type == MOUSEMOTION:
-                mouse_coord = event.pos
-            elif event.type == MOUSEBUTTONUP:
-                mouse_coord = event.pos
-                mouse_clicked = True
-
-        if not main_board:
-            # get a new board
-            # NOTE: we must wait until after checking events to run
-            #   the start animation, otherwise the first one won't happen
-            main_board = GameBoard(display_obj)
-            main_board.draw_board()
-
-            pygame.display.update()
-            pygame.time.wait(1000)
-
-            main_board.start_game_animation()
-            mouse_coord = (-1, -1)
-
-        # box_coord = PIXEL_LOOKUP[mouse_coord]
-        box = main_board.get_box_at_pixel(mouse_coord)
-        if box:
-            if not box.revealed:
+            if box and not box.revealed:
                 # simple mouse over
                 main_board.draw_box_highlight(box)
 
-            if not box.revealed and mouse_clicked:
-                # reveal the box!
-                main_board.reveal_boxes_animation([box])
-                box.revealed = True
-
-                if first_box is None:
-                    # first choice -- keep it open
-                    first_sound.play()
-                    first_box = box
-                else:
-                    # second choice -- check it and close if different
-                    if box != first_box:
-                        # icon's don't match
-                        # -- play a sound then cover the two boxes
-                        second_sound.play()
-                        pygame.time.wait(100)
-                        main_board.cover_boxes_animation([first_box, box])
-                        first_box.revealed = False
-                        box.revealed = False
-                    elif main_board.has_won():
-                        # all boxes matched -- flash screen and reload
-                        main_board.game_won_animation()
-                        main_board = None
-                        pygame.time.wait(1000)
-                    else:
-                        match_sound.play()
-
-                    first_box = None  # done handling the choices
-
         # redraw the screen
-        pygame.display.update()
-        display_obj.tick()
+        display_obj.update()
 
 
 if __name__ == '__main__':
@@ -15,12 +15,13 @@ down = 0,1
 """
 
 import logging
-import random
+import math
 import sys
 
 import pygame
 from gamelib import logging as gamelog
-from gamelib import GameBoard, colors, fonts
+from gamelib import rng as gamerng
+from gamelib import Display, GameBoard, animation, colors, fonts, telemetry
 from pygame.locals import (K_DOWN, K_ESCAPE, K_LEFT, K_RIGHT, K_UP, KEYUP,
                            MOUSEBUTTONUP, QUIT, K_a, K_d, K_s, K_w)
 
@@ -54,54 +55,6 @@ KEY_RIGHT = (K_RIGHT, K_d)
 KEY_UP = (K_UP, K_w)
 KEY_DOWN = (K_DOWN, K_s)
 
-#
-#  ######
-#  #     # #  ####  #####  #        ##   #   #
-#  #     # # #      #    # #       #  #   # #
-#  #     # #  ####  #    # #      #    #   #
-#  #     # #      # #####  #      ######   #
-#  #     # # #    # #      #      #    #   #
-#  ######  #  ####  #      ###### #    #   #
-
-
-class Display():
-    """Store and handle data related to pygame.display."""
-
-    def __init__(
-            self, fps=FPS, win_width=WIN_WIDTH, win_height=WIN_HEIGHT,
-            bg_color=BG_COLOR, bg_color_light=BG_COLOR_LIGHT, caption='',
-            font=FONT, font_size=FONT_SIZE,
-    ):
-        """Initialize a pygame display."""
-        self.fps = fps
-        self.fps_clock = pygame.time.Clock()
-        self.width = win_width
-        self.height = win_height
-        self.size = (win_width, win_height)
-        self.display = pygame.display.set_mode(self.size)
-
-        self.caption = caption
-        pygame.display.set_caption(self.caption)
-
-        self.bg_color = bg_color
-        self.bg_color_light = bg_color_light
-
-        self.font = pygame.font.Font(font, font_size)
-
-        self.fill()  # fill display with the bg color
-
-    def blit(self, *args, **kwargs):
-        """Draw?"""
-        self.display.blit(*args, **kwargs)
-
-    def fill(self, color=None):
-        """Fill in the background."""
-        color = color if color else self.bg_color
-        self.display.fill(color)
-
-    def tick(self):
-        self.fps_clock.tick(self.fps)
-
 #
 #  ######
 #  #     # #    # ##### #####  ####  #    #
@@ -178,6 +131,7 @@ class GameBox():
         self.box_coord = coord
         self.box_x, self.box_y = coord
         self.text = text
+        self.offset = (0, 0)  # pixel offset while sliding
 
         self.pixel_coord = self.upper_left_coord_of_box(*coord)
         self.pixel_x, self.pixel_y = self.pixel_coord
@@ -263,12 +217,21 @@ class SlideBoard(GameBoard):
     def __init__(
         self, display, buttons={},
         n_col=N_COL, n_row=N_ROW,
-        box_color=TEXT_COLOR, box_bg_color=TILE_COLOR,
+        box_color=TEXT_COLOR, box_bg_color=TILE_COLOR, rng=None,
     ):
-        """Initialize."""
+        """Initialize.
+
+        Arguments:
+            rng: A random.Random (see gamelib.rng) to shuffle with; a new
+                substream of the root generator if None.
+        """
         super().__init__(display)
 
+        self.rng = gamerng.get_rng(rng)
         self.buttons = buttons
+        self.animations = display.animations
+        self.slide = None  # the slide being animated
+        self.n_moves = 0  # since the shuffle (or reset)
         self.n_col = n_col
         self.n_row = n_row
         self.box_color = box_color
@@ -407,14 +370,16 @@ class SlideBoard(GameBoard):
         for text, box in zip(self.initial_order, self.box_list):
             box.text = text
         self.set_tile_lookup()
+        self.n_moves = 0
 
     def shuffle(self):
         text_list = [text for text in self.text_lookup.keys()]
-        random.shuffle(text_list)
+        self.rng.shuffle(text_list)
         for text, box in zip(text_list, self.box_list):
             box.text = text
         self.set_tile_lookup()
         self.initial_order = text_list
+        self.n_moves = 0
         return
 
     #
@@ -450,21 +415,46 @@ class SlideBoard(GameBoard):
 
         move_text = self.coord_lookup[(move_x, move_y)]
         move_tile = self.box_list[move_text]
+        dest_tile = self.text_lookup['']
 
-        tmp_blank = GameBox(coord=(move_x, move_y), text='')
-
-        for i in range(0, self.box_size, self.animation_speed):
-            tmp_blank.draw(self.display)
-            move_tile.draw(
-                self.display, offset_x=(dir_x * i), offset_y=(dir_y * i))
-            pygame.display.update()
-            self.display.tick()
-
-        move_tile.swap_with(self.text_lookup[''])
+        move_tile.swap_with(dest_tile)
         self.set_tile_lookup()
+        self.n_moves += 1
+        telemetry.emit('slide.move', direction=direction, moves=self.n_moves)
 
+        self.slide_animation(dest_tile, dir_x, dir_y)
         return
 
+    def slide_animation(self, box, dir_x, dir_y):
+        """Animate a tile sliding into place.
+
+        The tile has already moved; it is drawn offset by one box against
+        the direction of the move, and the offset shrinks to zero. Any
+        slide still running is finished first.
+
+        Arguments:
+            box: The box the tile moved into.
+            dir_x, dir_y: The direction the tile moved.
+        Return:
+            The scheduled animation.
+        """
+        if self.slide:
+            self.animations.skip(self.slide)
+
+        n_frames = math.ceil(self.box_size / self.animation_speed)
+        duration = n_frames * 1000 / self.display.fps
+        distance = self.box_size + self.gap_size
+
+        def set_offset(remaining):
+            box.offset = (
+                int(-dir_x * remaining * distance),
+                int(-dir_y * remaining * distance),
+            )
+
+        self.slide = self.animations.add(animation.Tween(
+            duration, 1, 0, on_update=set_offset))
+        return self.slide
+
     #
     #  ######
     #  #     # #####    ##   #    # # #    #  ####
@@ -491,8 +481,15 @@ class SlideBoard(GameBoard):
             button.draw(self.display)
             # log.debug(button.pixel_coord)
 
+        # draw sliding tiles last so the blank tiles don't cover them
+        sliding = []
         for box in self.box_list:
-            box.draw(self.display)
+            if box.offset != (0, 0):
+                sliding.append(box)
+            else:
+                box.draw(self.display)
+        for box in sliding:
+            box.draw(self.display, *box.offset)
 
 #
 #   ####  #    # # #####
@@ -539,7 +536,11 @@ def main():
     """Entrypoint."""
     pygame.init()
 
-    display = Display(caption='Slide!')
+    display = Display(
+        fps=FPS, win_width=WIN_WIDTH, win_height=WIN_HEIGHT,
+        bg_color=BG_COLOR, bg_color_light=BG_COLOR_LIGHT, caption='Slide!',
+        font=FONT, font_size=FONT_SIZE,
+    )
 
     buttons = [
         GameButton(
@@ -558,42 +559,48 @@ def main():
     while True:
         slide_to = None
 
-        check_for_quit()  # quit if any quit event found
-        for event in pygame.event.get():
-            if event.type == MOUSEBUTTONUP:
-                mouse_coord = event.pos
-                for button in buttons:
-                    if button.contains(mouse_coord):
-                        button.action(main_board)
-                        msg = button.text
-                        break
-
-                for direction, box in main_board.get_clickable_tiles().items():
-                    if box.contains(mouse_coord):
-                        slide_to = direction
-                        break
-
-            elif event.type == KEYUP:
-                if event.key in KEY_UP:
-                    slide_to = UP
-                elif event.key in KEY_DOWN:
-                    slide_to = DOWN
-                elif event.key in KEY_LEFT:
-                    slide_to = LEFT
-                elif event.key in KEY_RIGHT:
-                    slide_to = RIGHT
-
-        if slide_to:
-            # slide, and if solved, alert the user
-            # -- __must__ slide to trigger solved alert!
-            main_board.slide_to_blank(slide_to)
-            msg = None  # clear current message on move
-
-        msg = 'Solved!' if main_board.is_solved() else msg
-        main_board.draw_board(msg)
-
-        pygame.display.update()
-        display.tick()
+        with display.phase('event'):
+            check_for_quit()  # quit if any quit event found
+            for event in pygame.event.get():
+                if event.type == MOUSEBUTTONUP:
+                    mouse_coord = event.pos
+                    for button in buttons:
+                        if button.contains(mouse_coord):
+                            button.action(main_board)
+                            msg = button.text
+                            break
+
+                    clickable = main_board.get_clickable_tiles()
+                    for direction, box in clickable.items():
+                        if box.contains(mouse_coord):
+                            slide_to = direction
+                            break
+
+                elif event.type == KEYUP:
+                    if event.key in KEY_UP:
+                        slide_to = UP
+                    elif event.key in KEY_DOWN:
+                        slide_to = DOWN
+                    elif event.key in KEY_LEFT:
+                        slide_to = LEFT
+                    elif event.key in KEY_RIGHT:
+                        slide_to = RIGHT
+
+        with display.phase('update'):
+            if slide_to:
+                # slide, and if solved, alert the user
+                # -- __must__ slide to trigger solved alert!
+                main_board.slide_to_blank(slide_to)
+                msg = None  # clear current message on move
+
+            display.animations.update(display.dt)
+
+            msg = 'Solved!' if main_board.is_solved() else msg
+
+        with display.phase('draw'):
+            main_board.draw_board(msg)
+
+        display.update()
 
 
 if __name__ == '__main__':
@@ -2,13 +2,15 @@
 """Implementation of Simon using pygame."""
 
 import logging
-import random
+import math
 import time
 
 import pygame
 from gamelib import logging as gamelog
+from gamelib import rng as gamerng
 from gamelib import util as gameutil
-from gamelib import Display, GameBoard, GameBox, colors, sounds
+from gamelib import (Display, GameBoard, GameBox, animation, colors,
+                     leaderboard, sounds, telemetry, tones)
 from pygame.locals import (K_PERIOD, K_SEMICOLON, K_SLASH, KEYUP,
                            MOUSEBUTTONUP, K_a, K_l, K_q, K_s, K_w)
 
@@ -18,6 +20,19 @@ log = logging.getLogger(__name__)
 FLASHDELAY = 200
 FLASHSPEED = 500
 
+N_PADS = 4
+
+BOX_COLORS = [
+    ('red', (155, 0, 0), (255, 0, 0)),
+    ('blue', (0, 0, 155), (0, 0, 255)),
+    ('green', (0, 155, 0), (0, 255, 0)),
+    ('yellow', (155, 155, 0), (255, 255, 0))
+]
+BOX_SOUNDS = ['beep1', 'beep2', 'beep3', 'beep4']
+FAIL_SOUND = 'fail'
+
+TONE_DURATION = 0.4
+
 
 class StopInput(Exception):
     pass  # use this exception when the input is fully matched
@@ -30,20 +45,65 @@ class SimonBox(GameBox):
         super().__init__(**kwargs)
         self.name = name
         self.highlight_color = highlight
-
-        if isinstance(sound, str):
-            self.sound = pygame.mixer.Sound(sound)
-        else:
-            self.sound = sound
+        self.sound = sound  # name of the sound in sounds.bank
+        self.flash_alpha = 0
+
+    def play_sound(self):
+        """Play the box's sound without waiting on the mixer."""
+        return sounds.bank.play(self.sound, priority=1)
+
+
+def get_pad_colors(n_pads):
+    """Return a (name, color, highlight) for each pad.
+
+    The first pads use BOX_COLORS; any extras are spread around the hue
+    wheel (by the golden angle, so neighbors differ).
+    """
+    color_list = BOX_COLORS[:n_pads]
+    for i in range(len(color_list), n_pads):
+        hue = (i * 137.5) % 360
+        color = pygame.Color(0, 0, 0)
+        color.hsva = (hue, 100, 60, 100)
+        bright = pygame.Color(0, 0, 0)
+        bright.hsva = (hue, 100, 100, 100)
+        color_list.append(('pad{}'.format(i), color, bright))
+    return color_list
+
+
+def get_pad_sounds(n_pads, synth=False):
+    """Return the sounds.bank name of the sound for each pad.
+
+    Uses the beep files when there are enough of them; otherwise (or if
+    `synth` is set) a tone up the pentatonic scale is synthesized for
+    each pad.
+    """
+    if not synth and n_pads <= len(BOX_SOUNDS):
+        return BOX_SOUNDS[:n_pads]
+    return [
+        tones.register(freq, TONE_DURATION)
+        for freq in tones.scale(n_pads)
+    ]
 
 
 class SimonBoard(GameBoard):
     """A game board for playing Simon."""
 
-    def __init__(self, display):
-        """Initialize gameboard."""
+    def __init__(self, display, n_pads=N_PADS, synth=False, rng=None):
+        """Initialize gameboard.
+
+        Arguments:
+            display: A gamelib Display.
+            n_pads: The number of pads (boxes) to play with; only the
+                first four have keys (the rest are clicked).
+            synth: If true, synthesize the pad sounds rather than
+                using the beep files (always done for more than four).
+            rng: A random.Random (see gamelib.rng) to pick the pattern
+                with; a new substream of the root generator if None.
+        """
         super().__init__(display)
-        box_layout = (2, 2)
+        self.rng = gamerng.get_rng(rng)
+        n_col = int(math.ceil(math.sqrt(n_pads)))
+        box_layout = (n_col, int(math.ceil(n_pads / n_col)))
         self.n_col, self.n_row = box_layout
         self.score = 0
 
@@ -66,13 +126,8 @@ class SimonBoard(GameBoard):
         })
 
         # define boxes
-        color_list = [
-            ('red', (155, 0, 0), (255, 0, 0)),
-            ('blue', (0, 0, 155), (0, 0, 255)),
-            ('green', (0, 155, 0), (0, 255, 0)),
-            ('yellow', (155, 155, 0), (255, 255, 0))
-        ]
-        sound_list = [sounds.beep1, sounds.beep2, sounds.beep3, sounds.beep4]
+        color_list = get_pad_colors(n_pads)
+        sound_list = get_pad_sounds(n_pads, synth=synth)
         coord_list = [
             (x, y)
             for y in range(self.n_row)
@@ -98,6 +153,14 @@ class SimonBoard(GameBoard):
         self.pattern = []
         self.match = []
 
+        # animation state
+        self.animations = display.animations
+        self.sequence = None  # the pattern or game over animation
+        self.fade_alpha = 0
+        self.fade_surface = pygame.Surface(display.size, pygame.SRCALPHA)
+        self.flash_surface = pygame.Surface(
+            (self.box_size, self.box_size), pygame.SRCALPHA)
+
     def get_button_typed(self, key):
         mappings = [
             (K_q, K_l),
@@ -105,63 +168,74 @@ class SimonBoard(GameBoard):
             (K_a, K_PERIOD),
             (K_s, K_SLASH),
         ]
-        for i, mapping in enumerate(mappings):
+        for name, mapping in zip(self.box_order, mappings):
             if key in mapping:
-                return self.box_dict[self.box_order[i]]
+                return self.box_dict[name]
         return None
 
+    def get_flash_duration(self):
+        """Return the ms to fade a flash in (or out).
+
+        Matches the old frame-by-frame animation: one frame per
+        animation_speed step of alpha.
+        """
+        n_frames = math.ceil(255 / self.animation_speed)
+        return n_frames * 1000 / self.display.fps
+
     def flash_button_animation(self, box):
-        """Flash a single button."""
-        orig_surface = self.display.display.copy()
-        flash_surface = pygame.Surface((self.box_size, self.box_size))
-        flash_surface = flash_surface.convert_alpha()
-        try:
-            r, g, b, _ = box.highlight_color  # w/ alpha
-        except:
-            r, g, b = box.highlight_color  # w/ alpha
-
-        # loop over the range
-        box.sound.play()
-        for beg, end, step in ((0, 255, 1), (255, 0, -1)):
-            for alpha in range(beg, end, self.animation_speed * step):
-                gameutil.check_for_quit()
-                self.display.blit(orig_surface, (0, 0))
-                flash_surface.fill((r, g, b, alpha))
-                # flash_surface.set_alpha(alpha)
-                self.display.blit(flash_surface, box.pixel_coord)
-                self.display.update()
-        self.display.blit(orig_surface, (0, 0))
-        return
+        """Flash a single button.
+
+        Return:
+            The (unscheduled) animation; the sound plays when it starts.
+        """
+        duration = self.get_flash_duration()
+
+        def set_alpha(alpha):
+            box.flash_alpha = int(alpha)
+
+        return animation.Sequence(
+            animation.Call(box.play_sound),
+            animation.Tween(duration, 0, 255, on_update=set_alpha),
+            animation.Tween(duration, 255, 0, on_update=set_alpha),
+        )
+
+    def flash_button(self, box):
+        """Flash a button (e.g., on input), alongside other flashes."""
+        return self.animations.add(self.flash_button_animation(box))
 
     def animate_pattern(self):
         """Extend the pattern and animate."""
-        next_box = random.choice(self.box_order)
+        next_box = self.rng.choice(self.box_order)
         self.pattern.append(next_box)
-        pygame.time.wait(1000)
+
+        steps = [animation.Wait(1000)]
         for name in self.pattern:
-            self.flash_button_animation(self.box_dict[name])
-            pygame.time.wait(FLASHDELAY)
+            steps.append(self.flash_button_animation(self.box_dict[name]))
+            steps.append(animation.Wait(FLASHDELAY))
+        self.sequence = self.animations.add(animation.Sequence(*steps))
+        return self.sequence
 
     def game_over_animation(self):
         """End the game."""
-        orig_surface = self.display.display.copy()
-        flash_surface = pygame.Surface(self.display.display.get_size())
-        flash_surface = flash_surface.convert_alpha()
-        sound = pygame.mixer.Sound(sounds.fail)
-        sound.play()
-        try:
-            r, g, b, _ = colors.black  # w/ alpha
-        except:
-            r, g, b = colors.black  # w/ alpha
-        for start, end, step in ((0, 255, 1), (255, 0, -1)):
-            for alpha in range(start, end, self.animation_speed * step):
-                gameutil.check_for_quit()
-                flash_surface.fill((r, g, b, alpha))
-                self.display.blit(orig_surface, (0, 0))
-                self.display.blit(flash_surface, (0, 0))
-                self.draw_boxes()
-                self.display.update()
-        return
+        duration = self.get_flash_duration()
+
+        def set_alpha(alpha):
+            self.fade_alpha = int(alpha)
+
+        self.sequence = self.animations.add(animation.Sequence(
+            animation.Call(sounds.bank.play, FAIL_SOUND, 2),
+            animation.Tween(duration, 0, 255, on_update=set_alpha),
+            animation.Tween(duration, 255, 0, on_update=set_alpha),
+        ))
+        return self.sequence
+
+    def is_animating(self):
+        """Check if the pattern or game over is being shown.
+
+        Input is ignored until it's done; flashes from input are not
+        included.
+        """
+        return self.sequence is not None and not self.sequence.done
 
     def check_input(self, box):
         """Check if the input matches."""
@@ -175,9 +249,15 @@ class SimonBoard(GameBoard):
         if all(x == y for x, y in zip(self.match, self.pattern)):
             matched = True  # limit check by smallest number of elements
         if matched and len(self.match) == len(self.pattern):
+            telemetry.emit('patterns.pattern_matched',
+                           length=len(self.pattern), score=self.score + 1)
             self.match = []
             self.score = self.score + 1
             raise StopInput()
+        if not matched:
+            telemetry.emit('patterns.pattern_missed',
+                           length=len(self.pattern),
+                           position=len(self.match) - 1, score=self.score)
         return matched
 
     def draw(self):
@@ -185,75 +265,124 @@ class SimonBoard(GameBoard):
         msg = 'Score: {}'.format(self.score)
         return super().draw(msg=msg)
 
+    def draw_boxes(self):
+        """Draw the boxes, with any game over fade behind them."""
+        if self.fade_alpha:
+            self.fade_surface.fill(colors.alpha(colors.black, self.fade_alpha))
+            self.display.blit(self.fade_surface, (0, 0))
+
+        super().draw_boxes()
+
+        for box in self.box_list:
+            if box.flash_alpha:
+                self.flash_surface.fill(
+                    colors.alpha(box.highlight_color, box.flash_alpha))
+                self.display.blit(self.flash_surface, box.pixel_coord)
+
     def reset(self):
         self.pattern = []
         self.score = 0
         self.match = []
 
 
-def main():
+def update_game(board, clicked_button, waiting_for_input, last_click_time,
+                timeout):
+    """Advance the game by one frame.
+
+    Return:
+        The new (waiting_for_input, last_click_time).
+    """
+    if board.is_animating():
+        pass  # ignore input while the pattern or game over is shown
+
+    elif not waiting_for_input:
+        # draw the pattern
+        board.animate_pattern()
+        last_click_time = None
+        waiting_for_input = True
+
+    else:
+        # let the user input the pattern
+        if last_click_time is None:
+            last_click_time = time.time()  # pattern shown; start timer
+
+        curr_time = time.time()
+        if clicked_button:
+            last_click_time = curr_time
+
+            board.flash_button(clicked_button)
+
+            try:
+                matched = board.check_input(clicked_button)
+            except StopInput:
+                # pattern matched!
+                waiting_for_input = False
+            else:
+                # not finished with the pattern
+                if matched:
+                    pass
+                else:
+                    end_game(board)
+                    waiting_for_input = False
+
+        elif curr_time - timeout > last_click_time:
+            log.debug('timeout: {} -> {} ({})'.format(
+                curr_time, last_click_time, timeout))
+            end_game(board)
+            waiting_for_input = False
+
+    return waiting_for_input, last_click_time
+
+
+def end_game(board):
+    """Save the score, show the game over and start again."""
+    if not board.display.headless:  # a simulation, not a player
+        leaderboard.submit('patterns', board.score)
+    board.game_over_animation()
+    board.reset()
+
+
+def main(n_pads=N_PADS, synth=False):
     """Entrypoint."""
+    sounds.init_mixer()
     pygame.init()
+    sounds.bank.preload([FAIL_SOUND], background=True)
 
     display = Display(caption='Simon!', bg_color=colors.dark_gray)
-    main_board = SimonBoard(display)
+    main_board = SimonBoard(display, n_pads=n_pads, synth=synth)
+    sounds.bank.preload(
+        [box.sound for box in main_board.box_list], background=True)
     main_board.animation_speed = 60
     main_board.fg_color = colors.black
 
     waiting_for_input = False
-    last_click_time = time.time()
+    last_click_time = None
     timeout = 4
 
     # main_board.draw()
 
     while True:  # main game loop
-        main_board.draw()
         clicked_button = None
 
-        gameutil.check_for_quit()
-        for event in pygame.event.get():
-            if event.type == MOUSEBUTTONUP:
-                clicked_button = main_board.get_button_clicked(event.pos)
+        with display.phase('event'):
+            gameutil.check_for_quit()
+            for event in pygame.event.get():
+                if event.type == MOUSEBUTTONUP:
+                    clicked_button = main_board.get_button_clicked(event.pos)
 
-            elif event.type == KEYUP:
-                clicked_button = main_board.get_button_typed(event.key)
+                elif event.type == KEYUP:
+                    clicked_button = main_board.get_button_typed(event.key)
 
-        curr_time = time.time()
-        if time.time() - timeout > last_click_time:
-            log.debug('timeout: {} -> {} ({})'.format(
-                curr_time, last_click_time, timeout))
-            main_board.game_over_animation()
-            pygame.time.wait(1000)
-
-        if not waiting_for_input:
-            # draw the pattern
-            main_board.animate_pattern()
-            last_click_time = time.time()
-            waiting_for_input = True
-
-        else:
-            # let the user input the pattern
-            if clicked_button:
-                last_click_time = time.time()
-
-                main_board.flash_button_animation(clicked_button)
-
-                try:
-                    matched = main_board.check_input(clicked_button)
-                except StopInput:
-                    # pattern matched!
-                    waiting_for_input = False
-                else:
-                    # not finished with the pattern
-                    if matched:
-                        pass
-                    else:
-                        main_board.game_over_animation()
-                        main_board.reset()
-                        waiting_for_input = False
-
-        pygame.display.update()
-        display.tick()
+        with display.phase('update'):
+            display.animations.update(display.dt)
+            waiting_for_input, last_click_time = update_game(
+                main_board, clicked_button, waiting_for_input,
+                last_click_time, timeout,
+            )
+
+        with display.phase('draw'):
+            main_board.draw()
+        display.update()
 
 
 if __name__ == '__main__':
@@ -1,15 +1,19 @@
 #!/usr/bin/env python3
 
+import argparse
 import logging
-import random
 import sys
 
+import numpy
 import pygame
 from gamelib import logging as gamelog
+from gamelib import rng as gamerng
 from gamelib import util as gameutil
-from gamelib import Display, colors, fonts
+from gamelib import (Display, colors, fonts, leaderboard, replay, sprites,
+                     telemetry)
 from gamelib.constants import (DOWN, KEY_DOWN, KEY_LEFT, KEY_RIGHT, KEY_UP,
                                LEFT, RIGHT, UP)
+from gamelib.palettegrid import PaletteGrid
 from pygame.locals import K_ESCAPE, K_SPACE, KEYDOWN, KEYUP, QUIT
 
 log = logging.getLogger(__name__)
@@ -31,11 +35,20 @@ CELL_HEIGHT = int(WIN_HEIGHT / CELL_SIZE)
 
 BG_COLOR = colors.black
 
+# board cells, and their colors: (plain, on a grid line, inside a worm)
+EMPTY, WORM, APPLE = range(3)
+BOARD_PALETTE = [
+    (BG_COLOR, colors.dark_gray),
+    (colors.colorblind_14.dark_blue, colors.colorblind_14.dark_blue,
+     colors.colorblind_14.blue),
+    (colors.red,),
+]
+
 
 def check_for_key_press():
-    for event in pygame.event.get(QUIT):
+    for event in replay.get_events(QUIT):
         gameutil.terminate()  # any quit event exits
-    key_up_list = pygame.event.get(KEYUP)
+    key_up_list = replay.get_events(KEYUP)
     if len(key_up_list) == 0:
         return None
     if key_up_list[0].key == K_ESCAPE:
@@ -43,21 +56,24 @@ def check_for_key_press():
     return key_up_list[0].key
 
 
-def draw_apple(display, coord):
-    x = coord['x'] * CELL_SIZE
-    y = coord['y'] * CELL_SIZE
-    rect = pygame.Rect(x, y, CELL_SIZE, CELL_SIZE)
-    pygame.draw.rect(display.display, colors.red, rect)
+def make_board():
+    """Return the PaletteGrid the board (the whole window) is drawn on."""
+    pattern = numpy.zeros((CELL_SIZE, CELL_SIZE), numpy.uint8)
+    pattern[0, :] = pattern[:, 0] = 1  # grid lines, top and left
+    margin = int(CELL_SIZE / 5)
+    pattern[margin:-margin, margin:-margin] = 2  # inside a worm
+    return PaletteGrid(
+        (CELL_WIDTH, CELL_HEIGHT), CELL_SIZE, BOARD_PALETTE, pattern)
+
+
+def draw_apple(board, coord):
+    board.cells[coord['y'], coord['x']] = APPLE
     return
 
 
-def draw_grid(display):
-    for x in range(0, WIN_WIDTH, CELL_SIZE):  # draw vertical lines
-        pygame.draw.line(
-            display.display, colors.dark_gray, (x, 0), (x, WIN_HEIGHT))
-    for y in range(0, WIN_HEIGHT, CELL_SIZE):  # draw vertical lines
-        pygame.draw.line(
-            display.display, colors.dark_gray, (0, y), (WIN_WIDTH, y))
+def clear_board(board):
+    """Empty the board's cells (the grid lines are in each cell's pattern)."""
+    board.clear(EMPTY)
     return
 
 
@@ -88,73 +104,105 @@ def draw_score(display, score):
     return
 
 
-def get_random_loc():
+def get_random_loc(rng=None):
+    rng = gamerng.get_rng(rng)
     return {
-        'x': random.randint(0, CELL_WIDTH - 1),
-        'y': random.randint(0, CELL_HEIGHT - 1),
+        'x': rng.randint(0, CELL_WIDTH - 1),
+        'y': rng.randint(0, CELL_HEIGHT - 1),
     }
 
 
-def run_game(display):
+def run_game(display, rng=None):
+    """Play a game; return the score."""
+    rng = gamerng.get_rng(rng)
+
     # random start coordinates
     direction = RIGHT
 
     # start the apple in a random place
-    worm = Elegans()
-    apple = get_random_loc()
+    worm = Elegans(rng=rng)
+    apple = get_random_loc(rng)
 
     pause = False
     pause_direction = None
+    board = make_board()
+
+    def get_state():  # for replay keyframes
+        return {
+            'worm': worm.coord,
+            'apple': apple,
+            'direction': direction,
+            'pause': (pause, pause_direction),
+            'rng': rng.getstate(),
+        }
+
+    def set_state(state):
+        nonlocal apple, direction, pause, pause_direction
+        worm.coord = state['worm']
+        apple = state['apple']
+        direction = state['direction']
+        pause, pause_direction = state['pause']
+        rng.setstate(state['rng'])
 
     while True:  # main game loop
-        for event in pygame.event.get():
-            if event.type == QUIT:
-                gameutil.terminate()
-            elif event.type == KEYDOWN:
-                if event.key in KEY_LEFT:
-                    direction = LEFT
-                elif event.key in KEY_RIGHT:
-                    direction = RIGHT
-                elif event.key in KEY_UP:
-                    direction = UP
-                elif event.key in KEY_DOWN:
-                    direction = DOWN
-                elif event.key == K_SPACE:
-                    pause = not pause
-                    if pause:  # maintain same direction as before
-                        pause_direction = direction
-                    else:
-                        direction = pause_direction
-                elif event.key == K_ESCAPE:
+        replay.sync(get_state, set_state)
+        with display.phase('event'):
+            for event in replay.get_events():
+                if event.type == QUIT:
                     gameutil.terminate()
+                elif event.type == KEYDOWN:
+                    if event.key in KEY_LEFT:
+                        direction = LEFT
+                    elif event.key in KEY_RIGHT:
+                        direction = RIGHT
+                    elif event.key in KEY_UP:
+                        direction = UP
+                    elif event.key in KEY_DOWN:
+                        direction = DOWN
+                    elif event.key == K_SPACE:
+                        pause = not pause
+                        if pause:  # maintain same direction as before
+                            pause_direction = direction
+                        else:
+                            direction = pause_direction
+                    elif event.key == K_ESCAPE:
+                        gameutil.terminate()
 
         if pause:
-            display.fill(BG_COLOR)
-            draw_grid(display)
-            worm.draw(display)
-            # draw_apple(display, apple)
-            draw_score(display, worm.length - 3)
-            draw_pause(display)
+            with display.phase('draw'):
+                clear_board(board)
+                worm.draw(board)
+                # draw_apple(board, apple)
+                board.draw(display.display)
+                draw_score(display, worm.length - 3)
+                draw_pause(display)
             display.update()
             continue
 
-        # check if the head has collided with itself or the edge
-        if worm.has_edge_collision() or worm.has_self_collision():
-            return  # game over
-
-        # check if apple has been eaten, shorten if it has
-        if worm.coord[HEAD] == apple:
-            apple = get_random_loc()  # move apple (and don't shrink!)
-        else:
-            worm.shrink()
-
-        worm.move(direction)
-
-        display.fill(BG_COLOR)
-        draw_grid(display)
-        worm.draw(display)
-        draw_apple(display, apple)
-        draw_score(display, worm.length - 3)
+        with display.phase('update'):
+            # check if the head has collided with itself or the edge
+            edge = worm.has_edge_collision()
+            if edge or worm.has_self_collision():
+                telemetry.emit('elegans.game_over', length=worm.length,
+                               score=worm.length - 3,
+                               cause='edge' if edge else 'self',
+                               seconds=display.get_time())
+                return worm.length - 3  # game over
+
+            # check if apple has been eaten, shorten if it has
+            if worm.coord[HEAD] == apple:
+                apple = get_random_loc(rng)  # move apple (and don't shrink!)
+            else:
+                worm.shrink()
+
+            worm.move(direction)
+
+        with display.phase('draw'):
+            clear_board(board)
+            worm.draw(board)
+            draw_apple(board, apple)
+            board.draw(display.display)  # covers the window
+            draw_score(display, worm.length - 3)
         display.update()
     return
 
@@ -171,12 +219,13 @@ def show_game_over_screen(display):
 
     draw_press_key_msg(display)
     display.update()
-    pygame.time.wait(500)
+    if not display.headless:
+        pygame.time.wait(500)
     check_for_key_press()  # clear keypresses in event queue
 
     while True:
         if check_for_key_press():
-            pygame.event.get()  # clear event queue
+            replay.get_events()  # clear event queue
             return
     return
 
@@ -184,29 +233,29 @@ def show_game_over_screen(display):
 def show_start_screen(display):
     title_font = pygame.font.Font(fonts.open_sans, 100)
 
-    title_surf_list = [
-        title_font.render('elegans!', True, *text_colors)
-        for text_colors in (
-            (colors.colorblind_14.dark_blue, ),
-            (colors.colorblind_14.blue, ),
+    # each title, rotated once to each angle its animation turns it to
+    rotate_list = [3, -7]
+    title_list = [
+        sprites.RotationCache(
+            title_font.render('elegans!', True, text_color), step=rot)
+        for text_color, rot in zip(
+            (colors.colorblind_14.dark_blue, colors.colorblind_14.blue),
+            rotate_list,
         )
     ]
 
+    center = (display.width / 2, display.height / 2)
     degree_list = [0, 0]
-    rotate_list = [3, -7]
     while True:
         display.fill(BG_COLOR)
 
-        for title, deg, rot in zip(title_surf_list, degree_list, rotate_list):
-            rot_surf = pygame.transform.rotate(title, deg)
-            rot_rect = rot_surf.get_rect()
-            rot_rect.center = (display.width / 2, display.height / 2)
-            display.blit(rot_surf, rot_rect)
+        for title, deg in zip(title_list, degree_list):
+            title.blit(display.display, deg, center)
 
         draw_press_key_msg(display)
 
         if check_for_key_press():
-            pygame.event.get()  # clear event queue
+            replay.get_events()  # clear event queue
             return
 
         display.update()
@@ -216,9 +265,15 @@ def show_start_screen(display):
 
 class Elegans():
 
-    def __init__(self):
-        start_x = random.randint(5, CELL_WIDTH - 6)
-        start_y = random.randint(5, CELL_HEIGHT - 6)
+    def __init__(self, rng=None):
+        """Initialize a worm at a random place, heading right.
+
+        Arguments:
+            rng: A random.Random (see gamelib.rng) for the start.
+        """
+        rng = gamerng.get_rng(rng)
+        start_x = rng.randint(5, CELL_WIDTH - 6)
+        start_y = rng.randint(5, CELL_HEIGHT - 6)
         self.coord = [
             {'x': start_x, 'y': start_y},
             {'x': start_x - 1, 'y': start_y},
@@ -237,18 +292,13 @@ class Elegans():
     def length(self):
         return len(self.coord)
 
-    def draw(self, display):
-        margin = int(CELL_SIZE / 5)
-        inner_size = CELL_SIZE - (margin * 2)
+    def draw(self, board):
+        """Mark the worm's cells on a board (see make_board)."""
         for coord in self.coord:
-            x, y = [coord[k] * CELL_SIZE for k in ('x', 'y')]
-            outer_rect = pygame.Rect(x, y, CELL_SIZE, CELL_SIZE)
-            inner_rect = pygame.Rect(
-                x + margin, y + margin, inner_size, inner_size)
-            pygame.draw.rect(
-                display.display, colors.colorblind_14.dark_blue, outer_rect)
-            pygame.draw.rect(
-                display.display, colors.colorblind_14.blue, inner_rect)
+            x, y = coord['x'], coord['y']
+            # (the head has left the board as the game ends)
+            if 0 <= x < CELL_WIDTH and 0 <= y < CELL_HEIGHT:
+                board.cells[y, x] = WORM
         return
 
     def has_edge_collision(self):
@@ -278,17 +328,24 @@ class Elegans():
         return
 
 
-def main():
+def main(argv=None):
     global FPS
+    parser = argparse.ArgumentParser(description='C. elegans')
+    replay.add_arguments(parser)
+    args = parser.parse_args(argv)
+
     pygame.init()
     display = Display(
         fps=FPS, win_width=WIN_WIDTH, win_height=WIN_HEIGHT,
-        caption='C. elegans',
+        caption='C. elegans', headless=args.headless,
     )
 
+    rng = replay.start(display, args, game='elegans')
     show_start_screen(display)
     while True:
-        run_game(display)
+        score = run_game(display, rng=rng)
+        if not (replay.is_playing() or display.headless):
+            leaderboard.submit('elegans', score)
         show_game_over_screen(display)
 
 
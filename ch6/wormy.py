@@ -132,14 +132,16 @@ def showStartScreen():
 
     degrees1 = 0
     degrees2 = 0
+    rotatedCache1 = {} # rotated title surfaces, by angle: rotate once each
+    rotatedCache2 = {}
     while True:
         DISPLAYSURF.fill(BGCOLOR)
-        rotatedSurf1 = pygame.transform.rotate(titleSurf1, degrees1)
+        rotatedSurf1 = getRotatedSurf(titleSurf1, degrees1, rotatedCache1)
         rotatedRect1 = rotatedSurf1.get_rect()
         rotatedRect1.center = (WINDOWWIDTH / 2, WINDOWHEIGHT / 2)
         DISPLAYSURF.blit(rotatedSurf1, rotatedRect1)
 
-        rotatedSurf2 = pygame.transform.rotate(titleSurf2, degrees2)
+        rotatedSurf2 = getRotatedSurf(titleSurf2, degrees2, rotatedCache2)
         rotatedRect2 = rotatedSurf2.get_rect()
         rotatedRect2.center = (WINDOWWIDTH / 2, WINDOWHEIGHT / 2)
         DISPLAYSURF.blit(rotatedSurf2, rotatedRect2)
@@ -155,6 +157,16 @@ def showStartScreen():
         degrees2 += 7 # rotate by 7 degrees each frame
 
 
+def getRotatedSurf(surf, degrees, cache):
+    # the animation revisits the same angles, so keep each rotated surface
+    degrees = degrees % 360
+    if degrees not in cache:
+        cache[degrees] = pygame.transform.rotate(surf, degrees)
+        if surf.get_flags() & SRCALPHA:
+            cache[degrees].set_alpha(255, RLEACCEL) # small once encoded
+    return cache[degrees]
+
+
 def terminate():
     pygame.quit()
     sys.exit()
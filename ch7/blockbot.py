@@ -0,0 +1,710 @@
+#!/usr/bin/env python3
+"""A bot for blocks that searches a few pieces ahead.
+
+    PYTHONPATH=ch7 python -m env.tournament tetris blockbot:play -n 100
+    python ch7/blockbot.py -n 3
+
+When a piece appears, the bot picks where to put it with a beam search:
+the placements of the falling piece, then of the next one (the two
+run_game shows), then the best placement of the piece after that,
+expected over the shapes it could be. It then steers the piece there:
+rotate, move sideways, drop, and maybe slide or turn in under an
+overhang.
+
+Where a piece can get to is searched over its (rotation, x, y), moving
+as run_game lets it (BeamSearch.sweep), and cached by the contour of the
+board's surface: boards that differ below it, or only in how high it is,
+share the search.
+
+Boards are searched as rows of bits, identified by Zobrist hashes:
+placements that make the same board are searched once, and evaluations
+are kept in a bounded LRU transposition table, so the boards searched
+for one piece are mostly evaluated already when the next one comes.
+
+The search stops at a time budget (BUDGET: at level 10 the piece falls a
+row every 0.07 s), with the best placement found so far. That makes the
+games depend on the machine; BlockBot(budget=None) searches the whole
+beam, for games that can be played again.
+"""
+
+import argparse
+import collections
+import logging
+import operator
+import random
+import statistics
+import sys
+import time
+
+from env import make as make_env
+from pieces import BLANK, SHAPES, TEMPLATE_HEIGHT, TEMPLATE_WIDTH
+
+log = logging.getLogger(__name__)
+
+BEAM_WIDTH = 12  # boards kept per piece
+BUDGET = 0.05  # seconds per search (fall_freq is 0.07 at level 10)
+TABLE_SIZE = 100000  # boards in the transposition table
+REST_TABLE_SIZE = 20000  # contours whose rests are cached
+ZOBRIST_SEED = 'blockbot'
+
+# board features (see BeamSearch.evaluate), and their weights
+WEIGHTS = {
+    'height': -0.510066,  # the column heights, summed
+    'lines': 0.760666,  # lines cleared
+    'holes': -0.35663,  # blanks under a box
+    'bumpiness': -0.184483,  # height differences of neighboring columns
+}
+LOST = -1e9  # the value of a board the game ended on
+
+SPAWN_Y = -2  # where TetrisPiece starts (its x is centered)
+AIR_LINES = TEMPLATE_HEIGHT  # blank lines a piece turns anywhere in
+X_BIT = TEMPLATE_WIDTH  # the bit of x in masks of x (x can be < 0)
+
+# the moves a piece can make: (TetrisEnv action, turn, dx, dy)
+INPUTS = (
+    ('rotate', 1, 0, 0),
+    ('rotate_back', -1, 0, 0),
+    ('left', 0, -1, 0),
+    ('right', 0, 1, 0),
+    ('down', 0, 0, 1),
+)
+
+# each shape's boxes in each rotation: [[(dx, dy), ...], ...]
+SHAPE_CELLS = {
+    name: [
+        [(x, y) for y in range(TEMPLATE_HEIGHT) for x in range(TEMPLATE_WIDTH)
+         if template[y][x] != BLANK]
+        for template in shape
+    ]
+    for name, (shape, _, _) in SHAPES.items()
+}
+SHAPE_ODDS = {name: 1 / len(SHAPES) for name in SHAPES}  # rng.choice
+
+
+class TranspositionTable():
+    """A dict of at most max_size items, dropping the least recently used."""
+
+    def __init__(self, max_size=TABLE_SIZE):
+        self.max_size = max_size
+        self.items = collections.OrderedDict()
+        self.n_hits = 0
+        self.n_misses = 0
+
+    def __len__(self):
+        return len(self.items)
+
+    def get(self, key):
+        value = self.items.get(key)
+        if value is None:
+            self.n_misses += 1
+        else:
+            self.n_hits += 1
+            self.items.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self.items[key] = value
+        self.items.move_to_end(key)
+        if len(self.items) > self.max_size:
+            self.items.popitem(last=False)
+        return
+
+
+#
+#   #####
+#  #     # ######   ##   #####   ####  #    #
+#  #       #       #  #  #    # #    # #    #
+#   #####  #####  #    # #    # #      ######
+#        # #      ###### #####  #      #    #
+#  #     # #      #    # #   #  #    # #    #
+#   #####  ###### #    # #    #  ####  #    #
+
+class BeamSearch():
+    """Search placements on a board of width x height boxes."""
+
+    def __init__(self, width, height, beam_width=BEAM_WIDTH,
+                 table_size=TABLE_SIZE, weights=None):
+        self.width = width
+        self.height = height
+        self.beam_width = beam_width
+        self.weights = dict(WEIGHTS, **(weights or {}))
+        self.full = (1 << width) - 1  # a complete line
+        self.spawn_x = int(width / 2) - int(TEMPLATE_WIDTH / 2)
+        self.table = TranspositionTable(table_size)
+
+        # a random key per box; the key of a line is the XOR of its boxes'
+        zobrist = random.Random(ZOBRIST_SEED)
+        self.line_keys = []
+        for y in range(height):
+            box_keys = [zobrist.getrandbits(64) for x in range(width)]
+            line_keys = [0] * (1 << width)
+            for bits in range(1, 1 << width):
+                low = bits & -bits
+                line_keys[bits] = \
+                    line_keys[bits ^ low] ^ box_keys[low.bit_length() - 1]
+            self.line_keys.append(line_keys)
+        self.n_boxes = [bin(bits).count('1') for bits in range(1 << width)]
+
+        # each shape's rotations: (lines, walls), lines as [(dy, bits at
+        # x=0), ...] and walls a mask of the x it fits between (see X_BIT)
+        self.shapes = {}
+        self.lines = {}  # (name, rotation, x): [(dy, bits), ...]
+        # and the lowest box of each column: [(rotation, x, bottom), ...],
+        # bottom as [(column, dy), ...]
+        self.drops = {}
+        for name, rotation_list in SHAPE_CELLS.items():
+            self.shapes[name] = shape = []
+            self.drops[name] = drop_list = []
+            for rotation, cells in enumerate(rotation_list):
+                lines = collections.defaultdict(int)
+                for dx, dy in cells:
+                    lines[dy] |= 1 << dx
+                lines = sorted(lines.items())
+                walls = 0
+                for x in range(-min(dx for dx, dy in cells),
+                               width - max(dx for dx, dy in cells)):
+                    walls |= 1 << (x + X_BIT)
+                    self.lines[name, rotation, x] = [
+                        (dy, bits << x if x >= 0 else bits >> -x)
+                        for dy, bits in lines]
+                    bottom = {}
+                    for dx, dy in cells:
+                        bottom[x + dx] = max(dy, bottom.get(x + dx, dy))
+                    drop_list.append((rotation, x, sorted(bottom.items())))
+                shape.append((lines, walls))
+        self.free = {}  # (bits, row): a mask of the x bits fit in row at
+        self.rests = TranspositionTable(REST_TABLE_SIZE)
+
+    def encode(self, board):
+        """Return a board (TetrisBoard.board) as a tuple of line bits."""
+        return tuple(
+            sum(1 << x for x, color in enumerate(row) if color != BLANK)
+            for row in board)
+
+    def get_hash(self, rows):
+        line_keys = self.line_keys
+        key = 0
+        for y, bits in enumerate(rows):
+            if bits:
+                key ^= line_keys[y][bits]
+        return key
+
+    def get_tops(self, rows):
+        """Return the y of the top box of each column (height if none)."""
+        tops = [self.height] * self.width
+        covered = 0
+        for y, bits in enumerate(rows):
+            new = bits & ~covered
+            while new:
+                low = new & -new
+                tops[low.bit_length() - 1] = y
+                new ^= low
+            covered |= bits
+            if covered == self.full:
+                break
+        return tops
+
+    @staticmethod
+    def spread(seed, mask):
+        """Return the bits of mask that seed's reach through mask."""
+        while True:
+            grown = (seed | seed << 1 | seed >> 1) & mask
+            if grown == seed:
+                return seed
+            seed = grown
+
+    def get_contour(self, rows):
+        """Return the surface of a board: what pieces can get to.
+
+        Blanks no piece can get into (closed off from above) are filled
+        like boxes, and the lines under the first full one are dropped.
+
+        Return:
+            (top, surface): the y of the top box (height if none), and
+            the filled lines from there down.
+        """
+        full = self.full
+        height = self.height
+        top = 0
+        while top < height and not rows[top]:
+            top += 1
+        # blanks reached from above, then sideways and up from those
+        air = [0] * (height + 1)
+        changed = True
+        while changed:
+            changed = False
+            above = full
+            bottom = height
+            for y in range(top, height):
+                blank = full ^ rows[y]
+                reach = self.spread(
+                    (above | air[y] | air[y + 1]) & blank, blank)
+                if reach != air[y]:
+                    air[y] = reach
+                    changed = True
+                if not reach:
+                    bottom = y
+                    break
+                above = reach
+        return top, tuple(full ^ air[y] for y in range(top, bottom))
+
+    def get_valid(self, rows, lines, walls, y):
+        """Return a mask of the x a piece's lines fit at in rows, at y."""
+        free = self.free
+        valid = walls
+        for dy, bits in lines:
+            row = y + dy
+            if row >= len(rows):
+                return 0
+            if row >= 0:
+                mask = free.get((bits, rows[row]))
+                if mask is None:
+                    mask = 0
+                    for x in range(-X_BIT, self.width):
+                        if not (bits << x if x >= 0 else bits >> -x) & \
+                                rows[row]:
+                            mask |= 1 << (x + X_BIT)
+                    free[bits, rows[row]] = mask
+                valid &= mask
+        return valid
+
+    def sweep(self, rows, name, y, reach):
+        """Return where a piece can get to and rest, moving as it can.
+
+        Searches the (rotation, x, y) a piece can get to by moving
+        sideways, down and rotating, a line at a time: a piece never
+        goes up, so moves in a line are followed until there are no new
+        places, then what can move down does.
+
+        Arguments:
+            rows: The board, as line bits; below it is the floor.
+            name: The piece's shape.
+            y: The line the piece starts at.
+            reach: A mask of the x (see X_BIT) the piece starts at, per
+                rotation.
+        Return:
+            The (rotation, x, y) of each place it stops at, as a list.
+        """
+        shape = self.shapes[name]
+        n_rotations = len(shape)
+        spread = self.spread
+        valid = [self.get_valid(rows, lines, walls, y)
+                 for lines, walls in shape]
+        reach = [mask & ok for mask, ok in zip(reach, valid)]
+        rests = []
+        while any(reach):
+            changed = True
+            while changed:
+                changed = False
+                for rotation in range(n_rotations):
+                    old = reach[rotation]
+                    new = spread(old | valid[rotation] & (
+                        reach[rotation - 1] |
+                        reach[(rotation + 1) % n_rotations]), valid[rotation])
+                    if new != old:
+                        reach[rotation] = new
+                        changed = True
+
+            valid = [self.get_valid(rows, lines, walls, y + 1)
+                     for lines, walls in shape]
+            for rotation in range(n_rotations):
+                rest = reach[rotation] & ~valid[rotation]
+                while rest:
+                    low = rest & -rest
+                    rests.append((rotation, low.bit_length() - 1 - X_BIT, y))
+                    rest ^= low
+                reach[rotation] &= valid[rotation]
+            y += 1
+        return rests
+
+    def get_rests(self, rows, name, start=None):
+        """Return where a piece can come to rest on a board (cached).
+
+        A piece can slide under an overhang, or rotate into one, after
+        moving down (see sweep); the time it has to before it falls
+        again isn't considered.
+
+        The places are cached by the board's contour: the same surface
+        higher or lower on the board (and whatever's closed off under
+        it) is only searched once, as long as a piece at the top can
+        turn and move anywhere above it.
+
+        Arguments:
+            rows: The board, as line bits.
+            name: The piece's shape.
+            start: The piece's (rotation, x, y); None for one at the top
+                in any rotation (one to come).
+        Return:
+            The (rotation, x, y) of each place.
+        """
+        top, surface = self.get_contour(rows)
+        if top >= AIR_LINES and (start is None or start[1:] == (
+                self.spawn_x, SPAWN_Y)):
+            # the surface AIR_LINES down: the piece is anywhere above it
+            shift = top - AIR_LINES
+            key = (name, surface)
+            rests = self.rests.get(key)
+            if rests is None:
+                rows = (0,) * AIR_LINES + surface
+                if any(above & ~line for above, line in zip(
+                        surface, surface[1:])):
+                    rests = self.sweep(
+                        rows, name, 0,
+                        [walls for lines, walls in self.shapes[name]])
+                else:  # no overhangs, so nowhere to get but straight down
+                    tops = self.get_tops(rows + (self.full,))  # the floor
+                    rests = [
+                        (rotation, x,
+                         min(tops[column] - dy for column, dy in bottom) - 1)
+                        for rotation, x, bottom in self.drops[name]]
+                rests = tuple(rests)  # (untracked; see evaluate)
+                self.rests.put(key, rests)
+            return [(rotation, x, y + shift) for rotation, x, y in rests]
+
+        key = (name, start, top, surface)
+        rests = self.rests.get(key)
+        if rests is None:
+            reach = [0] * len(self.shapes[name])
+            if start is None:
+                reach = [1 << (self.spawn_x + X_BIT)] * len(reach)
+                y = SPAWN_Y
+            else:
+                rotation, x, y = start
+                reach[rotation] = 1 << (x + X_BIT)
+            rests = tuple(
+                self.sweep((0,) * top + surface, name, y, reach))
+            self.rests.put(key, rests)
+        return rests
+
+    def fits(self, rows, name, rotation, x, y):
+        """Return True if a piece fits on the board there."""
+        lines = self.lines.get((name, rotation, x))
+        if lines is None:
+            return False  # past a wall
+        for dy, bits in lines:
+            row = y + dy
+            if row >= self.height or row >= 0 and rows[row] & bits:
+                return False
+        return True
+
+    def get_inputs(self, rows, name, start, target):
+        """Return how to move a piece to a place.
+
+        The moves are searched a line at a time, so the piece is turned
+        and moved sideways as high up as it can be: it falls anyway, and
+        has the most time to before then.
+
+        Arguments:
+            rows: The board, as line bits.
+            name: The piece's shape.
+            start: The piece's (rotation, x, y).
+            target: The (rotation, x, y) to move it to.
+        Return:
+            [(state, action), ...]: the TetrisEnv action to take at each
+            (rotation, x, y) on the way, or None if it can't get there.
+        """
+        n_rotations = len(self.shapes[name])
+        parents = {start: None}
+        queue = collections.deque([start])  # in the line
+        below = []  # in the next line
+        while queue:
+            state = queue.popleft()
+            if state == target:
+                path = []
+                while parents[state] is not None:
+                    state, action = parents[state]
+                    path.append((state, action))
+                return path[::-1]
+
+            rotation, x, y = state
+            for action, turn, dx, dy in INPUTS:
+                new = ((rotation + turn) % n_rotations, x + dx, y + dy)
+                if new in parents or new[2] > target[2] or \
+                        not self.fits(rows, name, *new):
+                    continue
+                parents[new] = (state, action)
+                (below if dy else queue).append(new)
+            if not queue:
+                queue.extend(below)
+                below = []
+        return None
+
+    def get_placements(self, rows, key, name, start=None):
+        """Yield each place a piece can get to and lock at.
+
+        Arguments:
+            rows, key: The board (see encode) and its hash.
+            name: The piece's shape.
+            start: The piece's (rotation, x, y) (see get_rests).
+        Yield:
+            (move, rows, key, n_lines): the (rotation, x, y) to steer
+            to, the board after, its hash and the lines cleared; rows is
+            None if the piece locked above the board (the game is lost).
+        """
+        line_keys = self.line_keys
+        for move in self.get_rests(rows, name, start):
+            rotation, x, y = move
+            lines = self.lines[name, rotation, x]
+            if y + lines[0][0] < 0:
+                yield move, None, None, 0
+                continue
+
+            new_rows = list(rows)
+            new_key = key
+            for dy, bits in lines:
+                row = y + dy
+                old = new_rows[row]
+                new_rows[row] = old | bits
+                new_key ^= line_keys[row][old] ^ line_keys[row][old | bits]
+            n_lines = new_rows.count(self.full)
+            if n_lines:
+                new_rows = [0] * n_lines + [
+                    bits for bits in new_rows if bits != self.full]
+                new_key = self.get_hash(new_rows)
+            yield move, tuple(new_rows), new_key, n_lines
+
+    def evaluate(self, rows, key):
+        """Return the value of a board (cached): its weighted features."""
+        entry = self.table.get(key)
+        if entry is not None:
+            return entry[0]
+
+        height = self.height
+        heights = [height - top for top in self.get_tops(rows)]
+        total_height = sum(heights)
+        # what's under the top of a column and isn't a box is a hole
+        n_holes = total_height - sum(map(self.n_boxes.__getitem__, rows))
+        bumpiness = sum(map(abs, map(operator.sub, heights, heights[1:])))
+        weights = self.weights
+        value = weights['height'] * total_height + \
+            weights['holes'] * n_holes + \
+            weights['bumpiness'] * bumpiness
+        # tuples of floats aren't tracked by the garbage collector, whose
+        #   full passes over a table of lists took longer than a search
+        self.table.put(key, (value, None))
+        return value
+
+    def expect(self, rows, key, deadline=None):
+        """Return the value of a board expected after an unknown piece.
+
+        Return:
+            The value, or None if time.perf_counter passed deadline
+            first.
+        """
+        deadline = deadline or float('inf')
+        entry = self.table.get(key)
+        if entry is None:
+            self.evaluate(rows, key)
+            entry = self.table.get(key)
+        if entry[1] is not None:
+            return entry[1]
+
+        w_lines = self.weights['lines']
+        expected = 0
+        for name, odds in SHAPE_ODDS.items():
+            best = LOST
+            for move, new_rows, new_key, n_lines in self.get_placements(
+                    rows, key, name):
+                if time.perf_counter() > deadline:
+                    return None
+                if new_rows is not None:
+                    best = max(best, w_lines * n_lines +
+                               self.evaluate(new_rows, new_key))
+            expected += odds * best
+        self.table.put(key, (entry[0], expected))
+        return expected
+
+    def search(self, rows, name_list, deadline=None, start=None):
+        """Return where to put the first of a few pieces.
+
+        Arguments:
+            rows: The board (see encode).
+            name_list: The shapes of the pieces to come (e.g., the
+                falling and next pieces); one more unknown is expected.
+            deadline: The time.perf_counter to return by, roughly.
+            start: The first piece's (rotation, x, y), if it's known.
+        Return:
+            The (rotation, x, y) to steer the first piece to, or None if
+            every placement loses.
+        """
+        deadline = deadline or float('inf')
+        w_lines = self.weights['lines']
+        # (value, reward, rows, hash, first move)
+        beam = [(0, 0, rows, self.get_hash(rows), None)]
+        out_of_time = False
+        for name in name_list:
+            children = {}
+            for _, reward, rows, key, first in beam:
+                for move, new_rows, new_key, n_lines in self.get_placements(
+                        rows, key, name, None if first else start):
+                    if children and time.perf_counter() > deadline:
+                        out_of_time = True
+                        break
+                    if new_rows is None:
+                        continue
+                    new_reward = reward + w_lines * n_lines
+                    old = children.get(new_key)
+                    if old is None or new_reward > old[1]:
+                        children[new_key] = (
+                            None, new_reward, new_rows, new_key,
+                            first or move)
+                if out_of_time:
+                    break
+            if not children:
+                break  # it's lost whatever comes next
+            beam = sorted((
+                (reward + self.evaluate(rows, key), reward, rows, key, first)
+                for _, reward, rows, key, first in children.values()
+            ), key=lambda node: node[0], reverse=True)[:self.beam_width]
+            if out_of_time:
+                break
+        if beam[0][4] is None:
+            return None
+
+        # the best boards first, as far as time allows (falling back to
+        #   the best board by value alone)
+        best = beam[0]
+        best_value = None
+        for node in beam:
+            if out_of_time:
+                break
+            expected = self.expect(node[2], node[3], deadline)
+            if expected is None:
+                break
+            value = node[1] + expected
+            if best_value is None or value > best_value:
+                best, best_value = node, value
+        return best[4]
+
+
+#
+#  ######
+#  #     #  ####  #####
+#  #     # #    #   #
+#  ######  #    #   #
+#  #     # #    #   #
+#  #     # #    #   #
+#  ######   ####    #
+
+class BlockBot():
+    """Play TetrisEnv: call with (observation, env, rng) for an action."""
+
+    def __init__(self, beam_width=BEAM_WIDTH, budget=BUDGET,
+                 table_size=TABLE_SIZE, weights=None):
+        """Initialize.
+
+        Arguments:
+            beam_width: Boards kept per piece searched.
+            budget: Seconds per search, or None to search it all.
+            table_size: Boards in the transposition table (kept between
+                pieces, and games).
+            weights: Feature weights to change (see WEIGHTS).
+        """
+        self.beam_width = beam_width
+        self.budget = budget
+        self.table_size = table_size
+        self.weights = weights
+        self.searcher = None
+        self.piece = None
+        self.target = None
+        self.route = {}
+        self.search_times = []
+        self.n_replans = 0
+
+    def plan(self, board, piece, next_piece):
+        """Return where to put a piece, from where it is: (rotation, x, y)."""
+        start = time.perf_counter()
+        if self.searcher is None or \
+                self.searcher.width != board.BOARD_W or \
+                self.searcher.height != board.BOARD_H:
+            self.searcher = BeamSearch(
+                board.BOARD_W, board.BOARD_H, beam_width=self.beam_width,
+                table_size=self.table_size, weights=self.weights)
+        deadline = start + self.budget if self.budget else None
+        target = self.searcher.search(
+            self.searcher.encode(board.board),
+            [piece.name, next_piece.name], deadline=deadline,
+            start=(piece.rotation, piece.x, piece.y))
+        self.search_times.append(time.perf_counter() - start)
+        return target
+
+    def steer(self, board, piece):
+        """Set the route to the target: {(rotation, x, y): action}."""
+        self.route = {}
+        if self.target is None:
+            return
+        state = (piece.rotation, piece.x, piece.y)
+        path = self.searcher.get_inputs(
+            self.searcher.encode(board.board), piece.name, state,
+            self.target)
+        if path is None:
+            return
+        self.route = dict(path)
+        self.route[self.target] = 'down'  # until it locks
+        # it's moved on from where it lands as long as it doesn't fall
+        # again (locks), which is longest after it's just fallen
+        for (state, action), (_, next_action) in zip(path, path[1:]):
+            if action == 'down' and next_action != 'down':
+                self.route[state] = 'noop'
+        return
+
+    def __call__(self, observation, env, rng):
+        piece = env.falling_piece
+        if piece is not self.piece:  # a new piece: where does it go
+            self.piece = piece
+            self.target = self.plan(env.board, piece, env.next_piece)
+            self.steer(env.board, piece)
+
+        state = (piece.rotation, piece.x, piece.y)
+        if self.target is not None and state not in self.route:
+            # it fell off the route: around, or past the target
+            self.steer(env.board, piece)
+            if not self.route:
+                self.n_replans += 1
+                self.target = self.plan(env.board, piece, env.next_piece)
+                self.steer(env.board, piece)
+        return env.actions.index(self.route.get(state, 'down'))
+
+
+play = BlockBot()  # for env.tournament
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python ch7/blockbot.py',
+        description='Play blocks games with the bot and show the scores.')
+    parser.add_argument('-n', '--n-games', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-steps', type=int, default=5000)
+    parser.add_argument('--beam-width', type=int, default=BEAM_WIDTH)
+    parser.add_argument('--budget', type=float, default=BUDGET,
+                        help='seconds per search (0: no limit)')
+    args = parser.parse_args(argv)
+
+    env = make_env('tetris', max_steps=args.max_steps)
+    bot = BlockBot(beam_width=args.beam_width, budget=args.budget or None)
+    for i in range(args.n_games):
+        env.reset(seed=args.seed + i)
+        done = False
+        info = {}
+        while not done:
+            _, _, done, info = env.step(bot(None, env, None))
+        print('game {}: score {}, {} steps{}'.format(
+            i, info['score'], env.n_steps,
+            ' (truncated)' if info.get('truncated') else ''))
+
+    times = sorted(bot.search_times)
+    table = bot.searcher.table
+    rests = bot.searcher.rests
+    print('{} searches: median {:.1f} ms, max {:.1f} ms; table {} boards, '
+          '{:.0%} hits; {} contours, {:.0%} hits'.format(
+              len(times), 1000 * statistics.median(times),
+              1000 * times[-1], len(table),
+              table.n_hits / max(1, table.n_hits + table.n_misses),
+              len(rests),
+              rests.n_hits / max(1, rests.n_hits + rests.n_misses)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,14 +1,17 @@
 #!/usr/bin/env python3
 
+import argparse
 import logging
-import random
-import time
 
+import numpy
 import pygame
 from gamelib import logging as gamelog
+from gamelib import rng as gamerng
 from gamelib import util as gameutil
-from gamelib import Display, GameBoard, colors, fonts, sounds
+from gamelib import (Display, GameBoard, animation, colors, fonts,
+                     leaderboard, replay, sounds, sprites, telemetry)
 from gamelib.constants import KEY_DOWN, KEY_LEFT, KEY_RIGHT, KEY_UP
+from gamelib.palettegrid import PaletteGrid
 from pieces import BLANK, SHAPES, TEMPLATE_HEIGHT, TEMPLATE_WIDTH
 from pygame.locals import K_SPACE, KEYDOWN, KEYUP, K_q
 
@@ -37,24 +40,36 @@ COLOR_LOOKUP = {
     for shape, color, highlight in SHAPES.values()
 }
 
+BOX_TILES = sprites.TileCache()
+
+# the board's boxes as PaletteGrid values: (background, color, highlight)
+CELL_VALUES = {BLANK: 0}
+CELL_VALUES.update((color, i) for i, color in enumerate(COLOR_LOOKUP, 1))
+CELL_PALETTE = [(BOARD_BG_COLOR,)] + [
+    (BOARD_BG_COLOR, color, highlight)
+    for color, highlight in COLOR_LOOKUP.items()
+]
+
 
 def check_for_key_press():
     """Look for KEYUP events and remove KEYDOWN events."""
     gameutil.check_for_quit()
 
-    for event in pygame.event.get([KEYDOWN, KEYUP]):
+    for event in replay.get_events([KEYDOWN, KEYUP]):
         if event.type == KEYDOWN:
             continue
         return event.key
     return None
 
 
+def get_box_tile(display, color, highlight):
+    """Return a box, drawn once (blit it 1 pixel in from its corner)."""
+    return BOX_TILES.get(color, highlight, TetrisBoard.BOX_SIZE, display)
+
+
 def draw_box(display, pixel_coord, color, highlight):
     x, y = pixel_coord
-    x, y = x + 1, y + 1
-    box_size = TetrisBoard.BOX_SIZE - 1
-    pygame.draw.rect(display, color, (x, y, box_size, box_size))
-    pygame.draw.rect(display, highlight, (x, y, box_size - 3, box_size - 3))
+    display.blit(get_box_tile(display, color, highlight), (x + 1, y + 1))
     return
 
 
@@ -67,10 +82,11 @@ def make_text_obj(text, font, color):
     return surf, surf.get_rect()
 
 
-def run_game(display):
-    board = TetrisBoard(display)
+def run_game(display, rng=None):
+    """Play a game; return the score."""
+    board = TetrisBoard(display, rng=rng)
 
-    now = time.time()
+    now = display.get_time()
     last_move_down_time = now
     last_move_side_time = now
     last_fall_time = now
@@ -79,96 +95,133 @@ def run_game(display):
     move_left = False
     move_right = False
 
-    falling_piece = TetrisPiece()
-    next_piece = TetrisPiece()
+    falling_piece = TetrisPiece(rng=board.rng)
+    next_piece = TetrisPiece(rng=board.rng)
+
+    def get_state():  # for replay keyframes
+        return {
+            'board': board.board,
+            'score': board.score,
+            'rng': board.rng.getstate(),
+            'falling_piece': falling_piece,
+            'next_piece': next_piece,
+            'times': (last_move_down_time, last_move_side_time,
+                      last_fall_time),
+            'moves': (move_down, move_left, move_right),
+        }
+
+    def set_state(state):
+        nonlocal falling_piece, next_piece
+        nonlocal last_move_down_time, last_move_side_time, last_fall_time
+        nonlocal move_down, move_left, move_right
+        board.board = state['board']
+        board.score = state['score']
+        board.level, board.fall_freq = board.calc_level_and_fall(board.score)
+        board.rng.setstate(state['rng'])
+        falling_piece = state['falling_piece']
+        next_piece = state['next_piece']
+        last_move_down_time, last_move_side_time, last_fall_time = \
+            state['times']
+        move_down, move_left, move_right = state['moves']
 
     while True:  # main game loop
-        if not falling_piece:
-            # no falling piece in play, so start a new one at the top
-            falling_piece = next_piece
-            next_piece = TetrisPiece()
-            last_fall_time = time.time()  # reset last fall time
-
-            if not board.is_valid_pos(falling_piece):
-                return  # can't fit a new piece, so game over
-
-        gameutil.check_for_quit()
-        for event in pygame.event.get():  # event handling loop
-            if event.type == KEYUP:  # key release
-                if event.key == K_SPACE:
-                    display.fill(BG_COLOR)
-                    pygame.mixer.music.pause()
-                    show_text_screen(display, 'Pause')
-                    pygame.mixer.music.unpause()
-
-                    now = time.time()
-                    last_fall_time = now
-                    last_move_down_time = now
-                    last_move_side_time = now
-                elif event.key in KEY_LEFT:
-                    move_left = False
-                elif event.key in KEY_RIGHT:
-                    move_right = False
-                elif event.key in KEY_DOWN:
-                    move_down = False
-
-            elif event.type == KEYDOWN:  # key press
-                if event.key in KEY_LEFT and \
-                        board.is_valid_pos(falling_piece, adj_x=-1):
+        replay.sync(get_state, set_state)
+        with display.phase('update'):
+            if not falling_piece:
+                # no falling piece in play, so start a new one at the top
+                falling_piece = next_piece
+                next_piece = TetrisPiece(rng=board.rng)
+                last_fall_time = display.get_time()  # reset last fall time
+
+                if not board.is_valid_pos(falling_piece):
+                    return board.score  # can't fit a new piece: game over
+
+        with display.phase('event'):
+            gameutil.check_for_quit()
+            for event in replay.get_events():  # event handling loop
+                if event.type == KEYUP:  # key release
+                    if event.key == K_SPACE:
+                        display.fill(BG_COLOR)
+                        pygame.mixer.music.pause()
+                        show_text_screen(display, 'Pause')
+                        pygame.mixer.music.unpause()
+
+                        now = display.get_time()
+                        last_fall_time = now
+                        last_move_down_time = now
+                        last_move_side_time = now
+                    elif event.key in KEY_LEFT:
+                        move_left = False
+                    elif event.key in KEY_RIGHT:
+                        move_right = False
+                    elif event.key in KEY_DOWN:
+                        move_down = False
+
+                elif event.type == KEYDOWN:  # key press
+                    if event.key in KEY_LEFT and \
+                            board.is_valid_pos(falling_piece, adj_x=-1):
+                        falling_piece.move_left()
+                        move_left = True
+                        move_right = False
+                        last_move_side_time = display.get_time()
+                    elif event.key in KEY_RIGHT and \
+                            board.is_valid_pos(falling_piece, adj_x=1):
+                        falling_piece.move_right()
+                        move_left = False
+                        move_right = True
+                        last_move_side_time = display.get_time()
+                    elif event.key in KEY_DOWN:
+                        move_down = True
+                        if board.is_valid_pos(falling_piece, adj_y=1):
+                            falling_piece.move_down()
+                        last_move_down_time = display.get_time()
+                    elif event.key in KEY_UP:
+                        falling_piece.rotate()
+                        if not board.is_valid_pos(falling_piece):
+                            falling_piece.rotate(-1)
+                    elif event.key == K_q:
+                        falling_piece.rotate(-1)
+                        if not board.is_valid_pos(falling_piece):
+                            falling_piece.rotate()
+
+        with display.phase('update'):
+            now = display.get_time()  # fixed for the whole frame
+
+            # handle user input--left or right
+            move_side = move_left or move_right
+            if move_side and \
+                    now - last_move_side_time > MOVE_SIDE_FREQ:
+                if move_left and board.is_valid_pos(falling_piece, adj_x=-1):
                     falling_piece.move_left()
-                    move_left = True
-                    move_right = False
-                    last_move_side_time = time.time()
-                elif event.key in KEY_RIGHT and \
-                        board.is_valid_pos(falling_piece, adj_x=1):
+                elif move_right and board.is_valid_pos(falling_piece, adj_x=1):
                     falling_piece.move_right()
-                    move_left = False
-                    move_right = True
-                    last_move_side_time = time.time()
-                elif event.key in KEY_DOWN:
-                    move_down = True
-                    if board.is_valid_pos(falling_piece, adj_y=1):
-                        falling_piece.move_down()
-                    last_move_down_time = time.time()
-                elif event.key in KEY_UP:
-                    falling_piece.rotate()
-                    if not board.is_valid_pos(falling_piece):
-                        falling_piece.rotate(-1)
-                elif event.key == K_q:
-                    falling_piece.rotate(-1)
-                    if not board.is_valid_pos(falling_piece):
-                        falling_piece.rotate()
+                last_move_side_time = now
 
-        # handle user input--left or right
-        move_side = move_left or move_right
-        if move_side and time.time() - last_move_side_time > MOVE_SIDE_FREQ:
-            if move_left and board.is_valid_pos(falling_piece, adj_x=-1):
-                falling_piece.move_left()
-            elif move_right and board.is_valid_pos(falling_piece, adj_x=1):
-                falling_piece.move_right()
-            last_move_side_time = time.time()
-
-        if move_down and time.time() - last_move_down_time > MOVE_DOWN_FREQ \
-                and board.is_valid_pos(falling_piece, adj_y=1):
-            falling_piece.move_down()
-            last_move_down_time = time.time()
-
-        # let the piece fall
-        if time.time() - last_fall_time > board.fall_freq:
-            if not board.is_valid_pos(falling_piece, adj_y=1):
-                # falling piece has landed--add it to the board
-                board.add_piece(falling_piece)
-                board.remove_completed_lines()
-                falling_piece = None
-            else:
-                # falling piece didn't land yet--move it down
+            if move_down and \
+                    now - last_move_down_time > MOVE_DOWN_FREQ and \
+                    board.is_valid_pos(falling_piece, adj_y=1):
                 falling_piece.move_down()
-                last_fall_time = time.time()
+                last_move_down_time = now
+
+            # let the piece fall
+            if now - last_fall_time > board.fall_freq:
+                if not board.is_valid_pos(falling_piece, adj_y=1):
+                    # falling piece has landed--add it to the board
+                    board.add_piece(falling_piece)
+                    board.remove_completed_lines()
+                    falling_piece = None
+                else:
+                    # falling piece didn't land yet--move it down
+                    falling_piece.move_down()
+                    last_fall_time = now
+
+            display.animations.update(display.dt)
 
-        board.draw(next_piece)
-        if falling_piece:
-            falling_piece.draw(display.display)
-        # board.draw_next_piece(next_piece)
+        with display.phase('draw'):
+            board.draw(next_piece)
+            if falling_piece:
+                falling_piece.draw(display.display)
+            # board.draw_next_piece(next_piece)
         display.update()
     return
 
@@ -198,11 +251,17 @@ def show_text_screen(display, text):
 
 class TetrisPiece():
 
-    def __init__(self):
-        shape = random.choice(list(SHAPES.keys()))
+    def __init__(self, rng=None):
+        """Initialize a random piece above the board.
+
+        Arguments:
+            rng: A random.Random (see gamelib.rng) to pick the piece with.
+        """
+        rng = gamerng.get_rng(rng)
+        shape = rng.choice(list(SHAPES.keys()))
         self.name = shape
         self.shape, self.color, self.highlight = SHAPES[shape]
-        self.rotation = random.randint(0, len(self.shape) - 1)
+        self.rotation = rng.randint(0, len(self.shape) - 1)
 
         self.x = int(TetrisBoard.BOARD_W / 2) - int(TEMPLATE_WIDTH / 2)
         self.y = -2
@@ -221,12 +280,14 @@ class TetrisPiece():
         else:
             px, py = TetrisBoard.convert_to_pixel_coord(*self.coord)
         shape = self.shape[self.rotation]
-        for x in range(TEMPLATE_WIDTH):
-            for y in range(TEMPLATE_HEIGHT):
-                if shape[y][x] != BLANK:
-                    _x = px + (x * TetrisBoard.BOX_SIZE)
-                    _y = py + (y * TetrisBoard.BOX_SIZE)
-                    draw_box(display, (_x, _y), self.color, self.highlight)
+        tile = get_box_tile(display, self.color, self.highlight)
+        box_size = TetrisBoard.BOX_SIZE
+        display.blits([
+            (tile, (px + (x * box_size) + 1, py + (y * box_size) + 1))
+            for x in range(TEMPLATE_WIDTH)
+            for y in range(TEMPLATE_HEIGHT)
+            if shape[y][x] != BLANK
+        ], False)
 
     def coord_list(self):
         shape = self.shape[self.rotation]
@@ -279,9 +340,16 @@ class TetrisBoard(GameBoard):
         colors.white,
     ]
 
-    def __init__(self, display):
-        """Initialize gameboard."""
+    def __init__(self, display, rng=None):
+        """Initialize gameboard.
+
+        Arguments:
+            display: A gamelib Display.
+            rng: A random.Random (see gamelib.rng) for the pieces; a new
+                substream of the root generator if None.
+        """
         super().__init__(display)
+        self.rng = gamerng.get_rng(rng)
         self._display = self.display.display
 
         self.board = self.get_blank_board()
@@ -331,6 +399,29 @@ class TetrisBoard(GameBoard):
 
         self.board = self.get_blank_board()
 
+        # the locked boxes, drawn as they lock (see draw_board)
+        self.layer = pygame.Surface(self.board_box.size, 0, self._display)
+        self._layer_board = None  # the board drawn on the layer
+
+        # ...or all at once, as a grid of boxes (see draw_box)
+        pattern = numpy.zeros((self.BOX_SIZE, self.BOX_SIZE), numpy.uint8)
+        pattern[1:, 1:] = 1
+        pattern[1:-3, 1:-3] = 2  # the highlight
+        self.grid = PaletteGrid((self.BOARD_W, self.BOARD_H), self.BOX_SIZE,
+                                CELL_PALETTE, pattern)
+
+        # boxes per line, column heights and holes (see count_stats)
+        self._row_fill = None
+        self._column_heights = None
+        self._n_holes = 0
+        self._stats_board = None  # the board they count
+
+        # lines being flashed (see flash_lines)
+        self.flash = None
+        self.flash_y_list = []
+        self.flash_colors = None
+        self.flash_layer = None  # the board before they're removed
+
     @staticmethod
     def calc_level_and_fall(score):
         level = int(score / 100) + 1
@@ -344,9 +435,68 @@ class TetrisBoard(GameBoard):
             cls.Y_MARGIN + (y * cls.BOX_SIZE),
         )
 
+    @property
+    def row_fill(self):
+        """The number of boxes in each line (indexed by y)."""
+        self.sync_stats()
+        return self._row_fill
+
+    @property
+    def column_heights(self):
+        """The height of each column: lines from its top box down."""
+        self.sync_stats()
+        return self._column_heights
+
+    @property
+    def n_holes(self):
+        """The number of blanks below the top box of their column."""
+        self.sync_stats()
+        return self._n_holes
+
+    def count_stats(self):
+        """Count the boxes per line, column heights and holes.
+
+        They are then kept up to date by add_piece and
+        remove_completed_lines; call this after changing self.board
+        otherwise (assigning a new board is noticed).
+        """
+        self._row_fill = [
+            self.BOARD_W - row.count(BLANK) for row in self.board]
+        self._column_heights = [0] * self.BOARD_W
+        self._n_holes = 0
+        for x in range(self.BOARD_W):
+            column = [row[x] for row in self.board]
+            top = next(
+                (y for y, color in enumerate(column) if color != BLANK),
+                self.BOARD_H)
+            self._column_heights[x] = self.BOARD_H - top
+            self._n_holes += column[top:].count(BLANK)
+        self._stats_board = self.board
+        return
+
+    def sync_stats(self):
+        """Recount the stats if the board was replaced (or is new)."""
+        if self._stats_board is not self.board:
+            self.count_stats()
+        return
+
     def add_piece(self, piece):
+        self.sync_stats()
+        heights = self._column_heights
         for x, y in piece.coord_list():
+            y = y % self.BOARD_H  # (y < 0 wraps, as indexing board does)
+            if self.board[y][x] == BLANK:
+                self._row_fill[y] += 1
+                top = self.BOARD_H - heights[x]
+                if y > top:  # filled a hole
+                    self._n_holes -= 1
+                else:  # the new top: the blanks down to the old are holes
+                    self._n_holes += top - y - 1
+                    heights[x] = self.BOARD_H - y
             self.board[y][x] = piece.color
+            self.draw_layer_box(x, y)
+        telemetry.emit('blocks.piece_placed', piece=piece.name,
+                       rotation=piece.rotation, x=piece.x, y=piece.y)
 
     def draw(self, next_piece=None):
         lc_idx = (self.level - 1) % len(self.LEVEL_COLOR_LIST)
@@ -358,6 +508,7 @@ class TetrisBoard(GameBoard):
         self.display.fill(level_color)
 
         self.draw_board(border_color=border_color)
+        self.draw_flash()
         self.draw_status(border_color=border_color)
         self.draw_next_piece(next_piece, border_color=border_color)
         return
@@ -366,17 +517,63 @@ class TetrisBoard(GameBoard):
         """Draw the tetris board."""
         # draw the border and fill it
         pygame.draw.rect(self._display, border_color, self.border_box, 5)
-        pygame.draw.rect(self._display, BOARD_BG_COLOR, self.board_box)
 
-        # draw the board
-        for x in range(self.BOARD_W):
-            for y in range(self.BOARD_H):
-                if self.board[y][x] != BLANK:
-                    pcoord = self.convert_to_pixel_coord(x, y)
-                    draw_box(
-                        self._display, pcoord,
-                        self.board[y][x], COLOR_LOOKUP[self.board[y][x]],
-                    )
+        # draw the board (the locked boxes, kept up to date on the layer)
+        if self.flash_layer is not None:
+            self._display.blit(self.flash_layer, self.board_box)
+            return
+        if self._layer_board is not self.board:
+            self.redraw_layer()  # a new board (e.g., a replay keyframe)
+        self._display.blit(self.layer, self.board_box)
+        return
+
+    def draw_layer_box(self, x, y):
+        """Draw a box of the board (or its background) on the layer."""
+        box_size = self.BOX_SIZE
+        pixel_coord = (x * box_size, y * box_size)
+        color = self.board[y][x]
+        if color == BLANK:
+            self.layer.fill(BOARD_BG_COLOR, pixel_coord + (box_size, box_size))
+        else:
+            draw_box(self.layer, pixel_coord, color, COLOR_LOOKUP[color])
+        return
+
+    def redraw_layer(self):
+        """Draw the whole board on the layer.
+
+        Boxes are drawn on the layer as they lock, and it is shifted as
+        lines are removed; call this after changing self.board otherwise
+        (assigning a new board is noticed).
+        """
+        cells = self.grid.cells
+        for y, row in enumerate(self.board):
+            cells[y] = [CELL_VALUES[color] for color in row]
+        self.grid.draw(self.layer)
+        self._layer_board = self.board
+        return
+
+    def shift_layer(self, rm_list):
+        """Remove lines from the layer, moving those above them down.
+
+        Arguments:
+            rm_list: The removed lines (y), bottom up.
+        """
+        box_size = self.BOX_SIZE
+        width = self.board_w_px
+        clip = self.layer.get_clip()
+        # each run of lines between removed ones drops by the number
+        # removed below it; scroll the lowest first, as it's moved into
+        for shift, (bottom, top) in enumerate(
+                zip(rm_list, rm_list[1:] + [-1]), 1):
+            if bottom - top > 1:  # lines (top, bottom) are kept
+                self.layer.set_clip((
+                    0, (top + 1) * box_size,
+                    width, (bottom - top - 1 + shift) * box_size,
+                ))
+                self.layer.scroll(0, shift * box_size)
+        self.layer.set_clip(clip)
+        self.layer.fill(
+            BOARD_BG_COLOR, (0, 0, width, len(rm_list) * box_size))
         return
 
     def draw_next_piece(self, piece, border_color=BORDER_COLOR):
@@ -404,20 +601,66 @@ class TetrisBoard(GameBoard):
             self.display.blit(surf, rect)
         pass
 
-    def flash_lines(self, y_list):
-        self.draw()
-        for y in y_list:
-            for x in range(self.BOARD_W):
-                pixel_coord = self.convert_to_pixel_coord(x, y)
-                draw_box(
-                    self._display, pixel_coord, colors.light_gray, colors.gray)
-        self.display.update()
-        for y in y_list:
+    def draw_flash(self):
+        """Draw the lines being flashed (if any) over the board."""
+        if not self.flash_colors:
+            return
+        tile = get_box_tile(self._display, *self.flash_colors)
+        blit_list = []
+        for y in self.flash_y_list:
             for x in range(self.BOARD_W):
-                pixel_coord = self.convert_to_pixel_coord(x, y)
-                draw_box(
-                    self._display, pixel_coord, colors.black, colors.dark_gray)
-        self.display.update()
+                px, py = self.convert_to_pixel_coord(x, y)
+                blit_list.append((tile, (px + 1, py + 1)))
+        self._display.blits(blit_list, False)
+        return
+
+    def flash_lines(self, y_list):
+        """Flash the given lines, one frame light and one frame dark.
+
+        Call this before removing them: the board is drawn as it is now
+        until the flash is over.
+
+        Return:
+            The scheduled animation.
+        """
+        frame_ms = 1000 / self.display.fps
+
+        def set_colors(flash_colors):
+            self.flash_colors = flash_colors
+            if flash_colors is None:
+                self.flash_layer = None
+
+        if self.flash:
+            self.display.animations.skip(self.flash)  # if still flashing
+        if self._layer_board is not self.board:
+            self.redraw_layer()
+        self.flash_layer = self.layer.copy()
+        self.flash_y_list = y_list
+        self.flash = self.display.animations.add(animation.Sequence(
+            animation.Call(set_colors, (colors.LIGHT_GRAY, colors.GRAY)),
+            animation.Wait(frame_ms),
+            animation.Call(set_colors, (colors.BLACK, colors.DARK_GRAY)),
+            animation.Wait(frame_ms),
+            animation.Call(set_colors, None),
+        ))
+        return self.flash
+
+    def _drop_columns(self, rm_list):
+        """Update column heights and holes for removed lines."""
+        n_lines = len(rm_list)
+        top_rm = rm_list[-1]  # the highest removed line
+        heights = self._column_heights
+        for x in range(self.BOARD_W):
+            if self.BOARD_H - heights[x] < top_rm:  # boxes above: all drop
+                heights[x] -= n_lines
+                continue
+            # its top was removed, and the lines down to top_rm + n_lines
+            # are blank now; its holes down to the next box are open
+            y = top_rm + n_lines
+            while y < self.BOARD_H and self.board[y][x] == BLANK:
+                y += 1
+            self._n_holes -= y - (top_rm + n_lines)
+            heights[x] = self.BOARD_H - y
         return
 
     def get_blank_board(self):
@@ -428,10 +671,7 @@ class TetrisBoard(GameBoard):
 
     def is_line_complete(self, y):
         """Return True if none of the boxes are blank."""
-        for x in range(self.BOARD_W):
-            if self.board[y][x] == BLANK:
-                return False
-        return True
+        return self.row_fill[y] == self.BOARD_W
 
     def is_on_board(self, x, y):
         return x >= 0 and x < self.BOARD_W and y < self.BOARD_H
@@ -450,11 +690,10 @@ class TetrisBoard(GameBoard):
         return True
 
     def remove_completed_lines(self):
-        rm_list = []
-        for y in range(self.BOARD_H, 0, -1):
-            y = y - 1
-            if self.is_line_complete(y):
-                rm_list.append(y)
+        board_w = self.BOARD_W
+        rm_list = [  # bottom up
+            y for y, n_boxes in enumerate(self.row_fill) if n_boxes == board_w
+        ][::-1]
 
         if not rm_list:
             return
@@ -466,6 +705,7 @@ class TetrisBoard(GameBoard):
         new_lines = []
         for rm_y in rm_list:
             del self.board[rm_y]
+            del self._row_fill[rm_y]
             new_lines.append([BLANK] * self.BOARD_W)
 
         # calculate the score
@@ -477,30 +717,46 @@ class TetrisBoard(GameBoard):
         self.score += base_score + bonus_score + super_bonus
 
         # add new lines and update score
+        layer_current = self._layer_board is self.board
         self.board = new_lines + self.board
+        if layer_current:  # (otherwise it's redrawn when next drawn)
+            self.shift_layer(rm_list)
+            self._layer_board = self.board
+        self._row_fill[:0] = [0] * n_lines
+        self._stats_board = self.board
+        self._drop_columns(rm_list)
         self.level, self.fall_freq = self.calc_level_and_fall(self.score)
+        telemetry.emit('blocks.lines_cleared', lines=n_lines,
+                       score=self.score, level=self.level)
         return
 
 
-def main():
+def main(argv=None):
     global BIG_FONT, REG_FONT
+    parser = argparse.ArgumentParser(description='Tetris')
+    replay.add_arguments(parser)
+    args = parser.parse_args(argv)
+
     pygame.init()
     BIG_FONT = pygame.font.Font(fonts.open_sans, 100)
     REG_FONT = pygame.font.Font(fonts.open_sans, 18)
     display = Display(
         fps=FPS, win_width=WIN_WIDTH, win_height=WIN_HEIGHT,
-        caption='Tetris',
+        caption='Tetris', headless=args.headless,
     )
 
+    rng = replay.start(display, args, game='blocks')
     show_text_screen(display, display.caption)
     while True:  # game loop
-        if random.randint(0, 1) == 0:
-            pygame.mixer.music.load(sounds.tetris_b)
-        else:
-            pygame.mixer.music.load(sounds.tetris_c)
-        pygame.mixer.music.play(-1, 0.0)  # loop indefinitely
-        run_game(display)
+        music = sounds.tetris_b if rng.randint(0, 1) == 0 \
+            else sounds.tetris_c
+        if not display.headless:
+            pygame.mixer.music.load(music)
+            pygame.mixer.music.play(-1, 0.0)  # loop indefinitely
+        score = run_game(display, rng=rng)
         pygame.mixer.music.stop()
+        if not (replay.is_playing() or display.headless):
+            leaderboard.submit('blocks', score)
         show_text_screen(display, 'Game Over')
 
 
@@ -9,7 +9,7 @@ import time
 
 import pygame
 # update file locations!
-from gamelib import sounds
+from gamelib import sounds, sprites
 from pygame.locals import *
 
 TETRISB = sounds.tetris_b
@@ -49,6 +49,7 @@ TEXTSHADOWCOLOR = GRAY
 COLORS = (BLUE,      GREEN,      RED,      YELLOW)
 LIGHTCOLORS = (LIGHTBLUE, LIGHTGREEN, LIGHTRED, LIGHTYELLOW)
 assert len(COLORS) == len(LIGHTCOLORS)  # each color must have light color
+BOXTILES = sprites.TileCache()  # each box is drawn once, then blitted
 
 TEMPLATEWIDTH = 5
 TEMPLATEHEIGHT = 5
@@ -466,10 +467,13 @@ def drawBox(boxx, boxy, color, pixelx=None, pixely=None):
         return
     if pixelx == None and pixely == None:
         pixelx, pixely = convertToPixelCoords(boxx, boxy)
-    pygame.draw.rect(DISPLAYSURF, COLORS[
-                     color], (pixelx + 1, pixely + 1, BOXSIZE - 1, BOXSIZE - 1))
-    pygame.draw.rect(DISPLAYSURF, LIGHTCOLORS[
-                     color], (pixelx + 1, pixely + 1, BOXSIZE - 4, BOXSIZE - 4))
+    DISPLAYSURF.blit(getBoxTile(color), (pixelx + 1, pixely + 1))
+
+
+def getBoxTile(color):
+    # return the box of a color, as a Surface to blit at pixel + 1
+    return BOXTILES.get(COLORS[color], LIGHTCOLORS[color], BOXSIZE,
+                        DISPLAYSURF)
 
 
 def drawBoard(board):
@@ -480,10 +484,13 @@ def drawBoard(board):
     # fill the background of the board
     pygame.draw.rect(DISPLAYSURF, BGCOLOR, (XMARGIN, TOPMARGIN,
                                             BOXSIZE * BOARDWIDTH, BOXSIZE * BOARDHEIGHT))
-    # draw the individual boxes on the board
-    for x in range(BOARDWIDTH):
-        for y in range(BOARDHEIGHT):
-            drawBox(x, y, board[x][y])
+    # draw the individual boxes on the board, in one batch
+    DISPLAYSURF.blits([(getBoxTile(board[x][y]),
+                        (XMARGIN + (x * BOXSIZE) + 1,
+                         TOPMARGIN + (y * BOXSIZE) + 1))
+                       for x in range(BOARDWIDTH)
+                       for y in range(BOARDHEIGHT)
+                       if board[x][y] != BLANK], False)
 
 
 def drawStatus(score, level):
@@ -508,11 +515,12 @@ def drawPiece(piece, pixelx=None, pixely=None):
         pixelx, pixely = convertToPixelCoords(piece['x'], piece['y'])
 
     # draw each of the boxes that make up the piece
-    for x in range(TEMPLATEWIDTH):
-        for y in range(TEMPLATEHEIGHT):
-            if shapeToDraw[y][x] != BLANK:
-                drawBox(None, None, piece['color'], pixelx +
-                        (x * BOXSIZE), pixely + (y * BOXSIZE))
+    tile = getBoxTile(piece['color'])
+    DISPLAYSURF.blits([(tile, (pixelx + (x * BOXSIZE) + 1,
+                               pixely + (y * BOXSIZE) + 1))
+                       for x in range(TEMPLATEWIDTH)
+                       for y in range(TEMPLATEHEIGHT)
+                       if shapeToDraw[y][x] != BLANK], False)
 
 
 def drawNextPiece(piece):
@@ -0,0 +1,176 @@
+"""The chapter games as headless, step-at-a-time environments.
+
+Each environment wraps a game's own classes (TetrisBoard, Elegans, ...)
+on a headless Display, without a window, event queue or frame limiter:
+
+    from env import make
+
+    game = make('tetris')
+    observation = game.reset(seed=1234)
+    done = False
+    while not done:
+        action = choose(observation)  # an index into game.actions
+        observation, reward, done, info = game.step(action)
+
+The observation is a NumPy array that is filled in place on every step
+(copy it to keep it). Steps allocate no Surfaces; render() draws the
+current state on the display, as the game would, when a picture is
+wanted.
+
+Run `python -m env` to time random play in each game.
+"""
+
+import importlib
+
+import numpy
+from gamelib import rng as gamerng
+from gamelib import sounds
+from gamelib.display import headless_display
+from gamelib.games import load_game
+
+# environment name --> (module, class)
+ENVS = {
+    'memory': ('env.memory', 'MemoryEnv'),
+    'slide': ('env.slide', 'SlideEnv'),
+    'simon': ('env.simon', 'SimonEnv'),
+    'snake': ('env.snake', 'SnakeEnv'),
+    'tetris': ('env.tetris', 'TetrisEnv'),
+}
+
+
+def make(name, **kwargs):
+    """Create an environment by name (see ENVS).
+
+    Arguments:
+        name: The environment name.
+        kwargs: Passed to the environment class.
+    Return:
+        An Env.
+    Raises:
+        KeyError if there is no such environment.
+    """
+    module, cls = ENVS[name]
+    return getattr(importlib.import_module(module), cls)(**kwargs)
+
+
+class Env():
+    """A game, advanced one action at a time.
+
+    Subclasses set the game (a gamelib.games.GAMES name), the actions, and the
+    observation shape (or get_observation_shape, if it depends on the
+    game) and dtype, and implement new_game, apply, observe and render.
+
+    sounds.bank is muted while new_game and apply run, and only then.
+    """
+
+    game = None
+    actions = ()
+    observation_shape = ()
+    observation_dtype = numpy.uint8
+
+    def __init__(self, max_steps=None, observation=None):
+        """Load the game and set up a headless display.
+
+        Arguments:
+            max_steps: If set, a game is cut off (done, with 'truncated'
+                in the info) after this many steps.
+            observation: An array to write observations into, e.g., in
+                shared memory (see env.vector); allocated if None.
+        Raises:
+            ValueError if the observation array has the wrong shape or
+            dtype.
+        """
+        self.module = load_game(self.game)
+        self.observation_shape = self.get_observation_shape()
+        self.display = headless_display(**self.get_display_kwargs())
+
+        self.max_steps = max_steps
+        if observation is None:
+            observation = numpy.zeros(
+                self.observation_shape, dtype=self.observation_dtype)
+        elif observation.shape != tuple(self.observation_shape) or \
+                observation.dtype != self.observation_dtype:
+            raise ValueError('Observations are {} {}, not {} {}'.format(
+                self.observation_shape, numpy.dtype(self.observation_dtype),
+                observation.shape, observation.dtype))
+        self.observation = observation
+        self.rng = None
+        self.n_steps = 0
+        self.done = True
+
+    def __repr__(self):
+        return '<{} {}>'.format(type(self).__name__, self.game)
+
+    def get_observation_shape(self):
+        return self.observation_shape
+
+    def get_display_kwargs(self):
+        """Return the arguments for the game's Display."""
+        return {}
+
+    def reset(self, seed=None):
+        """Start a new game.
+
+        Arguments:
+            seed: Seeds the game's RNG; the same seed (and actions) give
+                the same game. Drawn from the OS if None.
+        Return:
+            The first observation.
+        """
+        self.rng = gamerng.RNG(seed)
+        self.n_steps = 0
+        self.done = False
+        with sounds.bank.muting():  # nobody is listening
+            self.new_game()
+        self.observe()
+        return self.observation
+
+    def step(self, action):
+        """Play an action.
+
+        Arguments:
+            action: An index into self.actions.
+        Return:
+            (observation, reward, done, info)
+        Raises:
+            RuntimeError if the game is over (call reset).
+            IndexError if the action is out of range.
+        """
+        if self.done:
+            raise RuntimeError('The game is over; call reset()')
+        if not 0 <= action < len(self.actions):
+            raise IndexError('No action {} in {}'.format(action, self))
+
+        with sounds.bank.muting():
+            reward, done, info = self.apply(action)
+        self.n_steps += 1
+        if not done and self.max_steps and self.n_steps >= self.max_steps:
+            done = True
+            info['truncated'] = True
+        self.done = done
+        self.observe()
+        return self.observation, reward, done, info
+
+    def new_game(self):
+        """Set up a new game (using self.rng)."""
+        raise NotImplementedError
+
+    def apply(self, action):
+        """Play an action.
+
+        Return:
+            (reward, done, info)
+        """
+        raise NotImplementedError
+
+    def observe(self):
+        """Write the game state into self.observation."""
+        raise NotImplementedError
+
+    def render(self):
+        """Draw the game as it would be shown.
+
+        Return:
+            The display's Surface.
+        """
+        raise NotImplementedError
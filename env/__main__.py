@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""Time random play in each environment."""
+
+import argparse
+import time
+
+from env import ENVS, make
+from gamelib import rng as gamerng
+
+
+def play(env, n_steps, seed):
+    """Play random actions for n_steps, resetting as games end.
+
+    Return:
+        (games finished, seconds)
+    """
+    rng = gamerng.RNG(seed)
+    n_actions = len(env.actions)
+    n_games = 0
+    env.reset(seed=rng.spawn('game', n_games).initial_seed)
+    start = time.perf_counter()
+    for _ in range(n_steps):
+        _, _, done, _ = env.step(rng.randrange(n_actions))
+        if done:
+            n_games += 1
+            env.reset(seed=rng.spawn('game', n_games).initial_seed)
+    return n_games, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m env', description=__doc__)
+    parser.add_argument('names', nargs='*', default=sorted(ENVS),
+                        help='environments to run (default: all)')
+    parser.add_argument('-n', '--steps', type=int, default=100000,
+                        help='steps per environment')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-steps', type=int, default=1000,
+                        help='steps before a game is cut off')
+    args = parser.parse_args(argv)
+
+    print('{:<8} {:>10} {:>8} {:>12} {:>14}'.format(
+        'env', 'steps', 'games', 'steps/s', 'steps/hour'))
+    for name in args.names:
+        env = make(name, max_steps=args.max_steps)
+        n_games, seconds = play(env, args.steps, args.seed)
+        rate = args.steps / seconds
+        print('{:<8} {:>10} {:>8} {:>12,.0f} {:>14,.0f}'.format(
+            name, args.steps, n_games, rate, rate * 3600))
+    return 0
+
+
+if __name__ == '__main__':
+    main()
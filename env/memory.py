@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""The memory game (ch3) as an Env.
+
+Each step turns over a box (by index; turning over an open box does
+nothing). A second box that matches the first scores a reward of 1;
+otherwise both are covered again, right away. The game is over once
+every box is open.
+
+Observation: the boxes, N_ROW x N_COL, with each open box's icon as
+1 + its index in SHAPES x COLORS (0 for covered).
+"""
+
+from env import Env
+
+
+class MemoryEnv(Env):
+
+    game = 'memory'
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        memory = self.module
+        self.coord_list = [
+            (x, y)
+            for y in range(memory.N_ROW)
+            for x in range(memory.N_COL)
+        ]
+        self.actions = tuple(self.coord_list)
+        self.board = None
+        self.first_box = None
+        self.cell_list = []  # (box, y, x, icon index), for observe
+
+    def get_observation_shape(self):
+        return (self.module.N_ROW, self.module.N_COL)
+
+    def get_display_kwargs(self):
+        memory = self.module
+        return {
+            'fps': memory.FPS,
+            'win_width': memory.WIN_WIDTH,
+            'win_height': memory.WIN_HEIGHT,
+            'bg_color': memory.BG_COLOR,
+            'bg_color_light': memory.BG_COLOR_LIGHT,
+        }
+
+    def new_game(self):
+        Board = self.module.GameBoard
+        self.board = Board(self.display, rng=self.rng)
+        self.first_box = None
+
+        n_colors = len(Board.COLORS)
+        self.cell_list = [
+            (box, y, x, 1 + Board.SHAPES.index(box.shape) * n_colors +
+             Board.COLORS.index(box.color))
+            for (x, y), box in sorted(self.board.board.items())
+        ]
+
+    def apply(self, action):
+        board = self.board
+        box = board.board[self.coord_list[action]]
+        if box.revealed:
+            return 0, False, {'invalid': True}
+
+        first_box = self.first_box
+        self.first_box = self.module.handle_click(board, box, first_box)
+        reward = int(first_box is not None and box == first_box)
+        return reward, board.has_won(), {}
+
+    def observe(self):
+        obs = self.observation
+        for box, y, x, icon in self.cell_list:
+            obs[y, x] = icon if box.revealed else 0
+        return
+
+    def render(self):
+        self.display.fill()
+        self.board.draw_board()
+        return self.display.display
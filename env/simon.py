@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Patterns (ch5, a Simon clone) as an Env.
+
+Each step presses a pad. Matching the whole pattern scores a point
+(a reward of 1), and the pattern grows by a pad; a wrong pad ends the
+game. The game's input timeout has no equivalent here.
+
+Observation: the pattern, as pad indices, padded with -1 to MAX_PATTERN
+(a game that reaches MAX_PATTERN is over).
+"""
+
+import numpy
+from env import Env
+from gamelib import colors
+
+MAX_PATTERN = 64
+
+
+class SimonEnv(Env):
+
+    game = 'patterns'
+    observation_shape = (MAX_PATTERN, )
+    observation_dtype = numpy.int8
+
+    def __init__(self, n_pads=None, **kwargs):
+        """Initialize.
+
+        Arguments:
+            n_pads: The number of pads (default: patterns.N_PADS).
+        """
+        super().__init__(**kwargs)
+        patterns = self.module
+        n_pads = n_pads or patterns.N_PADS
+        self.board = patterns.SimonBoard(self.display, n_pads=n_pads)
+        self.board.animation_speed = 60  # as set by patterns.main
+        self.board.fg_color = colors.black
+        self.actions = tuple(self.board.box_order)
+        self.pad_index = {name: i for i, name in enumerate(self.actions)}
+
+    def get_display_kwargs(self):
+        return {'bg_color': colors.dark_gray}
+
+    def new_game(self):
+        self.board.rng = self.rng
+        self.board.reset()
+        self.board.animate_pattern()
+
+    def apply(self, action):
+        board = self.board
+        box = board.box_list[action]
+        board.flash_button(box)
+        try:
+            matched = board.check_input(box)
+        except self.module.StopInput:
+            board.animate_pattern()  # the next round
+            done = len(board.pattern) >= MAX_PATTERN
+            return 1, done, {'score': board.score}
+        return 0, not matched, {'score': board.score}
+
+    def observe(self):
+        obs = self.observation
+        obs.fill(-1)
+        pad_index = self.pad_index
+        for i, name in enumerate(self.board.pattern[:MAX_PATTERN]):
+            obs[i] = pad_index[name]
+        return
+
+    def render(self):
+        self.board.draw()
+        return self.display.display
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""The slide puzzle (ch4) as an Env.
+
+Each step slides a tile into the blank (a move off the board does
+nothing). The game is over, with a reward of 1, once the tiles are in
+order. As in the game, the start is a random shuffle, so half of the
+games can't be solved; set max_steps.
+
+Observation: the tiles, N_ROW x N_COL, by number (0 for the blank).
+"""
+
+from env import Env
+
+
+class SlideEnv(Env):
+
+    game = 'slide'
+    actions = ('up', 'down', 'left', 'right')
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        slide = self.module
+        self.directions = (slide.UP, slide.DOWN, slide.LEFT, slide.RIGHT)
+        self.board = slide.SlideBoard(self.display, buttons=[])
+
+    def get_observation_shape(self):
+        return (self.module.N_ROW, self.module.N_COL)
+
+    def get_display_kwargs(self):
+        slide = self.module
+        return {
+            'fps': slide.FPS,
+            'win_width': slide.WIN_WIDTH,
+            'win_height': slide.WIN_HEIGHT,
+            'bg_color': slide.BG_COLOR,
+            'bg_color_light': slide.BG_COLOR_LIGHT,
+            'font': slide.FONT,
+            'font_size': slide.FONT_SIZE,
+        }
+
+    def new_game(self):
+        # shuffle from the solved order; shuffle starts from the tiles as
+        # they are, and a game must depend only on its seed
+        board = self.board
+        for i, box in enumerate(board.box_list[:-1]):
+            box.text = str(i + 1)
+        board.box_list[-1].text = ''
+        board.set_tile_lookup()
+        board.rng = self.rng
+        board.shuffle()
+
+    def apply(self, action):
+        self.board.slide_to_blank(self.directions[action])
+        solved = self.board.is_solved()
+        return int(solved), solved, {}
+
+    def observe(self):
+        obs = self.observation
+        for box in self.board.box_list:
+            obs[box.box_y, box.box_x] = int(box.text) if box.text else 0
+        return
+
+    def render(self):
+        self.board.draw_board('Solved!' if self.board.is_solved() else None)
+        return self.display.display
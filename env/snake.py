@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""C. elegans (ch6) as an Env.
+
+Each step is one frame of the game: the worm turns (or not), grows if
+its head is on the apple (which then moves) and moves a cell. The game
+is over when the head hits an edge or the worm.
+
+Observation: the grid, CELL_HEIGHT x CELL_WIDTH, with 1 for the worm's
+body, 2 for its head and 3 for the apple (0 for empty).
+"""
+
+from env import Env
+
+BODY = 1
+HEAD = 2
+APPLE = 3
+
+
+class SnakeEnv(Env):
+
+    game = 'elegans'
+    actions = ('noop', 'up', 'down', 'left', 'right')
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        elegans = self.module
+        self.directions = (
+            None, elegans.UP, elegans.DOWN, elegans.LEFT, elegans.RIGHT)
+        self.worm = None
+        self.apple = None
+        self.direction = None
+        self.board = elegans.make_board()  # drawn on by render
+
+    def get_observation_shape(self):
+        return (self.module.CELL_HEIGHT, self.module.CELL_WIDTH)
+
+    def get_display_kwargs(self):
+        return {
+            'fps': self.module.FPS,
+            'win_width': self.module.WIN_WIDTH,
+            'win_height': self.module.WIN_HEIGHT,
+        }
+
+    def new_game(self):
+        elegans = self.module
+        self.worm = elegans.Elegans(rng=self.rng)
+        self.apple = elegans.get_random_loc(self.rng)
+        self.direction = elegans.RIGHT
+
+    def apply(self, action):
+        elegans = self.module
+        worm = self.worm
+        if action:
+            self.direction = self.directions[action]
+
+        reward = 0
+        if worm.coord[elegans.HEAD] == self.apple:
+            self.apple = elegans.get_random_loc(self.rng)  # and don't shrink
+            reward = 1
+        else:
+            worm.shrink()
+        worm.move(self.direction)
+
+        done = worm.has_edge_collision() or worm.has_self_collision()
+        info = {'score': worm.length - 3}
+        return reward, done, info
+
+    def observe(self):
+        obs = self.observation
+        obs.fill(0)
+        height, width = obs.shape
+        for i, coord in enumerate(self.worm.coord):
+            x, y = coord['x'], coord['y']
+            if 0 <= x < width and 0 <= y < height:
+                obs[y, x] = BODY if i else HEAD
+        obs[self.apple['y'], self.apple['x']] = APPLE
+        return
+
+    def render(self):
+        elegans = self.module
+        display = self.display
+        elegans.clear_board(self.board)
+        self.worm.draw(self.board)
+        elegans.draw_apple(self.board, self.apple)
+        self.board.draw(display.display)
+        elegans.draw_score(display, self.worm.length - 3)
+        return display.display
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""Blocks (ch7) as an Env.
+
+Each step is one frame of the game (1/FPS s): the action is applied,
+then the piece falls a row if the board's fall time has passed. A piece
+that can't fall any further is locked and the next one is spawned; the
+game is over when it doesn't fit.
+
+Observation: the board, BOARD_H x BOARD_W, with 1 for locked boxes and
+2 for the falling piece (0 for blank).
+"""
+
+import logging
+
+import pygame
+from env import Env
+from gamelib import fonts
+
+log = logging.getLogger(__name__)
+
+LOCKED = 1
+FALLING = 2
+
+
+class TetrisEnv(Env):
+
+    game = 'blocks'
+    actions = ('noop', 'left', 'right', 'down', 'rotate', 'rotate_back')
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.frame_time = 1 / self.module.FPS
+        self.board = None
+        self.falling_piece = None
+        self.next_piece = None
+
+    def get_observation_shape(self):
+        board = self.module.TetrisBoard
+        return (board.BOARD_H, board.BOARD_W)
+
+    def get_display_kwargs(self):
+        return {
+            'fps': self.module.FPS,
+            'win_width': self.module.WIN_WIDTH,
+            'win_height': self.module.WIN_HEIGHT,
+        }
+
+    def new_game(self):
+        blocks = self.module
+        self.board = blocks.TetrisBoard(self.display, rng=self.rng)
+        self.falling_piece = blocks.TetrisPiece(rng=self.rng)
+        self.next_piece = blocks.TetrisPiece(rng=self.rng)
+        self.time = 0
+        self.last_fall_time = 0
+
+    def apply(self, action):
+        board = self.board
+        piece = self.falling_piece
+        name = self.actions[action]
+
+        if name == 'left' and board.is_valid_pos(piece, adj_x=-1):
+            piece.move_left()
+        elif name == 'right' and board.is_valid_pos(piece, adj_x=1):
+            piece.move_right()
+        elif name == 'down' and board.is_valid_pos(piece, adj_y=1):
+            piece.move_down()
+        elif name == 'rotate':
+            piece.rotate()
+            if not board.is_valid_pos(piece):
+                piece.rotate(-1)
+        elif name == 'rotate_back':
+            piece.rotate(-1)
+            if not board.is_valid_pos(piece):
+                piece.rotate()
+
+        # let the piece fall
+        self.time += self.frame_time
+        reward = 0
+        done = False
+        if self.time - self.last_fall_time > board.fall_freq:
+            self.last_fall_time = self.time
+            if board.is_valid_pos(piece, adj_y=1):
+                piece.move_down()
+            else:
+                # landed--lock it in and start the next one at the top
+                score = board.score
+                board.add_piece(piece)
+                board.remove_completed_lines()
+                reward = board.score - score
+
+                self.falling_piece = self.next_piece
+                self.next_piece = self.module.TetrisPiece(rng=self.rng)
+                done = not board.is_valid_pos(self.falling_piece)
+
+        info = {'score': board.score, 'level': board.level}
+        return reward, done, info
+
+    def observe(self):
+        blank = self.module.BLANK
+        obs = self.observation
+        for y, row in enumerate(self.board.board):
+            obs_row = obs[y]
+            for x, cell in enumerate(row):
+                obs_row[x] = LOCKED if cell != blank else 0
+        height = self.board.BOARD_H
+        for x, y in self.falling_piece.coord_list():
+            if 0 <= y < height:
+                obs[y, x] = FALLING
+        return
+
+    def render(self):
+        blocks = self.module
+        if blocks.REG_FONT is None:
+            blocks.REG_FONT = pygame.font.Font(fonts.open_sans, 18)
+        self.board.draw(self.next_piece)
+        self.falling_piece.draw(self.display.display)
+        return self.display.display
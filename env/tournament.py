@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""Play many games of an environment with a bot, across processes.
+
+    python -m env.tournament tetris random -n 1000 -o results.jsonl
+    python -m env.tournament snake mybots:greedy -n 10000 -j 32
+
+A bot is a callable, named as module:attribute (or 'random'), that takes
+(observation, env, rng) and returns an action index; rng is a gamelib
+RNG of its own. Bots must be importable by the worker processes.
+
+Game i is seeded from the tournament seed and i (see RNG.spawn), and so
+is its bot's RNG, so a game's result doesn't depend on which worker
+played it or how many there were.
+
+Games are handed out in small chunks; the stats of each game (score,
+steps, moves and wall time) are written to the JSON-lines file as soon
+as its chunk is done. A bot that raises only loses its game (recorded
+with the error). A worker that dies (e.g., segfaults or is killed)
+breaks the pool: the completed results are kept, a new pool is started,
+and the games that were in flight are retried, one per task; a game
+lost MAX_RETRIES times is then played alone, to tell whether it is the
+one crashing.
+"""
+
+import argparse
+import collections
+import concurrent.futures
+import importlib
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+
+from concurrent.futures.process import BrokenProcessPool
+from env import ENVS, make
+from gamelib import logging as gamelog
+from gamelib import rng as gamerng
+
+log = logging.getLogger(__name__)
+
+MAX_STEPS = 10000
+MAX_RETRIES = 2
+STAT_KEYS = ('score', 'steps', 'moves', 'seconds')
+
+_envs = {}  # one environment per (name, max_steps) in each worker
+
+
+def random_bot(observation, env, rng):
+    """Pick an action at random."""
+    return rng.randrange(len(env.actions))
+
+
+def load_bot(spec):
+    """Import a bot from 'module:attribute' (or 'random')."""
+    if spec == 'random':
+        return random_bot
+    module, _, name = spec.partition(':')
+    if not name:
+        raise ValueError('Bots are given as module:attribute, not ' + spec)
+    return getattr(importlib.import_module(module), name)
+
+
+#
+#  #     #
+#  #  #  #  ####  #####  #    # ###### #####
+#  #  #  # #    # #    # #   #  #      #    #
+#  #  #  # #    # #    # ####   #####  #    #
+#  #  #  # #    # #####  #  #   #      #####
+#  #  #  # #    # #   #  #   #  #      #   #
+#   ## ##   ####  #    # #    # ###### #    #
+
+def play_game(env, bot, seed, index):
+    """Play one game to the end.
+
+    Return:
+        A dict of stats for the game.
+    """
+    root = gamerng.RNG(seed)
+    game_seed = root.spawn('game', index).initial_seed
+    bot_rng = root.spawn('bot', index)
+    noop = env.actions[0] == 'noop'
+
+    start = time.perf_counter()
+    observation = env.reset(seed=game_seed)
+    total_reward = 0
+    n_moves = 0
+    info = {}
+    done = False
+    while not done:
+        action = bot(observation, env, bot_rng)
+        if action or not noop:
+            n_moves += 1
+        observation, reward, done, info = env.step(action)
+        total_reward += reward
+
+    return {
+        'game': index,
+        'seed': game_seed,
+        'score': info.get('score', total_reward),
+        'reward': total_reward,
+        'steps': env.n_steps,
+        'moves': n_moves,
+        'truncated': bool(info.get('truncated')),
+        'seconds': time.perf_counter() - start,
+        'pid': os.getpid(),
+    }
+
+
+def play_games(name, bot_spec, seed, index_list, max_steps=MAX_STEPS):
+    """Play a chunk of games in a worker.
+
+    Return:
+        A list of stats dicts; a game whose bot (or env) raised has an
+        'error' instead.
+    """
+    key = (name, max_steps)
+    if key not in _envs:
+        _envs[key] = make(name, max_steps=max_steps)
+    env = _envs[key]
+    bot = load_bot(bot_spec)
+
+    result_list = []
+    for index in index_list:
+        try:
+            result_list.append(play_game(env, bot, seed, index))
+        except Exception as e:
+            log.exception('game {} failed'.format(index))
+            result_list.append({'game': index, 'error': repr(e)})
+    return result_list
+
+
+#
+#  #     #
+#  ##   ##   ##   #    #   ##    ####  ###### #####
+#  # # # #  #  #  ##   #  #  #  #    # #      #    #
+#  #  #  # #    # # #  # #    # #      #####  #    #
+#  #     # ###### #  # # ###### #  ### #      #####
+#  #     # #    # #   ## #    # #    # #      #   #
+#  #     # #    # #    # #    #  ####  ###### #    #
+
+def get_chunk_size(n_games, n_workers):
+    """Aim for ~8 chunks per worker (for balance), at most 64 games each."""
+    return max(1, min(64, n_games // (n_workers * 8)))
+
+
+def play_pool(name, bot_spec, seed, chunk_list, n_workers, max_steps,
+              on_result=None):
+    """Play chunks of games on a new process pool.
+
+    Return:
+        (results, lost): the stats of the games that finished and the
+        indices of those lost when a worker died.
+    """
+    results = []
+    lost = []
+    with concurrent.futures.ProcessPoolExecutor(n_workers) as pool:
+        future_dict = {
+            pool.submit(play_games, name, bot_spec, seed, index_list,
+                        max_steps): index_list
+            for index_list in chunk_list
+        }
+        for future in concurrent.futures.as_completed(future_dict):
+            try:
+                result_list = future.result()
+            except BrokenProcessPool:
+                lost.extend(future_dict[future])
+                continue
+            for result in result_list:
+                results.append(result)
+                if on_result:
+                    on_result(result)
+    return results, sorted(lost)
+
+
+def run(name, bot_spec, n_games, seed=0, n_workers=None, chunk_size=None,
+        max_steps=MAX_STEPS, on_result=None):
+    """Play a tournament.
+
+    Arguments:
+        name: The environment (see env.ENVS).
+        bot_spec: The bot, as module:attribute (or 'random').
+        n_games: The number of games.
+        seed: The tournament seed.
+        n_workers: Worker processes (default: one per CPU).
+        chunk_size: Games per task (default: see get_chunk_size).
+        max_steps: Steps before a game is cut off.
+        on_result: Called with each game's stats as they come in.
+    Return:
+        (results, failed): the stats of every game that finished and the
+        indices of those that crash their worker.
+    """
+    load_bot(bot_spec)  # fail early if it can't be imported
+    n_workers = n_workers or os.cpu_count()
+    chunk_size = chunk_size or get_chunk_size(n_games, n_workers)
+    pending = [
+        list(range(i, min(i + chunk_size, n_games)))
+        for i in range(0, n_games, chunk_size)
+    ]
+    retries = collections.Counter()
+    results = []
+    suspects = []
+
+    # a dead worker takes every game in flight down with it; retry them
+    # (one game per task) until each has been lost MAX_RETRIES times...
+    while pending:
+        result_list, lost = play_pool(
+            name, bot_spec, seed, pending, n_workers, max_steps, on_result)
+        results.extend(result_list)
+        if lost:
+            log.warning('a worker died; retrying {} game(s)'.format(
+                len(lost)))
+        pending = []
+        for index in lost:
+            retries[index] += 1
+            if retries[index] < MAX_RETRIES:
+                pending.append([index])
+            else:
+                suspects.append(index)
+
+    # ...then play each suspect alone, so the blame is certain
+    failed = []
+    for index in suspects:
+        result_list, lost = play_pool(
+            name, bot_spec, seed, [[index]], 1, max_steps, on_result)
+        results.extend(result_list)
+        if lost:
+            log.error('game {} crashes its worker'.format(index))
+            failed.append(index)
+    return results, failed
+
+
+def summarize(results):
+    """Return {stat: (mean, median, min, max)} over the finished games."""
+    summary = {}
+    finished = [r for r in results if 'error' not in r]
+    for key in STAT_KEYS:
+        value_list = [r[key] for r in finished]
+        if value_list:
+            summary[key] = (
+                statistics.mean(value_list), statistics.median(value_list),
+                min(value_list), max(value_list),
+            )
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m env.tournament',
+        description='Play many games with a bot across processes.')
+    parser.add_argument('env', choices=sorted(ENVS))
+    parser.add_argument('bot', help="module:attribute, or 'random'")
+    parser.add_argument('-n', '--games', type=int, default=100)
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help='worker processes (default: one per CPU)')
+    parser.add_argument('--chunk-size', type=int, default=None,
+                        help='games per task')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-steps', type=int, default=MAX_STEPS,
+                        help='steps before a game is cut off')
+    parser.add_argument('-o', '--output', default='tournament.jsonl',
+                        help='JSON-lines file of per-game stats')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    with open(args.output, 'w') as fh:
+        def write(result):
+            fh.write(json.dumps(result, sort_keys=True) + '\n')
+            fh.flush()  # keep what's done if we die too
+
+        results, failed = run(
+            args.env, args.bot, args.games, seed=args.seed,
+            n_workers=args.workers, chunk_size=args.chunk_size,
+            max_steps=args.max_steps, on_result=write,
+        )
+    elapsed = time.perf_counter() - start
+
+    n_errors = sum(1 for r in results if 'error' in r)
+    print('{} games of {} with {}: {} finished, {} raised, {} crashed'
+          ' ({:.1f} s, {:.1f} games/s)'.format(
+              args.games, args.env, args.bot, len(results) - n_errors,
+              n_errors, len(failed), elapsed, len(results) / elapsed))
+    print('{:<8} {:>12} {:>12} {:>12} {:>12}'.format(
+        'stat', 'mean', 'median', 'min', 'max'))
+    for key, values in summarize(results).items():
+        print('{:<8} {:>12.4g} {:>12.4g} {:>12.4g} {:>12.4g}'.format(
+            key, *values))
+    print('results in {}'.format(args.output))
+    return 1 if failed or n_errors else 0
+
+
+if __name__ == '__main__':
+    gamelog.config()
+    sys.exit(main())
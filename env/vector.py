@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""Step many copies of an environment in worker processes.
+
+Nothing is pickled per step: each worker's Env writes its observations
+straight into its row of a NumPy array in shared memory, and the actions,
+rewards and done flags are shared arrays too. A step sends each worker a
+one-byte command down a pipe; the workers signal that they're done on a
+shared semaphore.
+
+    with VectorEnv('snake', 32, seed=1) as envs:
+        observations = envs.reset()  # (32, CELL_HEIGHT, CELL_WIDTH)
+        while True:
+            actions = policy(observations)
+            observations, rewards, dones = envs.step(actions)
+
+The arrays returned are the shared ones (no copy): they change on the
+next step. A game that ends is reset right away, so its row then holds
+the first observation of the next game (with its done flag set).
+
+This module needs Python 3.8 or newer (multiprocessing.shared_memory);
+the rest of env doesn't import it.
+"""
+
+import logging
+import multiprocessing
+import traceback
+
+import numpy
+from env import make
+from gamelib import rng as gamerng
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # Python < 3.8
+    shared_memory = None
+
+log = logging.getLogger(__name__)
+
+TIMEOUT = 1.0  # seconds between checks that the workers are alive
+
+RESET = b'r'
+STEP = b's'
+CLOSE = b'c'
+
+
+class SharedArray():
+    """A NumPy array in a multiprocessing.shared_memory block."""
+
+    def __init__(self, shape, dtype, name=None):
+        """Create the block (or attach to it, if a name is given).
+
+        Raises:
+            RuntimeError: multiprocessing.shared_memory isn't available.
+        """
+        if shared_memory is None:
+            raise RuntimeError(
+                'env.vector needs Python 3.8 or newer '
+                '(for multiprocessing.shared_memory)')
+        self.shape = tuple(shape)
+        self.dtype = numpy.dtype(dtype)
+        if name is None:
+            size = max(1, int(numpy.prod(self.shape)) * self.dtype.itemsize)
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.array = numpy.ndarray(self.shape, self.dtype, self.shm.buf)
+
+    def __reduce__(self):
+        # attach by name in the other process
+        return (type(self), (self.shape, self.dtype.str, self.shm.name))
+
+    def close(self, unlink=False):
+        del self.array  # release the buffer before closing it
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+def _worker(index, name, kwargs, seed, arrays, conn, ready):
+    """Run one environment until told to close."""
+    obs, actions, rewards, dones, errors = arrays
+    rng = gamerng.RNG(seed).spawn('worker', index)
+    env = None
+    try:
+        env = make(name, observation=obs.array[index], **kwargs)
+        while True:
+            command = conn.recv_bytes()
+            if command == STEP:
+                _, reward, done, _ = env.step(int(actions.array[index]))
+                rewards.array[index] = reward
+                dones.array[index] = done
+                if done:
+                    env.reset(seed=rng.spawn().initial_seed)
+            elif command == RESET:
+                env.reset(seed=rng.spawn().initial_seed)
+                rewards.array[index] = 0
+                dones.array[index] = False
+            elif command == CLOSE:
+                break
+            ready.release()
+    except Exception:
+        errors.array[index] = True
+        conn.send_bytes(traceback.format_exc().encode('utf-8'))
+        ready.release()
+    finally:
+        env = None  # drop its view of the shared memory before closing
+        for array in arrays:
+            array.close()
+    return
+
+
+class VectorEnv():
+    """N copies of an environment, stepped together in worker processes."""
+
+    def __init__(self, name, n_envs, seed=None, context='spawn', **kwargs):
+        """Start the workers.
+
+        Arguments:
+            name: The environment (see env.ENVS).
+            n_envs: The number of copies (and worker processes).
+            seed: The seed that each worker's game seeds are spawned
+                from (see RNG.spawn); drawn from the OS if None.
+            context: The multiprocessing start method.
+            kwargs: Passed to the environment.
+        """
+        self.name = name
+        self.n_envs = n_envs
+        self.seed = gamerng.RNG(seed).initial_seed
+
+        probe = make(name, **kwargs)  # for the observation shape and actions
+        self.actions = probe.actions
+        shape = (n_envs, ) + tuple(probe.observation.shape)
+        self._obs = SharedArray(shape, probe.observation.dtype)
+        self._actions = SharedArray((n_envs, ), numpy.int64)
+        self._rewards = SharedArray((n_envs, ), numpy.float64)
+        self._dones = SharedArray((n_envs, ), numpy.bool_)
+        self._errors = SharedArray((n_envs, ), numpy.bool_)
+        self._arrays = (
+            self._obs, self._actions, self._rewards, self._dones,
+            self._errors,
+        )
+        self.observations = self._obs.array
+        self.rewards = self._rewards.array
+        self.dones = self._dones.array
+
+        ctx = multiprocessing.get_context(context)
+        self._ready = ctx.Semaphore(0)
+        self._conns = []
+        self._procs = []
+        for index in range(n_envs):
+            conn, child_conn = ctx.Pipe()
+            proc = ctx.Process(
+                target=_worker, name='{}-{}'.format(name, index), daemon=True,
+                args=(index, name, kwargs, self.seed, self._arrays,
+                      child_conn, self._ready),
+            )
+            proc.start()
+            child_conn.close()
+            self._conns.append(conn)
+            self._procs.append(proc)
+        self.closed = False
+
+    def __repr__(self):
+        return '<VectorEnv {} x {}>'.format(self.name, self.n_envs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _send(self, command):
+        for conn in self._conns:
+            conn.send_bytes(command)
+        self._wait()
+
+    def _wait(self):
+        """Wait for every worker to finish, and raise any error."""
+        for _ in range(self.n_envs):
+            while not self._ready.acquire(timeout=TIMEOUT):
+                dead = [p.name for p in self._procs if not p.is_alive()]
+                if dead:
+                    raise RuntimeError('Worker(s) died: {}'.format(
+                        ', '.join(dead)))
+        if self._errors.array.any():
+            index = int(numpy.flatnonzero(self._errors.array)[0])
+            message = self._conns[index].recv_bytes().decode('utf-8')
+            raise RuntimeError('Worker {} failed:\n{}'.format(index, message))
+        return
+
+    def reset(self):
+        """Start a new game in every environment.
+
+        Return:
+            The observations, (n_envs, ...observation shape).
+        """
+        self._send(RESET)
+        return self.observations
+
+    def step(self, actions):
+        """Play an action in every environment.
+
+        Arguments:
+            actions: n_envs action indices.
+        Return:
+            (observations, rewards, dones), all shared arrays.
+        """
+        self._actions.array[:] = actions
+        self._send(STEP)
+        return self.observations, self.rewards, self.dones
+
+    def close(self):
+        """Stop the workers and free the shared memory."""
+        if self.closed:
+            return
+        self.closed = True
+        for conn, proc in zip(self._conns, self._procs):
+            if proc.is_alive():
+                try:
+                    conn.send_bytes(CLOSE)
+                except OSError:
+                    pass
+        for proc in self._procs:
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.terminate()
+        for conn in self._conns:
+            conn.close()
+        self.observations = self.rewards = self.dones = None
+        for array in self._arrays:
+            array.close(unlink=True)
+        return
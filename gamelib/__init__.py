@@ -1,5 +1,70 @@
-from .constants import (DOWN, FILL, KEY_DOWN, KEY_LEFT, KEY_RIGHT, KEY_UP,
-                        LEFT, RIGHT, UP)
-from .display import Display
-from .gameboard import GameBoard
-from .gamebox import GameBox
+"""Shared pygame helpers for the chapter games.
+
+Names are resolved lazily (PEP 562): importing gamelib is cheap, and each
+submodule (along with pygame) is only imported the first time one of its
+names is accessed.
+"""
+
+import importlib
+
+_LAZY_NAMES = {
+    'DOWN': 'constants',
+    'FILL': 'constants',
+    'KEY_DOWN': 'constants',
+    'KEY_LEFT': 'constants',
+    'KEY_RIGHT': 'constants',
+    'KEY_UP': 'constants',
+    'LEFT': 'constants',
+    'RIGHT': 'constants',
+    'UP': 'constants',
+    'Display': 'display',
+    'GameBoard': 'gameboard',
+    'GameBox': 'gamebox',
+}
+
+_SUBMODULES = (
+    'animation',
+    'capture',
+    'colors',
+    'constants',
+    'display',
+    'fonts',
+    'gameboard',
+    'gamebox',
+    'gamebutton',
+    'games',
+    'icons',
+    'leaderboard',
+    'logging',
+    'palettegrid',
+    'profiler',
+    'replay',
+    'rng',
+    'sounds',
+    'sprites',
+    'streamlog',
+    'telemetry',
+    'tones',
+    'util',
+    'video',
+)
+
+__all__ = sorted(_LAZY_NAMES)
+
+
+def __getattr__(name):
+    """Import the submodule that defines `name` on first access."""
+    if name in _LAZY_NAMES:
+        module = importlib.import_module('.' + _LAZY_NAMES[name], __name__)
+        value = getattr(module, name)
+    elif name in _SUBMODULES:
+        value = importlib.import_module('.' + name, __name__)
+    else:
+        raise AttributeError(
+            'module {!r} has no attribute {!r}'.format(__name__, name))
+    globals()[name] = value  # cache; __getattr__ won't be called again
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_NAMES) | set(_SUBMODULES))
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""Non-blocking animations advanced by the game loop.
+
+Rather than looping over frames (and calling display.update) itself, an
+animation is added to a Scheduler and advanced in the update step of the
+main loop, so input keeps being handled and several animations can run
+at once:
+
+    display.animations.add(
+        animation.Tween(250, 0, 255, on_update=set_alpha))
+
+    while True:  # main game loop
+        ...handle events...
+        display.animations.update(display.dt)
+        ...draw...
+        display.update()
+
+Durations are in milliseconds. A headless Scheduler finishes every
+animation as soon as it is added.
+"""
+
+import logging
+import math
+
+log = logging.getLogger(__name__)
+
+
+#
+#  ######
+#  #       ######   ####  #  #    #   ####
+#  #       #       #      #  ##   #  #    #
+#  #####   #####    ####  #  # #  #  #
+#  #       #            # #  #  # #  #  ###
+#  #       #       #    # #  #   ##  #    #
+#  ######  ######   ####  #  #    #   ####
+
+def linear(t):
+    return t
+
+
+def ease_in(t):
+    return t * t
+
+
+def ease_out(t):
+    return t * (2 - t)
+
+
+def ease_in_out(t):
+    if t < 0.5:
+        return 2 * t * t
+    return -1 + (4 - 2 * t) * t
+
+
+#
+#     #
+#    # #   #    # # #    #   ##   ##### #  ####  #    #
+#   #   #  ##   # # ##  ##  #  #    #   # #    # ##   #
+#  #     # # #  # # # ## # #    #   #   # #    # # #  #
+#  ####### #  # # # #    # ######   #   # #    # #  # #
+#  #     # #   ## # #    # #    #   #   # #    # #   ##
+#  #     # #    # # #    # #    #   #   #  ####  #    #
+
+class Animation():
+    """Something that advances with time until it is done."""
+
+    def __init__(self, on_complete=None):
+        """Initialize.
+
+        Arguments:
+            on_complete: Called (without arguments) once done.
+        """
+        self.on_complete = on_complete
+        self.done = False
+
+    def update(self, dt):
+        """Advance by dt ms.
+
+        Return:
+            The part of dt left over after the animation finished; 0 if
+            it is still running.
+        """
+        raise NotImplementedError
+
+    def finish(self):
+        """Jump to the end, firing any callbacks on the way."""
+        if not self.done:
+            self.update(math.inf)
+        return
+
+    def _complete(self):
+        self.done = True
+        if self.on_complete:
+            self.on_complete()
+
+
+class Tween(Animation):
+    """Move a value from start to end over a duration."""
+
+    def __init__(self, duration, start=0, end=1, easing=linear,
+                 on_update=None, on_complete=None):
+        """Initialize.
+
+        Arguments:
+            duration: The length of the tween, in ms.
+            start, end: The values to tween between.
+            easing: Maps the fraction of time elapsed (0 to 1) to the
+                fraction of the way from start to end.
+            on_update: Called with the current value on every update.
+            on_complete: Called once done.
+        """
+        super().__init__(on_complete=on_complete)
+        self.duration = duration
+        self.start = start
+        self.end = end
+        self.easing = easing
+        self.on_update = on_update
+        self.elapsed = 0
+
+    @property
+    def value(self):
+        if self.elapsed >= self.duration:
+            return self.end
+        progress = self.easing(self.elapsed / self.duration)
+        return self.start + (self.end - self.start) * progress
+
+    def update(self, dt):
+        if self.done:
+            return dt
+        self.elapsed += dt
+        leftover = max(0, self.elapsed - self.duration)
+        self.elapsed = min(self.elapsed, self.duration)
+
+        if self.on_update:
+            self.on_update(self.value)
+        if self.elapsed >= self.duration:
+            self._complete()
+        return leftover
+
+
+class Wait(Tween):
+    """Do nothing for a while (e.g., between steps of a Sequence)."""
+
+    def __init__(self, duration, on_complete=None):
+        super().__init__(duration, on_complete=on_complete)
+
+
+class Call(Animation):
+    """Call a function, taking no time."""
+
+    def __init__(self, func, *args, on_complete=None):
+        super().__init__(on_complete=on_complete)
+        self.func = func
+        self.args = args
+
+    def update(self, dt):
+        if not self.done:
+            self.func(*self.args)
+            self._complete()
+        return dt
+
+
+class Sequence(Animation):
+    """Run animations one after the other."""
+
+    def __init__(self, *animations, on_complete=None):
+        super().__init__(on_complete=on_complete)
+        self.animations = list(animations)
+        self._index = 0
+
+    def update(self, dt):
+        if self.done:
+            return dt
+        while self._index < len(self.animations):
+            current = self.animations[self._index]
+            dt = current.update(dt)
+            if not current.done:
+                return 0
+            self._index += 1
+        self._complete()
+        return dt
+
+
+class Group(Animation):
+    """Run animations together; done when all of them are."""
+
+    def __init__(self, *animations, on_complete=None):
+        super().__init__(on_complete=on_complete)
+        self.animations = list(animations)
+
+    def update(self, dt):
+        if self.done:
+            return dt
+        leftover = dt
+        for animation in self.animations:
+            if not animation.done:
+                leftover = min(leftover, animation.update(dt))
+        if all(animation.done for animation in self.animations):
+            self._complete()
+            return leftover
+        return 0
+
+
+#
+#   #####
+#  #     #  ####  #    # ###### #####  #    # #      ###### #####
+#  #       #    # #    # #      #    # #    # #      #      #    #
+#   #####  #      ###### #####  #    # #    # #      #####  #    #
+#        # #      #    # #      #    # #    # #      #      #####
+#  #     # #    # #    # #      #    # #    # #      #      #   #
+#   #####   ####  #    # ###### #####   ####  ###### ###### #    #
+
+class Scheduler():
+    """Advance a set of concurrent animations."""
+
+    def __init__(self, headless=False):
+        """Initialize.
+
+        Arguments:
+            headless: If true, animations finish as soon as they're
+                added (nothing is shown, so there's no need to wait).
+        """
+        self.headless = headless
+        self.animations = []
+
+    def __len__(self):
+        return len(self.animations)
+
+    @property
+    def busy(self):
+        """True while any animation is running."""
+        return bool(self.animations)
+
+    def add(self, animation):
+        """Start an animation.
+
+        The animation is immediately updated by 0 ms so its first frame
+        is set up before the next draw.
+
+        Return:
+            The animation, e.g., to skip it later.
+        """
+        if self.headless:
+            animation.finish()
+            return animation
+        animation.update(0)
+        if not animation.done:
+            self.animations.append(animation)
+        return animation
+
+    def update(self, dt):
+        """Advance every running animation by dt ms."""
+        for animation in list(self.animations):
+            animation.update(dt)
+        # keep anything added by a callback during the update
+        self.animations = [a for a in self.animations if not a.done]
+        return
+
+    def skip(self, animation=None):
+        """Finish an animation (or all of them) right away."""
+        to_skip = [animation] if animation else list(self.animations)
+        for animation in to_skip:
+            animation.finish()
+        self.animations = [a for a in self.animations if not a.done]
+        return
+
+    def cancel(self, animation=None):
+        """Stop an animation (or all of them) without finishing it."""
+        if animation:
+            self.animations = [
+                a for a in self.animations if a is not animation]
+        else:
+            self.animations = []
+        return
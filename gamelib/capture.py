@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""Pixel observations from a Surface, as NumPy arrays.
+
+view() is a zero-copy view of a Surface's pixels. A Capture turns frames
+into observations, downscaled and (optionally) grayscale, and keeps the
+last few in a ring buffer, all in preallocated arrays:
+
+    capture = Capture(size=(84, 84), grayscale=True, n_stack=4)
+    capture.grab(env.render())  # or display.display, after drawing
+    observation = capture.get_stack()  # (4, 84, 84), oldest first
+
+Arrays are (height, width[, 3]), as images usually are; the Surface's
+own pixel arrays are (width, height, 3).
+"""
+
+import logging
+
+import numpy
+import pygame
+import pygame.surfarray
+
+log = logging.getLogger(__name__)
+
+# ITU-R 601 luma, in 1/256ths (they sum to 256)
+GRAY_WEIGHTS = (77, 150, 29)
+
+
+def view(surface):
+    """Return the Surface's pixels, (height, width, 3), without copying.
+
+    The Surface stays locked (it can't be blitted to the screen) until
+    the view is deleted.
+    """
+    return pygame.surfarray.pixels3d(surface).transpose(1, 0, 2)
+
+
+class Capture():
+    """Downscale, convert and stack frames into preallocated arrays."""
+
+    def __init__(self, size=None, grayscale=False, n_stack=1, smooth=False):
+        """Initialize.
+
+        Arguments:
+            size: The (width, height) of the observations; frames are
+                used at their own size if None (which must not change).
+            grayscale: If true, observations are (height, width) luma
+                rather than (height, width, 3) RGB.
+            n_stack: The number of frames kept (see get_stack).
+            smooth: If true, downscale with smoothscale (averaging)
+                rather than scale (nearest pixel), at several times the
+                cost.
+        """
+        self.size = tuple(size) if size else None
+        self.grayscale = grayscale
+        self.n_stack = n_stack
+        self.smooth = smooth
+
+        self.frames = None  # the ring buffer, (n_stack, height, width...)
+        self.stack = None  # the frames in order, for get_stack
+        self.index = -1  # of the latest frame in the ring
+        self.n_frames = 0
+        self._scaled = None  # the Surface frames are downscaled to
+        self._luma = None  # uint16 work arrays for grayscale
+        self._channel = None
+        if self.size:
+            self._allocate(self.size)
+
+    def _allocate(self, size):
+        width, height = size
+        shape = (height, width) if self.grayscale else (height, width, 3)
+        self.frames = numpy.zeros((self.n_stack, ) + shape, numpy.uint8)
+        self.stack = numpy.zeros_like(self.frames)
+        if self.grayscale:
+            self._luma = numpy.zeros((width, height), numpy.uint16)
+            self._channel = numpy.zeros_like(self._luma)
+        return
+
+    def _scale(self, surface):
+        """Return the frame at the capture size, reusing one Surface."""
+        if self.size is None or surface.get_size() == self.size:
+            return surface
+        scaled = self._scaled
+        if scaled is None or scaled.get_bitsize() != surface.get_bitsize():
+            scaled = self._scaled = pygame.Surface(self.size, 0, surface)
+        if self.smooth:
+            pygame.transform.smoothscale(surface, self.size, scaled)
+        else:
+            pygame.transform.scale(surface, self.size, scaled)
+        return scaled
+
+    def reset(self):
+        """Forget the frames (they are zeroed)."""
+        if self.frames is not None:
+            self.frames.fill(0)
+        self.index = -1
+        self.n_frames = 0
+        return
+
+    def grab(self, surface):
+        """Capture a frame.
+
+        Arguments:
+            surface: The Surface drawn on, e.g., Display.display.
+        Return:
+            The observation: its slot in the ring buffer (overwritten
+            n_stack frames later).
+        """
+        if self.frames is None:
+            self._allocate(surface.get_size())
+        self.index = (self.index + 1) % self.n_stack
+        self.n_frames += 1
+        out = self.frames[self.index]
+
+        pixels = pygame.surfarray.pixels3d(self._scale(surface))
+        if self.grayscale:
+            luma, channel = self._luma, self._channel
+            for i, weight in enumerate(GRAY_WEIGHTS):
+                numpy.multiply(pixels[..., i], weight, out=channel,
+                               dtype=numpy.uint16)
+                if i:
+                    luma += channel
+                else:
+                    luma[...] = channel
+            luma >>= 8
+            out[...] = luma.T
+        else:
+            out[...] = pixels.transpose(1, 0, 2)
+        del pixels  # unlock the Surface
+        return out
+
+    def get_stack(self):
+        """Return the last n_stack frames, oldest first.
+
+        Before n_stack frames have been grabbed, the first are zeros. The
+        array is reused by the next call.
+        """
+        start = self.index + 1
+        n_tail = self.n_stack - start
+        self.stack[:n_tail] = self.frames[start:]
+        self.stack[n_tail:] = self.frames[:start]
+        return self.stack
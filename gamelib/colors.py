@@ -29,7 +29,24 @@ color_dict = {
 }
 
 
-class colorblind_8():
+class _Palette(type):
+    """Create the lower case pygame.Color of a palette entry on first use.
+
+    The upper case attributes hold the plain RGB tuples; e.g., accessing
+    `colorblind_8.red` builds (and caches) pygame.Color(*colorblind_8.RED).
+    """
+
+    def __getattr__(cls, name):
+        rgb = cls.__dict__.get(name.upper()) if name.islower() else None
+        if rgb is None:
+            raise AttributeError(
+                'palette {!r} has no color {!r}'.format(cls.__name__, name))
+        color = pygame.Color(*rgb)
+        setattr(cls, name, color)
+        return color
+
+
+class colorblind_8(metaclass=_Palette):
     # eight
     DARK_PINK = (120, 28, 129)
     LIGHT_PINK = (221, 153, 187)
@@ -41,7 +58,7 @@ class colorblind_8():
     RED = (217, 33, 32)
 
 
-class colorblind_14():
+class colorblind_14(metaclass=_Palette):
     # 14 colors
     DARK_PINK = (136, 46, 114)
     PINK = (177, 120, 166)
@@ -64,29 +81,38 @@ class colorblind_14():
     RED = (220, 5, 12)
 
 
-def load_colors(load_dict):
-    """meh."""
-    for name, rgb in load_dict.items():
-        setattr(sys.modules[__name__], name.upper(), rgb)
-        setattr(sys.modules[__name__], name.lower(), pygame.Color(*rgb))
-        log.debug(pygame.Color(*rgb))
+colorblind = colorblind_8
+
 
-    colorblind_colors = colorblind_8.__dict__.copy()
-    for name, rgb in colorblind_colors.items():
-        if not name.startswith('__'):
-            setattr(colorblind_8, name.lower(), pygame.Color(*rgb))
+def load_colors(load_dict):
+    """Eagerly set the upper (RGB) and lower (pygame.Color) case colors.
 
-    colorblind_colors = colorblind_14.__dict__.copy()
-    for name, rgb in colorblind_colors.items():
-        if not name.startswith('__'):
-            setattr(colorblind_14, name.lower(), pygame.Color(*rgb))
+    Not required: colors are otherwise created on first access through
+    the module __getattr__ below.
+    """
+    module = sys.modules[__name__]
+    for name, rgb in load_dict.items():
+        setattr(module, name.upper(), rgb)
+        setattr(module, name.lower(), pygame.Color(*rgb))
+    log.debug('loaded {} colors'.format(len(load_dict)))
 
-    setattr(sys.modules[__name__], 'colorblind', colorblind_8)
+    for palette in (colorblind_8, colorblind_14):
+        for name in list(palette.__dict__):
+            if not name.startswith('__'):
+                getattr(palette, name.lower())
 
     return
 
 
-load_colors(color_dict)
+def __getattr__(name):
+    """Resolve a color from color_dict on first access and cache it."""
+    rgb = color_dict.get(name.lower())
+    if rgb is None or not (name.isupper() or name.islower()):
+        raise AttributeError(
+            'module {!r} has no attribute {!r}'.format(__name__, name))
+    value = rgb if name.isupper() else pygame.Color(*rgb)
+    globals()[name] = value
+    return value
 
 
 def alpha(color, alpha_value):
@@ -1,9 +1,12 @@
 #!/usr/bin/env python3
 """Define a Display object for interfacing with a pygame display."""
 
+import atexit
+import math
+import os
 
 import pygame
-from gamelib import colors, fonts
+from gamelib import animation, colors, fonts, profiler, replay
 
 # Standards
 FPS = 30
@@ -18,6 +21,11 @@ BG_COLOR_LIGHT = colors.gray
 FONT = fonts.open_sans
 FONT_SIZE = 20
 
+# profiling: GAMELIB_PROFILE=1 records frame timings, =hud also shows them;
+#   GAMELIB_TRACE=<path> writes them as a Chrome trace at exit
+PROFILE = os.environ.get('GAMELIB_PROFILE', '')
+TRACE_PATH = os.environ.get('GAMELIB_TRACE')
+
 
 class Display():
     """Store and handle data related to pygame.display."""
@@ -25,24 +33,49 @@ class Display():
     def __init__(
             self, fps=FPS, win_width=WIN_WIDTH, win_height=WIN_HEIGHT,
             bg_color=BG_COLOR, bg_color_light=BG_COLOR_LIGHT, caption='',
-            font=FONT, font_size=FONT_SIZE,
+            font=FONT, font_size=FONT_SIZE, headless=False,
+            profile=PROFILE, trace_path=TRACE_PATH,
     ):
-        """Initialize a pygame display."""
+        """Initialize a pygame display.
+
+        If headless, draw to an off-screen Surface instead of opening a
+        window; update() then neither flips nor waits, and animations
+        are fast-forwarded.
+
+        If profile is set, frame timings are recorded (see phase); if it
+        is 'hud', they are also drawn on screen. If trace_path is set,
+        the timings are written there as a Chrome trace at exit.
+        """
         self.fps = fps
         self.fps_clock = pygame.time.Clock()
+        self.dt = 0  # ms between the last two frames
+        self.ticks = 0  # ms of game time: the sum of dt
+        self.speed = 1  # frame rate multiplier (e.g., for replays)
+        self.exporter = None  # a video.VideoExporter each frame goes to
         self.width = win_width
         self.height = win_height
         self.size = (win_width, win_height)
-        self.display = pygame.display.set_mode(self.size)
+        self.headless = headless
 
         self.caption = caption
-        pygame.display.set_caption(self.caption)
+        if headless:
+            self.display = pygame.Surface(self.size)
+        else:
+            self.display = pygame.display.set_mode(self.size)
+            pygame.display.set_caption(self.caption)
 
         self.bg_color = bg_color
         self.bg_color_light = bg_color_light
 
         self.font = pygame.font.Font(font, font_size)
 
+        self.animations = animation.Scheduler(headless=headless)
+
+        self.profiler = profiler.FrameProfiler(
+            enabled=bool(profile or trace_path), hud=(profile == 'hud'))
+        if trace_path:
+            atexit.register(self.profiler.export_chrome_trace, trace_path)
+
         self.fill()  # fill display with the bg color
 
     def blit(self, *args, **kwargs):
@@ -55,13 +88,62 @@ class Display():
         self.display.fill(color)
 
     def tick(self):
-        """Tick away fps."""
-        self.fps_clock.tick(self.fps)
+        """Tick away fps (times speed; no waiting at all if infinite).
+
+        Return:
+            The ms since the last tick (also stored as self.dt). Headless
+            displays don't wait; every frame lasts exactly 1/fps. While a
+            replay is recorded or played back, it decides the frame time.
+        """
+        if self.headless:
+            self.dt = 1000 / self.fps
+        elif math.isinf(self.speed):
+            self.dt = self.fps_clock.tick()
+        else:
+            self.dt = self.fps_clock.tick(self.fps * self.speed)
+        self.dt = replay.end_frame(self.dt)
+        self.ticks += self.dt
+        return self.dt
+
+    def get_time(self):
+        """Return the game time in seconds (use in place of time.time)."""
+        return self.ticks / 1000
+
+    def phase(self, name):
+        """Time a phase of the frame ('event', 'update' or 'draw').
+
+        Return:
+            A context manager; a shared no-op one if not profiling.
+        """
+        return self.profiler.phase(name)
 
     def update(self):
-        """Update the screen."""
-        pygame.display.update()
-        self.tick()
+        """Update the screen.
+
+        This is the 'flip' phase, and ends the frame for the profiler.
+        The frame is also exported, if there's an exporter (except while
+        seeking through a replay).
+        """
+        with self.profiler.phase('flip'):
+            self.profiler.draw_hud(self.display)
+            if not self.headless:
+                pygame.display.update()
+            if self.exporter and not math.isinf(self.speed):
+                self.exporter.write(self.display)
+        self.profiler.end_frame()
+        return self.tick()
+
+
+def headless_display(**kwargs):
+    """Initialize pygame without a window and return a headless Display.
+
+    Arguments:
+        kwargs: Passed to Display.
+    """
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    pygame.init()
+    return Display(headless=True, **kwargs)
 
 
 # __END__
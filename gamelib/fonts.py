@@ -4,3 +4,6 @@ import os.path
 
 HOME = os.path.expanduser('~')
 open_sans = os.path.join(HOME, 'Library', 'Fonts', 'OpenSans-Regular.ttf')
+
+if not os.path.exists(open_sans):
+    open_sans = None  # pygame.font.Font(None, size) uses the default font
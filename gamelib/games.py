@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""Find and import the chapter games by name.
+
+    blocks = games.load_game('blocks')
+    board = blocks.TetrisBoard(display.headless_display())
+"""
+
+import importlib
+import logging
+import os.path
+import sys
+
+log = logging.getLogger(__name__)
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# game name --> (chapter directory, module)
+GAMES = {
+    'memory': ('ch3', 'memory'),
+    'slide': ('ch4', 'slide'),
+    'patterns': ('ch5', 'patterns'),
+    'elegans': ('ch6', 'elegans'),
+    'blocks': ('ch7', 'blocks'),
+}
+
+
+def load_game(name):
+    """Import a chapter's game module by game name (see GAMES).
+
+    The chapter directory is added to sys.path, as the games import their
+    neighbors (e.g., blocks imports pieces).
+    """
+    chapter, module = GAMES[name]
+    chapter_dir = os.path.join(ROOT_DIR, chapter)
+    if chapter_dir not in sys.path:
+        sys.path.insert(0, chapter_dir)
+    return importlib.import_module(module)
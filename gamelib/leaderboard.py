@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""Keep high scores in a local SQLite database.
+
+    leaderboard.submit('blocks', 120)
+    for score, player, when in leaderboard.top('blocks'):
+        ...
+
+submit only queues the score: a writer thread inserts what's queued in
+one transaction (so floods of bot scores are cheap), and the database is
+in WAL mode, so reads don't wait on it. top results are cached until a
+write to that game's scores; scores still in the queue are merged in, so
+a score shows up as soon as it is submitted (top waits out a batch being
+written, which may or may not be in what it reads).
+
+The database is at PATH: $GAMELIB_SCORES, or ~/.gamelib/scores.db if
+that isn't set (set it empty to keep no scores). The games don't submit
+scores played on a headless Display or replayed.
+
+    python -m gamelib.leaderboard blocks -n 20
+"""
+
+import argparse
+import atexit
+import getpass
+import heapq
+import logging
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+PATH = os.environ.get('GAMELIB_SCORES', os.path.join(
+    os.path.expanduser('~'), '.gamelib', 'scores.db'))
+TOP_N = 10
+BATCH_SIZE = 10000  # scores per transaction, at most
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    id INTEGER PRIMARY KEY,
+    game TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    player TEXT NOT NULL,
+    time REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scores_by_rank ON scores (game, score DESC, time);
+"""
+INSERT = 'INSERT INTO scores (game, score, player, time) VALUES (?, ?, ?, ?)'
+SELECT_TOP = """
+SELECT score, player, time FROM scores
+WHERE game = ? ORDER BY score DESC, time LIMIT ?
+"""
+
+active = None  # the Leaderboard, once opened
+
+
+def get_player():
+    try:
+        return getpass.getuser()
+    except Exception:  # no user name to be had
+        return 'player'
+
+
+class Leaderboard():
+    """High scores in SQLite, written by a background thread."""
+
+    def __init__(self, path=PATH):
+        """Start the writer thread, which opens (or creates) the database."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.player = get_player()
+        self.closed = False
+
+        self._queue = queue.Queue()  # unbounded: submit never waits
+        self._lock = threading.Lock()
+        self._pending = {}  # game: [rows submitted, not yet written]
+        self._cache = {}  # (game, n): rows
+        self._generation = 0  # bumped by every write; odd during one
+        self._idle = threading.Condition(self._lock)  # notified after one
+        self._local = threading.local()  # a read connection per thread
+        self._ready = threading.Event()  # set once the tables exist
+
+        self._thread = threading.Thread(
+            target=self._run, name='leaderboard', daemon=True)
+        self._thread.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')  # safe in WAL mode
+        return conn
+
+    def submit(self, game, score, player=None):
+        """Queue a score; it is written in the background."""
+        row = (game, int(score), player or self.player, time.time())
+        with self._lock:
+            self._pending.setdefault(game, []).append(row)
+        self._queue.put(row)
+        return
+
+    def top(self, game, n=TOP_N):
+        """Return the n best (score, player, time) for a game, best first.
+
+        Ties go to the earlier score.
+        """
+        self._ready.wait()
+        while True:
+            with self._lock:
+                while self._generation % 2:
+                    self._idle.wait()
+                generation = self._generation
+                row_list = self._cache.get((game, n))
+                pending = list(self._pending.get(game, ()))
+            if row_list is None:
+                conn = getattr(self._local, 'conn', None)
+                if conn is None:
+                    conn = self._local.conn = self._connect()
+                row_list = conn.execute(SELECT_TOP, (game, n)).fetchall()
+            with self._lock:
+                if generation != self._generation:
+                    continue  # a write landed meanwhile; pending is stale
+                self._cache[(game, n)] = row_list
+            break
+
+        if pending:
+            row_list = heapq.nsmallest(
+                n, row_list + [(score, player, t) for _, score, player, t
+                               in pending],
+                key=lambda row: (-row[0], row[2]),
+            )
+        return row_list
+
+    def _run(self):
+        """Write queued scores, a batch per transaction, until None."""
+        try:
+            conn = self._connect()
+            conn.executescript(SCHEMA)
+        finally:
+            self._ready.set()  # (top raises, if the tables aren't there)
+        done = False
+        while not done:
+            row_list = [self._queue.get()]
+            while len(row_list) < BATCH_SIZE:
+                try:
+                    row_list.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if row_list[-1] is None:
+                row_list.pop()
+                done = True
+            if not row_list:
+                continue
+            with self._lock:
+                self._generation += 1  # (see top)
+            try:
+                with conn:
+                    conn.executemany(INSERT, row_list)
+            except sqlite3.Error:
+                log.exception('saving {} score(s) failed'.format(
+                    len(row_list)))
+            finally:
+                self._written(row_list)
+        conn.close()
+
+    def _written(self, row_list):
+        """Drop written rows from pending, and their games' cached tops."""
+        n_written = {}
+        for row in row_list:
+            n_written[row[0]] = n_written.get(row[0], 0) + 1
+        with self._lock:
+            for game, n in n_written.items():
+                del self._pending[game][:n]  # rows are queued in order
+            self._cache = {
+                key: value for key, value in self._cache.items()
+                if key[0] not in n_written
+            }
+            self._generation += 1
+            self._idle.notify_all()
+        return
+
+    def flush(self):
+        """Wait until every submitted score is written."""
+        while True:
+            with self._lock:
+                if not any(self._pending.values()):
+                    return
+            time.sleep(0.01)
+
+    def close(self):
+        """Write what's queued, and stop the writer."""
+        if self.closed:
+            return
+        self.closed = True
+        self._queue.put(None)
+        self._thread.join()
+        return
+
+
+def open_leaderboard(path=None):
+    """Open the leaderboard (at PATH, by default) for submit and top."""
+    global active
+    close()
+    active = Leaderboard(path or PATH)
+    atexit.register(active.close)
+    return active
+
+
+def close():
+    global active
+    if active is not None:
+        active.close()
+        active = None
+    return
+
+
+def submit(game, score, player=None):
+    """Save a score (in the background); does nothing without PATH."""
+    if active is None:
+        if not PATH:
+            return
+        open_leaderboard()
+    active.submit(game, score, player=player)
+
+
+def top(game, n=TOP_N):
+    """Return the n best (score, player, time) for a game (see submit)."""
+    if active is None:
+        if not PATH:
+            return []
+        open_leaderboard()
+    return active.top(game, n=n)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m gamelib.leaderboard',
+        description='Show the high scores.')
+    parser.add_argument('game')
+    parser.add_argument('-n', type=int, default=TOP_N)
+    parser.add_argument('--path', default=PATH)
+    args = parser.parse_args(argv)
+
+    board = Leaderboard(args.path)
+    for rank, (score, player, when) in enumerate(
+            board.top(args.game, n=args.n), 1):
+        print('{:>3}. {:>8}  {:<16} {}'.format(
+            rank, score, player,
+            time.strftime('%Y-%m-%d %H:%M', time.localtime(when))))
+    board.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,9 +1,20 @@
+import atexit
+import copy
 import logging
 import logging.config
+import logging.handlers
+import os
+import queue
 import sys
 
 from gamelib import streamlog
 
+# GAMELIB_LOG_QUEUE=1 makes config() log through a background thread
+QUEUE = bool(os.environ.get('GAMELIB_LOG_QUEUE'))
+QUEUE_SIZE = 1000  # records waiting to be written before new ones drop
+
+_listener = None  # the QueueListener, in queue mode
+
 
 class DebugOnly(logging.Filter):
 
@@ -116,12 +127,120 @@ def _get_config_dict(log_level):
     return config_dict
 
 
-def config(log_level='DEBUG'):
-    """Setup custom logging options."""
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Queue records without ever blocking: drop them if it's full.
+
+    Only the message is merged (msg % args) on the logging thread; the
+    handlers on the listener's thread do the formatting and I/O. The
+    number of dropped records is kept in dropped, and reported by a
+    warning once there's room again.
+    """
+
+    def __init__(self, queue):
+        super().__init__(queue)
+        self.dropped = 0
+        self._reported = 0
+
+    def prepare(self, record):
+        # the record is only read by another thread (no pickling), so
+        # keep exc_info for the handlers to format
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            if self.dropped > self._reported:
+                self.queue.put_nowait(logging.makeLogRecord({
+                    'name': __name__, 'levelno': logging.WARNING,
+                    'levelname': 'WARNING', 'msg': 'dropped {} log records'
+                    ' (queue full)'.format(self.dropped - self._reported),
+                }))
+                self._reported = self.dropped
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+        return
+
+
+class DrainingQueueListener(logging.handlers.QueueListener):
+    """A QueueListener whose stop waits for room on a full queue."""
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+def config(log_level='DEBUG', queue=QUEUE, queue_size=QUEUE_SIZE):
+    """Setup custom logging options.
+
+    Arguments:
+        log_level: The root logger's level (a name or number).
+        queue: If true, the root logger only puts records on a bounded
+            queue (see DroppingQueueHandler); a QueueListener formats
+            and writes them on a background thread, so logging never
+            blocks the game loop.
+        queue_size: The bound on the queue.
+    Return:
+        None.
+    Raises:
+        None.
+    """
     if isinstance(log_level, str):
         log_level = getattr(logging, log_level)
+    stop_queue()
     config_dict = _get_config_dict(log_level)
     logging.config.dictConfig(config_dict)
+    if queue:
+        start_queue(queue_size)
+    return
+
+
+def start_queue(queue_size=QUEUE_SIZE, logger=None):
+    """Move the logger's handlers to a background thread.
+
+    Arguments:
+        queue_size: The most records waiting to be handled.
+        logger: The logging object. Defaults to the root logger.
+    Return:
+        The DroppingQueueHandler that replaces them.
+    Raises:
+        None.
+    """
+    global _listener
+    if not logger:
+        logger = logging.getLogger()  # default to root logger
+    stop_queue()
+    record_queue = queue.Queue(queue_size)
+    _listener = DrainingQueueListener(
+        record_queue, *logger.handlers, respect_handler_level=True)
+    handler = DroppingQueueHandler(record_queue)
+    logger.handlers = [handler]
+    _listener.start()
+    return handler
+
+
+def stop_queue():
+    """Handle the queued records and stop the background thread.
+
+    The listener's handlers are not put back; call config() again to
+    log on the calling thread.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()  # handles what's queued first
+        _listener = None
+    return
+
+
+atexit.register(stop_queue)  # runs before logging's own flush at exit
+
+
+def _get_handler_owner(logger):
+    """Return what holds the logger's real handlers: it or the listener."""
+    if _listener is not None and logger is logging.getLogger():
+        return _listener
+    return logger
 
 
 def log_to(_file, logger=None, debug=False, level=logging.INFO):
@@ -147,7 +266,11 @@ def log_to(_file, logger=None, debug=False, level=logging.INFO):
     if not logger:
         # add to root logger!
         logger = logging.getLogger()
-    logger.addHandler(handler)
+    owner = _get_handler_owner(logger)
+    if owner is _listener:
+        _listener.handlers += (handler, )  # written on its thread
+    else:
+        logger.addHandler(handler)
     return handler
 
 
@@ -163,10 +286,11 @@ def stop_file_loggers(self, logger=None):
     """
     if not logger:
         logger = logging.getLogger()  # default to root logger
-    logger.handlers = [
-        h for h in logger.handlers
+    owner = _get_handler_owner(logger)
+    owner.handlers = type(owner.handlers)(
+        h for h in owner.handlers
         if not isinstance(h, logging.FileHandler)
-    ]
+    )
     return
 
 
@@ -182,10 +306,11 @@ def remove_handler(handler, logger=None):
     """
     if not logger:
         logger = logging.getLogger()  # default to root logger
-    logger.handlers = [
-        h for h in logger.handlers
+    owner = _get_handler_owner(logger)
+    owner.handlers = type(owner.handlers)(
+        h for h in owner.handlers
         if not h == handler
-    ]
+    )
     return
 
 
@@ -204,6 +329,7 @@ def stderr_to_log():
     logger = logging.getLogger('STDERR')
     s2l = streamlog.StreamLogger(logger, logging.ERROR)
     sys.stderr = s2l
+    atexit.register(s2l.flush)  # the last lines (runs before stop_queue)
     return
 
 
@@ -211,6 +337,7 @@ def restore_stderr():
     """Revert stderr from logging."""
     global TMP_STDERR
     if TMP_STDERR is not None:
+        sys.stderr.flush()  # log what the StreamLogger holds
         sys.stderr = TMP_STDERR
         TMP_STDERR = None
     return
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Draw a board of cells from an array of color indices.
+
+A PaletteGrid keeps the board as one byte per cell (cells, indexed
+[y, x]). draw expands that to full size in an 8-bit palette Surface and
+blits it: a few NumPy and SDL passes over the pixels, however full the
+board is, instead of drawing call(s) per cell.
+
+    grid = PaletteGrid((10, 20), 20, [(BLACK,), (RED,), (BLUE,)])
+    grid.cells[19, 4] = 1
+    grid.draw(display.display, (100, 40))
+
+Cells can have details (grid lines, a bevel...): the pattern gives each
+pixel of a cell a shade, and the palette a color per value and shade.
+Expanding the cells adds the pattern in the same pass, so details cost
+nothing extra. (pygame.transform.scale, the obvious way to expand them,
+takes longer than the whole draw here.)
+"""
+
+import logging
+
+import numpy
+import pygame
+
+log = logging.getLogger(__name__)
+
+
+class PaletteGrid():
+    """A board of cells, each a palette color (and pattern)."""
+
+    def __init__(self, grid_size, cell_size, palette, pattern=None):
+        """Initialize an empty (all 0) board.
+
+        Arguments:
+            grid_size: The (columns, rows) of cells.
+            cell_size: The width (and height) of a cell, in pixels.
+            palette: The colors for each cell value: a sequence of one
+                color per shade (see pattern). Values with fewer colors
+                than shades use their first for the rest.
+            pattern: A (cell_size, cell_size) array (rows, columns) of
+                the shade of each pixel of a cell; all 0 if None.
+        Raises:
+            ValueError: The palette doesn't fit in 256 colors.
+        """
+        self.n_cols, self.n_rows = grid_size
+        self.cell_size = cell_size
+        self.size = (self.n_cols * cell_size, self.n_rows * cell_size)
+
+        if pattern is None:
+            pattern = numpy.zeros((cell_size, cell_size), numpy.uint8)
+        self.pattern = numpy.asarray(pattern, numpy.uint8)
+        n_shades = max(int(self.pattern.max()) + 1,
+                       max(len(shades) for shades in palette))
+        self.shift = (n_shades - 1).bit_length()  # value << shift | shade
+        if len(palette) << self.shift > 256:
+            raise ValueError('{} values of {} shades need more than 256 '
+                             'colors'.format(len(palette), n_shades))
+
+        self.cells = numpy.zeros((self.n_rows, self.n_cols), numpy.uint8)
+        self._shifted = numpy.zeros_like(self.cells)
+
+        # the Surface's pixels, and the same viewed as [row, y, col, x]
+        self._pixels = numpy.zeros(self.size[::-1], numpy.uint8)
+        self._blocks = self._pixels.reshape(
+            self.n_rows, cell_size, self.n_cols, cell_size)
+        self.surface = pygame.image.frombuffer(self._pixels, self.size, 'P')
+        self.set_palette(palette)
+
+    def set_palette(self, palette):
+        """Set the colors (see __init__)."""
+        stride = 1 << self.shift
+        color_list = [(0, 0, 0)] * 256
+        for value, shades in enumerate(palette):
+            for shade in range(stride):
+                color = shades[shade] if shade < len(shades) else shades[0]
+                color_list[value * stride + shade] = color
+        self.surface.set_palette(color_list)
+        return
+
+    def clear(self, value=0):
+        """Set every cell to value."""
+        self.cells.fill(value)
+        return
+
+    def render(self):
+        """Draw the cells on self.surface."""
+        numpy.left_shift(self.cells, self.shift, out=self._shifted)
+        numpy.bitwise_or(
+            self._shifted[:, None, :, None], self.pattern[None, :, None, :],
+            out=self._blocks)
+        return self.surface
+
+    def draw(self, target, topleft=(0, 0)):
+        """Draw the board on a Surface.
+
+        Return:
+            The Rect drawn to.
+        """
+        return target.blit(self.render(), topleft)
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""Record where frame time goes.
+
+Each frame is split into phases, marked by the game loop:
+
+    with display.phase('event'):
+        ...handle events...
+    with display.phase('update'):
+        ...
+    with display.phase('draw'):
+        ...
+    display.update()  # times the 'flip' phase and ends the frame
+
+The last FRAME_HISTORY frames are kept in fixed-size ring buffers, from
+which rolling percentiles are computed. They can also be drawn as an
+on-screen HUD or exported as a Chrome trace (chrome://tracing).
+
+When disabled, phase() hands back a shared no-op context manager, so the
+markers can stay in the game loops.
+"""
+
+import array
+import json
+import logging
+import os
+import time
+
+import pygame
+
+log = logging.getLogger(__name__)
+
+PHASES = ('event', 'update', 'draw', 'flip')
+FRAME_HISTORY = 300
+PERCENTILES = (50, 95, 99)
+
+HUD_COLOR = (255, 255, 0)
+HUD_BG_COLOR = (0, 0, 0)
+HUD_FONT_SIZE = 16
+HUD_REFRESH = 0.5  # seconds between HUD text updates
+
+
+class _NullPhase():
+    """A do-nothing context manager, for when profiling is off."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class _Phase():
+    """Time one phase of the current frame."""
+
+    def __init__(self, profiler, index):
+        self.profiler = profiler
+        self.index = index
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        end = time.perf_counter()
+        self.profiler.record(self.index, self.start, end)
+        return False
+
+
+class FrameProfiler():
+    """Keep per-phase frame timings in fixed-size ring buffers."""
+
+    def __init__(self, enabled=False, hud=False, phases=PHASES,
+                 n_frames=FRAME_HISTORY):
+        """Initialize.
+
+        Arguments:
+            enabled: If false, nothing is recorded.
+            hud: If true (and enabled), draw_hud() shows the percentiles.
+            phases: The names of the phases of a frame.
+            n_frames: The number of frames kept.
+        """
+        self.enabled = enabled
+        self.hud = hud
+        self.phases = tuple(phases)
+        self.n_frames = n_frames
+
+        n_phases = len(self.phases)
+        self._phase_list = [_Phase(self, i) for i in range(n_phases)]
+        self._phase_dict = dict(zip(self.phases, self._phase_list))
+
+        # one slot per phase per frame (in seconds), plus the frame total
+        self._durations = array.array('d', [0.0] * (n_frames * n_phases))
+        self._totals = array.array('d', [0.0] * n_frames)
+        self._starts = array.array('d', [0.0] * (n_frames * n_phases))
+        self._current = [0.0] * n_phases
+        self._current_starts = [0.0] * n_phases
+        self._index = 0
+        self.n_recorded = 0
+
+        self._hud_surface = None
+        self._hud_time = 0
+        self._hud_font = None
+
+    def phase(self, name):
+        """Return a context manager that times the named phase."""
+        if not self.enabled:
+            return _NULL_PHASE
+        return self._phase_dict[name]
+
+    def record(self, index, start, end):
+        """Add time to a phase of the current frame."""
+        if not self._current[index]:
+            self._current_starts[index] = start
+        self._current[index] += end - start
+
+    def end_frame(self):
+        """Store the current frame in the ring buffers."""
+        if not self.enabled:
+            return
+        n_phases = len(self.phases)
+        offset = self._index * n_phases
+        total = 0.0
+        for i in range(n_phases):
+            self._durations[offset + i] = self._current[i]
+            self._starts[offset + i] = self._current_starts[i]
+            total += self._current[i]
+            self._current[i] = 0.0
+        self._totals[self._index] = total
+        self._index = (self._index + 1) % self.n_frames
+        self.n_recorded += 1
+
+    def _ordered_frames(self):
+        """Yield the buffer indexes of the stored frames, oldest first."""
+        n_stored = min(self.n_recorded, self.n_frames)
+        first = (self._index - n_stored) % self.n_frames
+        for i in range(n_stored):
+            yield (first + i) % self.n_frames
+
+    def samples(self, name=None):
+        """Return the stored timings of a phase (or frame totals), in ms."""
+        if name is None:
+            return [self._totals[i] * 1000 for i in self._ordered_frames()]
+        p = self.phases.index(name)
+        n_phases = len(self.phases)
+        return [
+            self._durations[i * n_phases + p] * 1000
+            for i in self._ordered_frames()
+        ]
+
+    def percentiles(self, name=None, percentiles=PERCENTILES):
+        """Return {percentile: ms} for a phase (or the frame total).
+
+        Uses the nearest-rank method over the stored frames.
+        """
+        values = sorted(self.samples(name))
+        if not values:
+            return {p: 0.0 for p in percentiles}
+        last = len(values) - 1
+        return {
+            p: values[min(last, int(round(p / 100 * last)))]
+            for p in percentiles
+        }
+
+    def summary(self):
+        """Return {phase: {percentile: ms}}, with the total as 'frame'."""
+        summary = {name: self.percentiles(name) for name in self.phases}
+        summary['frame'] = self.percentiles()
+        return summary
+
+    def draw_hud(self, surface, coord=(5, 5)):
+        """Draw the percentiles in the corner of the surface.
+
+        The text is re-rendered every HUD_REFRESH seconds, so drawing the
+        HUD costs a single blit on most frames.
+        """
+        if not (self.enabled and self.hud):
+            return
+        now = time.perf_counter()
+        if self._hud_surface is None or now - self._hud_time > HUD_REFRESH:
+            self._hud_surface = self._render_hud()
+            self._hud_time = now
+        surface.blit(self._hud_surface, coord)
+        return
+
+    def _render_hud(self):
+        if self._hud_font is None:
+            self._hud_font = pygame.font.Font(None, HUD_FONT_SIZE)
+        font = self._hud_font
+
+        line_list = ['{:<7}'.format('ms') + ''.join(
+            '{:>7}'.format('p{}'.format(p)) for p in PERCENTILES)]
+        for name, values in sorted(self.summary().items()):
+            line_list.append('{:<7}'.format(name) + ''.join(
+                '{:>7.2f}'.format(values[p]) for p in PERCENTILES))
+
+        surf_list = [
+            font.render(line, False, HUD_COLOR, HUD_BG_COLOR)
+            for line in line_list
+        ]
+        width = max(surf.get_width() for surf in surf_list)
+        height = sum(surf.get_height() for surf in surf_list)
+        hud = pygame.Surface((width, height))
+        hud.fill(HUD_BG_COLOR)
+        y = 0
+        for surf in surf_list:
+            hud.blit(surf, (0, y))
+            y += surf.get_height()
+        return hud
+
+    def chrome_trace(self):
+        """Return the stored frames as a Chrome trace event dict."""
+        pid = os.getpid()
+        n_phases = len(self.phases)
+        event_list = []
+        for i in self._ordered_frames():
+            for p, name in enumerate(self.phases):
+                duration = self._durations[i * n_phases + p]
+                if not duration:
+                    continue
+                event_list.append({
+                    'name': name,
+                    'cat': 'frame',
+                    'ph': 'X',
+                    'ts': self._starts[i * n_phases + p] * 1e6,
+                    'dur': duration * 1e6,
+                    'pid': pid,
+                    'tid': 0,
+                })
+        return {'traceEvents': event_list, 'displayTimeUnit': 'ms'}
+
+    def export_chrome_trace(self, path):
+        """Write the stored frames to a Chrome trace JSON file."""
+        with open(path, 'w') as fh:
+            json.dump(self.chrome_trace(), fh)
+        log.info('wrote {} frames to {}'.format(
+            min(self.n_recorded, self.n_frames), path))
+        return
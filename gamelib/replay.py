@@ -0,0 +1,547 @@
+#!/usr/bin/env python3
+"""Record a game's input and play it back.
+
+A game reads its input through get_events (in place of pygame.event.get)
+and its time from Display.get_time (in place of time.time). A Recorder
+then logs, per frame, the events each get_events call returned and the
+frame time; a Player feeds them back, so the game replays exactly
+(given the same RNG seed, which is stored too).
+
+    parser = argparse.ArgumentParser()
+    replay.add_arguments(parser)
+    args = parser.parse_args()
+    display = Display(headless=args.headless)
+    rng = replay.start(display, args, game='blocks')
+
+    while True:  # main game loop
+        replay.sync(get_state, set_state)
+        for event in replay.get_events():
+            ...
+
+sync records a keyframe of the game state every KEYFRAME_INTERVAL
+frames, so playback can seek (--seek) without replaying from the start.
+
+Headless playback runs as fast as possible and quits at the end of the
+log; on screen, it runs at --speed times the recorded speed and then
+hands over to live input.
+
+File format: MAGIC, then varints (LEB128; zigzag where signed) and
+length-prefixed strings:
+
+    header: version, game, seed, fps
+    records:
+        FRAMES count dt_us  count frames ended, each lasting dt_us
+        EVENTS call n ...    the n events returned by the call-th
+                             get_events call of the current frame
+        KEYFRAME n bytes     a pickled snapshot, taken at the start of
+                             the current frame
+"""
+
+import array
+import atexit
+import logging
+import math
+import pickle
+import sys
+
+import pygame
+from gamelib import rng as gamerng
+from gamelib import video
+from pygame.locals import (KEYDOWN, KEYUP, MOUSEBUTTONDOWN, MOUSEBUTTONUP,
+                           MOUSEMOTION, QUIT)
+
+log = logging.getLogger(__name__)
+
+MAGIC = b'GLRP'
+VERSION = 1
+
+KEYFRAME_INTERVAL = 300  # frames
+BUFFER_SIZE = 4096  # bytes buffered before writing
+
+# record tags
+FRAMES = 0
+EVENTS = 1
+KEYFRAME = 2
+
+# recorded event types --> compact codes (and back)
+EVENT_CODES = {
+    QUIT: 0,
+    KEYDOWN: 1,
+    KEYUP: 2,
+    MOUSEMOTION: 3,
+    MOUSEBUTTONDOWN: 4,
+    MOUSEBUTTONUP: 5,
+}
+EVENT_TYPES = {code: event_type for event_type, code in EVENT_CODES.items()}
+
+active = None  # the Recorder or Player in use, if any
+
+
+#
+#  #######
+#  #        ####  #####  #    #   ##   #####
+#  #       #    # #    # ##  ##  #  #    #
+#  #####   #    # #    # # ## # #    #   #
+#  #       #    # #####  #    # ######   #
+#  #       #    # #   #  #    # #    #   #
+#  #        ####  #    # #    # #    #   #
+
+def write_varint(buffer, n):
+    """Append a non-negative int to a bytearray as a LEB128 varint."""
+    while n > 0x7f:
+        buffer.append((n & 0x7f) | 0x80)
+        n >>= 7
+    buffer.append(n)
+
+
+def read_varint(data, pos):
+    """Read a varint from bytes.
+
+    Return:
+        (value, position after the varint)
+    """
+    n = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        n |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return n, pos
+        shift += 7
+
+
+def zigzag(n):
+    """Map a signed int to an unsigned one (0, -1, 1, -2 --> 0, 1, 2, 3)."""
+    return n * 2 if n >= 0 else -n * 2 - 1
+
+
+def unzigzag(n):
+    return n // 2 if n % 2 == 0 else -(n + 1) // 2
+
+
+def write_bytes(buffer, data):
+    write_varint(buffer, len(data))
+    buffer.extend(data)
+
+
+def read_bytes(data, pos):
+    n, pos = read_varint(data, pos)
+    return data[pos:pos + n], pos + n
+
+
+def write_event(buffer, event):
+    write_varint(buffer, EVENT_CODES[event.type])
+    if event.type in (KEYDOWN, KEYUP):
+        write_varint(buffer, event.key)
+        write_varint(buffer, event.mod)
+    elif event.type in (MOUSEMOTION, MOUSEBUTTONDOWN, MOUSEBUTTONUP):
+        write_varint(buffer, zigzag(event.pos[0]))
+        write_varint(buffer, zigzag(event.pos[1]))
+        if event.type == MOUSEMOTION:
+            buttons = sum(1 << i for i, b in enumerate(event.buttons) if b)
+            write_varint(buffer, buttons)
+        else:
+            write_varint(buffer, event.button)
+
+
+def read_event(data, pos):
+    """Read an event.
+
+    Return:
+        (pygame.event.Event, position after the event)
+    """
+    code, pos = read_varint(data, pos)
+    event_type = EVENT_TYPES[code]
+    if event_type in (KEYDOWN, KEYUP):
+        key, pos = read_varint(data, pos)
+        mod, pos = read_varint(data, pos)
+        event = pygame.event.Event(
+            event_type, key=key, mod=mod, unicode='', scancode=0)
+    elif event_type in (MOUSEMOTION, MOUSEBUTTONDOWN, MOUSEBUTTONUP):
+        x, pos = read_varint(data, pos)
+        y, pos = read_varint(data, pos)
+        value, pos = read_varint(data, pos)
+        coord = (unzigzag(x), unzigzag(y))
+        if event_type == MOUSEMOTION:
+            buttons = tuple(bool(value & (1 << i)) for i in range(3))
+            event = pygame.event.Event(
+                event_type, pos=coord, rel=(0, 0), buttons=buttons)
+        else:
+            event = pygame.event.Event(event_type, pos=coord, button=value)
+    else:
+        event = pygame.event.Event(event_type)
+    return event, pos
+
+
+def parse_seed(text):
+    """Seeds are stored as text; ints are restored as ints."""
+    return int(text) if text.lstrip('-').isdigit() else text
+
+
+#
+#  ######
+#  #     # ######  ####   ####  #####  #####  ###### #####
+#  #     # #      #    # #    # #    # #    # #      #    #
+#  ######  #####  #      #    # #    # #    # #####  #    #
+#  #   #   #      #      #    # #####  #    # #      #####
+#  #    #  #      #    # #    # #   #  #    # #      #   #
+#  #     # ###### #    #  ####  #    # #####  ###### #    #
+
+class Recorder():
+    """Log the input and frame times of a game to a file."""
+
+    def __init__(self, display, path, seed, game='',
+                 keyframe_interval=KEYFRAME_INTERVAL):
+        """Open the file and write the header.
+
+        Arguments:
+            display: The gamelib Display the game runs on.
+            path: The file to write.
+            seed: The seed of the game's RNG.
+            game: The name of the game, checked on playback.
+            keyframe_interval: Frames between state keyframes.
+        """
+        self.display = display
+        self.path = path
+        self.keyframe_interval = keyframe_interval
+
+        self.frame = 0
+        self.call = 0  # get_events calls so far this frame
+        self.next_keyframe = 0
+        self._run_count = 0  # frames ended since the last record...
+        self._run_dt = None  # ...all lasting this many us
+
+        self.buffer = bytearray(MAGIC)
+        write_varint(self.buffer, VERSION)
+        write_bytes(self.buffer, game.encode('utf-8'))
+        write_bytes(self.buffer, str(seed).encode('utf-8'))
+        write_varint(self.buffer, int(display.fps))
+
+        self.fh = open(path, 'wb')
+        atexit.register(self.close)  # games exit through sys.exit()
+        log.info('recording to {} (seed {})'.format(path, seed))
+
+    def get_events(self, eventtype=None):
+        if eventtype is None:
+            event_list = pygame.event.get()
+        else:
+            event_list = pygame.event.get(eventtype)
+
+        recorded = [e for e in event_list if e.type in EVENT_CODES]
+        if recorded:
+            self._flush_run()
+            write_varint(self.buffer, EVENTS)
+            write_varint(self.buffer, self.call)
+            write_varint(self.buffer, len(recorded))
+            for event in recorded:
+                write_event(self.buffer, event)
+        self.call += 1
+        return recorded
+
+    def post_event(self, event):
+        pygame.event.post(event)
+
+    def end_frame(self, dt):
+        """Log the length of the frame.
+
+        Return:
+            dt, rounded to what is stored (whole microseconds), so the
+            game sees the same times when played back.
+        """
+        dt_us = int(round(dt * 1000))
+        if self._run_count and dt_us == self._run_dt:
+            self._run_count += 1
+        else:
+            self._flush_run()
+            self._run_count, self._run_dt = 1, dt_us
+        self.frame += 1
+        self.call = 0
+        return dt_us / 1000
+
+    def sync(self, get_state, set_state):
+        """Write a keyframe, if one is due."""
+        if self.frame < self.next_keyframe:
+            return
+        snapshot = {
+            'ticks': self.display.ticks,
+            'call': self.call,
+            'state': get_state(),
+        }
+        self._flush_run()
+        write_varint(self.buffer, KEYFRAME)
+        write_bytes(self.buffer, pickle.dumps(snapshot, protocol=4))
+        self.next_keyframe = self.frame + self.keyframe_interval
+        return
+
+    def _flush_run(self):
+        if self._run_count:
+            write_varint(self.buffer, FRAMES)
+            write_varint(self.buffer, self._run_count)
+            write_varint(self.buffer, self._run_dt)
+            self._run_count = 0
+        if len(self.buffer) >= BUFFER_SIZE:
+            self.fh.write(self.buffer)
+            self.buffer = bytearray()
+
+    def close(self):
+        if self.fh.closed:
+            return
+        self._flush_run()
+        self.fh.write(self.buffer)
+        self.buffer = bytearray()
+        self.fh.close()
+        log.info('recorded {} frames to {}'.format(self.frame, self.path))
+
+
+#
+#  ######
+#  #     # #        ##   #   # ###### #####
+#  #     # #       #  #   # #  #      #    #
+#  ######  #      #    #   #   #####  #    #
+#  #       #      ######   #   #      #####
+#  #       #      #    #   #   #      #   #
+#  #       ###### #    #   #   ###### #    #
+
+class Player():
+    """Feed a recorded log back to a game."""
+
+    def __init__(self, display, path, game='', speed=1, seek=None):
+        """Load a recording.
+
+        Arguments:
+            display: The gamelib Display the game runs on. If headless,
+                playback runs as fast as possible.
+            path: The file to play.
+            game: If given, the name the file must have been recorded
+                with.
+            speed: The playback speed (on screen), e.g., 4 for 4x.
+            seek: A frame to skip ahead to, restoring the latest keyframe
+                before it and fast-forwarding from there.
+        Raises:
+            ValueError if the file isn't a replay (of the given game).
+        """
+        self.display = display
+        self.speed = speed
+        self.seek = seek
+        self.live = False  # past the end of the log, on screen
+
+        with open(path, 'rb') as fh:
+            data = fh.read()
+        self.load(data)
+        if game and self.game != game:
+            raise ValueError('{} is a replay of {!r}, not {!r}'.format(
+                path, self.game, game))
+
+        self.frame = 0
+        self.call = 0
+        display.speed = math.inf if seek else speed
+        log.info('playing {} ({} frames, seed {})'.format(
+            path, self.n_frames, self.seed))
+
+    def load(self, data):
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError('Not a replay file')
+        pos = len(MAGIC)
+        version, pos = read_varint(data, pos)
+        if version != VERSION:
+            raise ValueError('Unsupported replay version: {}'.format(version))
+        game, pos = read_bytes(data, pos)
+        seed, pos = read_bytes(data, pos)
+        self.fps, pos = read_varint(data, pos)
+        self.game = game.decode('utf-8')
+        self.seed = parse_seed(seed.decode('utf-8'))
+
+        self.dt_list = array.array('d')  # ms, per frame
+        self.groups = {}  # {frame: {call: [event, ...]}}
+        self.keyframes = []  # [(frame, pickled snapshot), ...]
+        frame = 0
+        while pos < len(data):
+            tag, pos = read_varint(data, pos)
+            if tag == FRAMES:
+                count, pos = read_varint(data, pos)
+                dt_us, pos = read_varint(data, pos)
+                self.dt_list.extend([dt_us / 1000] * count)
+                frame += count
+            elif tag == EVENTS:
+                call, pos = read_varint(data, pos)
+                n, pos = read_varint(data, pos)
+                event_list = []
+                for _ in range(n):
+                    event, pos = read_event(data, pos)
+                    event_list.append(event)
+                self.groups.setdefault(frame, {})[call] = event_list
+            elif tag == KEYFRAME:
+                blob, pos = read_bytes(data, pos)
+                self.keyframes.append((frame, blob))
+            else:
+                raise ValueError('Corrupt replay: unknown tag {}'.format(tag))
+        self.n_frames = frame
+        self.last_call = max(self.groups.get(frame, {-1: None}))
+        return
+
+    @property
+    def finished(self):
+        return self.frame >= self.n_frames and self.call > self.last_call
+
+    def get_events(self, eventtype=None):
+        if self.live:
+            if eventtype is None:
+                return pygame.event.get()
+            return pygame.event.get(eventtype)
+
+        # drain the real queue; only closing the window is honored
+        for event in pygame.event.get():
+            if event.type == QUIT:
+                pygame.quit()
+                sys.exit()
+
+        if self.finished:
+            if self.display.headless:
+                return [pygame.event.Event(QUIT)]
+            log.info('replay finished at frame {}'.format(self.frame))
+            self.live = True
+            self.display.speed = 1
+            return []
+
+        event_list = self.groups.get(self.frame, {}).get(self.call, [])
+        self.call += 1
+        if eventtype is not None:
+            types = {eventtype} if isinstance(eventtype, int) \
+                else set(eventtype)
+            if any(event.type not in types for event in event_list):
+                log.warning('replay out of sync at frame {}'.format(
+                    self.frame))
+        return list(event_list)
+
+    def post_event(self, event):
+        pass  # the log has the events as they were read back
+
+    def end_frame(self, dt):
+        """Return the recorded length of the frame."""
+        if self.frame < self.n_frames:
+            dt = self.dt_list[self.frame]
+        self.frame += 1
+        self.call = 0
+        if self.seek is not None and self.frame >= self.seek:
+            log.info('reached frame {}'.format(self.frame))
+            self.seek = None
+            self.display.speed = self.speed
+        return dt
+
+    def sync(self, get_state, set_state):
+        """When seeking, jump to the latest keyframe before the target."""
+        if self.seek is None:
+            return
+        frame, blob = None, None
+        for kf_frame, kf_blob in self.keyframes:
+            if self.frame < kf_frame <= self.seek:
+                frame, blob = kf_frame, kf_blob
+        if blob is None:
+            return
+
+        snapshot = pickle.loads(blob)
+        self.display.animations.skip()
+        set_state(snapshot['state'])
+        self.display.ticks = snapshot['ticks']
+        self.frame = frame
+        self.call = snapshot['call']
+        log.info('restored the keyframe at frame {}'.format(frame))
+        return
+
+
+#
+#  #     #
+#  #     #  ####  ######
+#  #     # #      #
+#  #     #  ####  #####
+#  #     #      # #
+#  #     # #    # #
+#   #####   ####  ######
+
+def get_events(eventtype=None):
+    """Return pygame.event.get(eventtype), as recorded or played back."""
+    if active:
+        return active.get_events(eventtype)
+    if eventtype is None:
+        return pygame.event.get()
+    return pygame.event.get(eventtype)
+
+
+def post_event(event):
+    """Put an event back in the queue (pygame.event.post)."""
+    if active:
+        return active.post_event(event)
+    pygame.event.post(event)
+
+
+def end_frame(dt):
+    """Log (or replace) the length of the frame; see Display.tick."""
+    if active:
+        return active.end_frame(dt)
+    return dt
+
+
+def is_playing():
+    """Return True while a recorded session is played back."""
+    return isinstance(active, Player)
+
+
+def sync(get_state, set_state):
+    """Call at the top of the main loop to take (or restore) keyframes.
+
+    Arguments:
+        get_state: Returns the game state, as something picklable.
+        set_state: Restores the game to a state from get_state.
+    """
+    if active:
+        active.sync(get_state, set_state)
+
+
+def add_arguments(parser):
+    """Add --record, --replay, --speed, --seek, --headless and --export."""
+    group = parser.add_argument_group('replay')
+    group.add_argument('--record', metavar='PATH',
+                       help='record the session to this file')
+    group.add_argument('--replay', metavar='PATH',
+                       help='play back a recorded session')
+    group.add_argument('--speed', type=float, default=1.0,
+                       help='playback speed multiplier (default: 1)')
+    group.add_argument('--seek', type=int, metavar='FRAME',
+                       help='start playback at this frame')
+    group.add_argument('--headless', action='store_true',
+                       help='run without a window (as fast as possible)')
+    group.add_argument('--export', metavar='PATH',
+                       help='export the frames as video (see gamelib.video)')
+    return group
+
+
+def start(display, args, rng=None, game=''):
+    """Start recording or playing back, as asked for on the command line.
+
+    Arguments:
+        display: The gamelib Display the game runs on.
+        args: Parsed arguments (see add_arguments).
+        rng: The RNG the game would use; see gamelib.rng.get_rng.
+        game: The name of the game, stored in (and checked against)
+            the file.
+    Return:
+        The RNG for the game to use: seeded from the file on playback.
+    """
+    global active
+    if args.export:
+        display.exporter = video.VideoExporter(
+            args.export, display.size, display.fps)
+        atexit.register(display.exporter.close)  # games exit via sys.exit
+    if args.replay:
+        active = Player(display, args.replay, game=game,
+                        speed=args.speed, seek=args.seek)
+        return gamerng.RNG(active.seed)
+
+    rng = gamerng.get_rng(rng)
+    if args.record:
+        seed = getattr(rng, 'initial_seed', None)
+        if seed is None:  # not a gamelib RNG; we need the seed
+            rng = gamerng.RNG()
+            seed = rng.initial_seed
+        active = Recorder(display, args.record, seed=seed, game=game)
+    return rng
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Seeded random number generators for the games.
+
+Every game object takes an `rng` argument rather than using the global
+random module, so a run can be repeated exactly and parallel runs can be
+given independent streams:
+
+    rng = gamerng.RNG(1234)
+    board = TetrisBoard(display, rng=rng)
+
+    # one independent stream per worker, reproducible from (seed, key)
+    worker_rng = rng.spawn('worker', 3)
+
+Without an rng, get_rng() spawns a new substream of the root generator,
+which is seeded from GAMELIB_SEED if set (and from the OS otherwise).
+"""
+
+import hashlib
+import logging
+import os
+import random
+
+log = logging.getLogger(__name__)
+
+SEED_BITS = 64
+
+SEED = os.environ.get('GAMELIB_SEED')
+
+
+def derive_seed(seed, *key):
+    """Hash a seed and a key (of ints and strings) into a new seed.
+
+    The result depends only on its arguments, so substreams are the same
+    whatever has been drawn from the parent, and in any process.
+    """
+    data = repr((seed, ) + key).encode('utf-8')
+    digest = hashlib.blake2b(data, digest_size=SEED_BITS // 8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+class RNG(random.Random):
+    """A random.Random that remembers its seed and spawns substreams."""
+
+    def __init__(self, seed=None):
+        """Initialize.
+
+        Arguments:
+            seed: An int (or str). If None, a seed is drawn from the OS
+                and logged, so the run can still be repeated.
+        """
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(SEED_BITS)
+            log.debug('seeded from the OS: {}'.format(seed))
+        self.initial_seed = seed
+        self._n_spawned = 0
+        super().__init__(seed)
+
+    def __repr__(self):
+        return '{}({!r})'.format(type(self).__name__, self.initial_seed)
+
+    def __reduce__(self):
+        # keep the seed, state and substreams handed out when pickled for
+        #   another process, so spawn() doesn't hand them out again
+        return (type(self), (self.initial_seed, ),
+                (self.getstate(), self._n_spawned))
+
+    def __setstate__(self, state):
+        if len(state) == 2:  # else a bare getstate() (pickled before)
+            state, self._n_spawned = state
+        self.setstate(state)
+
+    def spawn(self, *key):
+        """Return an independent generator derived from this one.
+
+        Arguments:
+            key: Ints and strings naming the substream, e.g., ('worker',
+                3). Without a key, successive calls return successive
+                substreams.
+        Return:
+            An RNG, seeded from this RNG's seed and the key.
+        """
+        if not key:
+            key = ('spawn', self._n_spawned)
+            self._n_spawned += 1
+        return type(self)(derive_seed(self.initial_seed, *key))
+
+
+_root = None
+
+
+def get_root():
+    """Return the root generator, creating it on first use."""
+    global _root
+    if _root is None:
+        _root = RNG(int(SEED) if SEED and SEED.isdigit() else SEED)
+    return _root
+
+
+def reseed(seed=None):
+    """Replace the root generator, e.g., at the start of a run.
+
+    Return:
+        The new root RNG.
+    """
+    global _root
+    _root = RNG(seed)
+    return _root
+
+
+def get_rng(rng=None):
+    """Return the given generator, or a new substream of the root."""
+    if rng is not None:
+        return rng
+    return get_root().spawn()
@@ -1,18 +1,289 @@
 #!/usr/bin/env python3
-"""Load paths to sound files."""
+"""Load paths to sound files and play them through a shared sound bank.
 
+The sound directory is only listed the first time a sound is accessed,
+e.g., `sounds.beep1`.
+
+Sounds that are played often should go through `bank`, which decodes
+each file once and plays it on a bounded pool of mixer channels:
+
+    sounds.init_mixer()  # before pygame.init()
+    pygame.init()
+    sounds.bank.preload(['beep1', 'fail'], background=True)
+    ...
+    sounds.bank.play('beep1', priority=1)
+"""
+
+import concurrent.futures
+import contextlib
+import itertools
+import logging
 import os
 import sys
+import threading
+
+import pygame
+
+log = logging.getLogger(__name__)
+
+SOUND_DIR = os.path.join(os.path.dirname(__file__), 'sound_files')
+
+# extensions pygame.mixer.Sound can decode (midi is for pygame.mixer.music)
+SOUND_EXTENSIONS = ('.ogg', '.wav')
+
+# mixer defaults; a small buffer keeps the delay between play() and the
+# sound actually starting to ~6 ms (pygame 1.9 defaults to 4096 samples)
+MIXER_FREQUENCY = 44100
+MIXER_SIZE = -16
+MIXER_CHANNELS = 2
+MIXER_BUFFER = 256
+
+N_CHANNELS = 8
+
+_SOUND_PATHS = None
 
 
 def load_sound_paths():
-    """meh."""
-    sound_dir = os.path.join(os.path.dirname(__file__), 'sound_files')
+    """Return a dict of {name: path} for the files in SOUND_DIR.
+
+    The directory is listed once; each path is also set as a module
+    attribute named after the file (without extension).
+    """
+    global _SOUND_PATHS
+    if _SOUND_PATHS is None:
+        _SOUND_PATHS = {}
+        for f in os.listdir(SOUND_DIR):
+            name = os.path.splitext(os.path.basename(f))[0]
+            path = os.path.join(SOUND_DIR, f)
+            _SOUND_PATHS[name] = path
+            setattr(sys.modules[__name__], name, path)
+    return _SOUND_PATHS
+
+
+def __getattr__(name):
+    """Resolve sound paths on first access."""
+    if name.startswith('__'):
+        raise AttributeError(name)  # don't list the dir for dunder lookups
+    try:
+        return load_sound_paths()[name]
+    except KeyError:
+        raise AttributeError(
+            'module {!r} has no attribute {!r}'.format(__name__, name))
+
+
+def init_mixer(frequency=MIXER_FREQUENCY, size=MIXER_SIZE,
+               channels=MIXER_CHANNELS, buffer=MIXER_BUFFER):
+    """Set the mixer parameters.
+
+    Call before pygame.init(); if the mixer is already running, it is
+    restarted with the new parameters.
+
+    Arguments:
+        frequency: The sample rate, in Hz.
+        size: The sample size in bits (negative for signed samples).
+        channels: 1 for mono, 2 for stereo.
+        buffer: The number of samples per mixer buffer. Smaller buffers
+            lower playback latency at the cost of more audio callbacks.
+    Return:
+        None.
+    """
+    pygame.mixer.pre_init(frequency, size, channels, buffer)
+    if pygame.mixer.get_init():
+        pygame.mixer.quit()
+        pygame.mixer.init(frequency, size, channels, buffer)
+    return
+
+
+class SoundBank():
+    """Decode each sound once and play it on a bounded channel pool.
+
+    Sounds are referred to by name (the file name without extension, as
+    with the module attributes). Each is decoded on first use, or ahead
+    of time with `preload`, and the pygame.mixer.Sound is cached.
+
+    Playback uses the first `n_channels` mixer channels, which are
+    reserved so that a plain Sound.play() elsewhere can't take them. If
+    every channel is busy, the channel playing the lowest priority (then
+    oldest) sound is stolen, provided its priority is not higher than
+    that of the new sound; otherwise the new sound is dropped.
+
+    While `muted` is set (or within `muting`, e.g., for headless
+    simulations), play does nothing at all.
+    """
+
+    def __init__(self, n_channels=N_CHANNELS):
+        """Initialize an empty bank; nothing touches the mixer yet."""
+        self.n_channels = n_channels
+        self.muted = False
+        self._sounds = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._executor = None
+
+        self._channels = None
+        self._priority = [0] * n_channels
+        self._started = [0] * n_channels
+        self._counter = itertools.count(1)
+
+    def __contains__(self, name):
+        return name in self._sounds
+
+    def _decode(self, name):
+        """Decode a sound file and cache the result."""
+        sound = pygame.mixer.Sound(load_sound_paths()[name])
+        with self._lock:
+            self._sounds[name] = sound
+            self._pending.pop(name, None)
+        return sound
+
+    def add(self, name, sound):
+        """Add an already decoded (or synthesized) Sound to the bank."""
+        with self._lock:
+            self._sounds[name] = sound
+        return
+
+    def preload(self, names=None, background=False):
+        """Decode the given sounds ahead of their first use.
+
+        Arguments:
+            names: A list of sound names. Defaults to every decodable
+                file in SOUND_DIR.
+            background: If true, decode on a worker thread and return
+                immediately; `play` skips a sound still being decoded
+                rather than waiting for it.
+        Return:
+            None.
+        """
+        if names is None:
+            names = sorted(
+                name for name, path in load_sound_paths().items()
+                if path.endswith(SOUND_EXTENSIONS)
+            )
+
+        for name in names:
+            if name in self._sounds or name in self._pending:
+                continue
+            if not background:
+                self._decode(name)
+                continue
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix='soundbank')
+            with self._lock:
+                self._pending[name] = self._executor.submit(
+                    self._decode, name)
+        return
+
+    def get(self, name, block=True):
+        """Return the decoded pygame.mixer.Sound for the given name.
+
+        Arguments:
+            name: The sound name.
+            block: If false and the sound is still being decoded in the
+                background, return None instead of waiting.
+        Return:
+            A pygame.mixer.Sound (or None, see above).
+        Raises:
+            KeyError if there is no such sound.
+        """
+        sound = self._sounds.get(name)
+        if sound is not None:
+            return sound
+        future = self._pending.get(name)
+        if future is not None:
+            if not block and not future.done():
+                return None
+            return future.result()
+        return self._decode(name)
+
+    def _init_channels(self):
+        """Reserve the first n_channels mixer channels for the bank."""
+        n_total = pygame.mixer.get_num_channels()
+        if n_total <= self.n_channels:
+            pygame.mixer.set_num_channels(self.n_channels + N_CHANNELS)
+        pygame.mixer.set_reserved(self.n_channels)
+        self._channels = [
+            pygame.mixer.Channel(i) for i in range(self.n_channels)
+        ]
+
+    def _find_channel(self, priority):
+        """Return the index of a free channel, or one we may steal."""
+        steal = None
+        for i, channel in enumerate(self._channels):
+            if not channel.get_busy():
+                return i
+            if self._priority[i] > priority:
+                continue  # playing something more important
+            rank = (self._priority[i], self._started[i])
+            if steal is None or rank < steal[0]:
+                steal = (rank, i)
+        return steal[1] if steal else None
+
+    def play(self, name, priority=0, loops=0, maxtime=0, fade_ms=0):
+        """Play a sound on the channel pool.
+
+        Never decodes, or waits on a background decode: a sound that
+        isn't ready yet is skipped. One that wasn't preloaded at all is
+        queued to decode in the background (with a warning), to be
+        played next time.
+
+        Arguments:
+            name: The sound name.
+            priority: Sounds may only steal a channel from sounds of the
+                same or lower priority.
+            loops, maxtime, fade_ms: Passed to pygame.mixer.Channel.play.
+        Return:
+            The pygame.mixer.Channel used, or None if the sound was
+            dropped (or muted).
+        """
+        if self.muted:
+            return None
+        if name not in self._sounds and name not in self._pending:
+            load_sound_paths()[name]  # KeyError if there is no such sound
+            log.warning('{} was not preloaded; skipped while it decodes'
+                        .format(name))
+            self.preload([name], background=True)
+            return None
+        sound = self.get(name, block=False)
+        if sound is None:
+            log.debug('{} is still loading; skipped'.format(name))
+            return None
+
+        if self._channels is None:
+            self._init_channels()
+        i = self._find_channel(priority)
+        if i is None:
+            log.debug('no free channel for {}; dropped'.format(name))
+            return None
+
+        channel = self._channels[i]
+        channel.play(sound, loops, maxtime, fade_ms)
+        self._priority[i] = priority
+        self._started[i] = next(self._counter)
+        return channel
+
+    @contextlib.contextmanager
+    def muting(self):
+        """Mute the bank within a with block, then restore it."""
+        muted = self.muted
+        self.muted = True
+        try:
+            yield self
+        finally:
+            self.muted = muted
+
+    def stop(self):
+        """Stop every channel in the pool."""
+        for channel in self._channels or []:
+            channel.stop()
+        return
 
-    for f in os.listdir(sound_dir):
-        name = os.path.splitext(os.path.basename(f))[0]
-        path = os.path.join(sound_dir, f)
-        setattr(sys.modules[__name__], name, path)
+    def shutdown(self, wait=True):
+        """Stop any background decoding."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+        return
 
 
-load_sound_paths()
+bank = SoundBank()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Caches of pre-rendered Surfaces, so animations are only blits.
+
+A RotationCache holds a Surface rotated to each angle it is drawn at.
+pygame.transform.rotate allocates and resamples a new Surface every
+call; drawing from the cache is a blit. Rotated copies with
+per-pixel alpha are RLE encoded (SDL then frees their pixels), which
+keeps mostly transparent sprites such as text small: a title at all 360
+angles takes a few MB.
+
+A TileCache holds small opaque tiles (the beveled boxes the block games
+are built of), drawn once each in the display's pixel format; a board of
+them can then be drawn with one Surface.blits call:
+
+    display.blits([(tiles.get(color, light, 20), pos) for ...], False)
+"""
+
+import logging
+import math
+
+import pygame
+
+log = logging.getLogger(__name__)
+
+
+class RotationCache():
+    """A Surface rotated to each angle (in whole degrees, mod 360)."""
+
+    def __init__(self, surface, step=None, prebuild=False, rle=True):
+        """Initialize.
+
+        Arguments:
+            surface: The Surface to rotate.
+            step: The degrees an animation turns it by each frame; its
+                angles repeat after get_cycle(step) frames.
+            prebuild: If true, rotate to every angle of the cycle now
+                (needs step); otherwise each angle is rotated when it is
+                first drawn.
+            rle: If true, RLE encode the rotated copies (of a Surface with
+                per-pixel alpha). They blit faster and take less memory,
+                but can't be drawn on.
+        """
+        self.surface = surface
+        self.step = step
+        self.rle = rle
+        self.frames = {}  # angle: rotated Surface
+        if prebuild:
+            for angle in self.get_cycle(step):
+                self.get(angle)
+
+    @staticmethod
+    def get_cycle(step):
+        """Return the angles (mod 360) of an animation turning by step."""
+        n_frames = 360 // math.gcd(int(step), 360)
+        return [(i * step) % 360 for i in range(n_frames)]
+
+    def get(self, angle):
+        """Return the Surface rotated by angle degrees (anticlockwise)."""
+        angle = int(round(angle)) % 360
+        rotated = self.frames.get(angle)
+        if rotated is None:
+            rotated = pygame.transform.rotate(self.surface, angle)
+            if self.rle and rotated.get_flags() & pygame.SRCALPHA:
+                rotated.set_alpha(255, pygame.RLEACCEL)
+            self.frames[angle] = rotated
+        return rotated
+
+    def blit(self, target, angle, center):
+        """Draw the Surface rotated by angle, centered on a point.
+
+        Return:
+            The Rect drawn to.
+        """
+        rotated = self.get(angle)
+        return target.blit(rotated, rotated.get_rect(center=center))
+
+
+class TileCache():
+    """Beveled boxes, each drawn once: a color, highlighted top left."""
+
+    def __init__(self):
+        self.tiles = {}  # (color, highlight, size): Surface
+
+    def get(self, color, highlight, size, like=None):
+        """Return the tile for a box (cached).
+
+        The tile is size - 1 pixels square (boxes are drawn a pixel in
+        from the top left of their size x size cell), and highlighted
+        but for 3 pixels right and bottom.
+
+        Arguments:
+            color, highlight: RGB tuples (not pygame.Colors, which can't
+                be dict keys).
+            size: The size of the box's cell, in pixels.
+            like: A Surface (e.g., the display) whose pixel format a new
+                tile takes, so it blits without conversion.
+        """
+        key = (color, highlight, size)
+        tile = self.tiles.get(key)
+        if tile is None:
+            if like is None:
+                tile = pygame.Surface((size - 1, size - 1))
+            else:
+                tile = pygame.Surface((size - 1, size - 1), 0, like)
+            tile.fill(color)
+            tile.fill(highlight, (0, 0, size - 4, size - 4))
+            self.tiles[key] = tile
+        return tile
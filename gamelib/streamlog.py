@@ -3,20 +3,96 @@
 @Author: Stephen J. Bush
 @Date: 07.29.16
 @Source: http://www.electricmonk.nl/log/2011/08/14/
+
+Writes are buffered: a partial line waits for its newline, and the lines
+of a burst (e.g., a traceback, written a piece at a time) are logged as
+one multi-line record by a background thread, once no more have come
+for `interval` seconds, or as soon as `max_size` characters are waiting.
+The writer only appends to a buffer.
 """
 
+import threading
+import time
+
+INTERVAL = 0.05  # seconds a burst of lines is held, to be logged as one
+MAX_SIZE = 8192  # characters held before they're logged right away
+
 
 class StreamLogger():
     """Stream-like object that logs instead."""
 
-    def __init__(self, logger, level):
+    def __init__(self, logger, level, interval=INTERVAL, max_size=MAX_SIZE):
         self.logger = logger
         self.level = level
+        self.interval = interval
+        self.max_size = max_size
+
+        self.n_records = 0
+        self._partial = ''  # the text after the last newline
+        self._lines = []  # complete lines, waiting to be logged
+        self._size = 0
+        self._last_write = 0  # perf_counter of the last complete line
+        self._cond = threading.Condition()
+        self._thread = None
 
     def write(self, buf):
-        for line in buf.rstrip().splitlines():
-            self.logger.log(self.level, line.rstrip())
+        if not buf:
+            return 0
+        with self._cond:
+            head, newline, self._partial = (
+                self._partial + buf).rpartition('\n')
+            if newline:
+                if not self._lines:
+                    self._cond.notify()  # a new burst; wake the flusher
+                self._lines.append(head)
+                self._size += len(head)
+                self._last_write = time.perf_counter()
+            size = self._size + len(self._partial)
+            if size >= self.max_size:
+                lines = self._take(partial=True)
+            else:
+                lines = None
+                if newline and self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name='streamlog', daemon=True)
+                    self._thread.start()
+        if lines:
+            self._log(lines)
+        return len(buf)
 
     def flush(self):
-        """Prevent errors during unittesting."""
-        pass
+        """Log everything buffered now, partial line included."""
+        with self._cond:
+            lines = self._take(partial=True)
+        if lines:
+            self._log(lines)
+
+    def _take(self, partial=False):
+        """Return the buffered lines and empty the buffer (hold the lock)."""
+        lines = self._lines
+        if partial and self._partial:
+            lines.append(self._partial)
+            self._partial = ''
+        self._lines = []
+        self._size = 0
+        return lines
+
+    def _log(self, lines):
+        text = '\n'.join(line.rstrip() for line in lines).rstrip()
+        if text:
+            self.n_records += 1
+            self.logger.log(self.level, text)
+
+    def _run(self):
+        """Log each burst once it has been quiet for interval seconds."""
+        while True:
+            with self._cond:
+                while not self._lines:
+                    self._cond.wait()
+                quiet = time.perf_counter() - self._last_write
+                while self._lines and quiet < self.interval:
+                    self._cond.wait(self.interval - quiet)
+                    quiet = time.perf_counter() - self._last_write
+                lines = self._take()
+            if lines:
+                self._log(lines)
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""Log gameplay events as compressed JSON lines.
+
+Games call emit at key points (a piece placed, lines cleared, a game
+over...). Nothing is written on the game's thread: events are batched in
+memory, and a background thread serializes each batch and appends it to
+a gzipped JSON-lines file, starting a new file every MAX_BYTES.
+
+    telemetry.start('telemetry/')  # or set GAMELIB_TELEMETRY=telemetry/
+    telemetry.emit('blocks.lines_cleared', lines=2, score=120)
+
+Each line is a JSON object: the event name, the wall time, the session
+(one per process) and the fields given, which must be JSON-serializable
+and not changed afterwards.
+
+If the writer falls behind, events are sampled: every 2nd, 4th, ... is
+kept (up to 1 in MAX_SAMPLE), and each kept event has its rate as
+'sample', to weight it by. A batch that still doesn't fit in the queue
+is dropped (and counted), so the game never waits on disk. Telemetry is
+off, and emit does nothing, until started.
+"""
+
+import atexit
+import gzip
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+PATH = os.environ.get('GAMELIB_TELEMETRY')  # start on the first emit
+
+BATCH_SIZE = 256  # events per batch handed to the writer
+MAX_PENDING = 8  # batches waiting for the writer
+FLUSH_INTERVAL = 1.0  # seconds before a partial batch is written anyway
+MAX_BYTES = 8 * 1024 * 1024  # compressed bytes per file
+MAX_SAMPLE = 1024  # keep at least 1 event in MAX_SAMPLE
+FILE_NAME = 'telemetry-{session}-{index:04d}.jsonl.gz'
+
+active = None  # the TelemetryWriter, once started
+
+
+class TelemetryWriter():
+    """Batch events and write them to rotating files, in a thread."""
+
+    def __init__(self, directory, batch_size=BATCH_SIZE,
+                 max_pending=MAX_PENDING, max_bytes=MAX_BYTES,
+                 flush_interval=FLUSH_INTERVAL):
+        """Start the writer thread.
+
+        Arguments:
+            directory: Where to write the files (created if need be).
+            batch_size: Events per batch.
+            max_pending: Batches that can wait to be written.
+            max_bytes: The (compressed) size to rotate files at.
+            flush_interval: Seconds a partial batch waits.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.batch_size = batch_size
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self.session = '{}-{}'.format(time.strftime('%Y%m%d%H%M%S'),
+                                      os.getpid())
+
+        self.keep_every = 1  # the sampling rate
+        self.n_events = 0
+        self.n_dropped = 0
+        self.path_list = []
+        self.closed = False
+
+        self._batch = []
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(max_pending)
+        self._raw = None  # the file, under...
+        self._gz = None  # ...its GzipFile
+        self._thread = threading.Thread(
+            target=self._run, name='telemetry', daemon=True)
+        self._thread.start()
+
+    def emit(self, event, fields):
+        """Add an event to the batch (or skip it, if sampling)."""
+        with self._lock:
+            self.n_events += 1
+            if self.n_events % self.keep_every:
+                return
+            fields['event'] = event
+            fields['time'] = time.time()
+            if self.keep_every > 1:
+                fields['sample'] = self.keep_every
+            self._batch.append(fields)
+            if len(self._batch) < self.batch_size:
+                return
+            batch = self._take()
+        self._hand_off(batch)
+
+    def _take(self):
+        """Return the batch and start a new one (hold the lock)."""
+        batch = self._batch
+        self._batch = []
+        return batch
+
+    def _hand_off(self, batch):
+        """Queue a batch for the writer, adjusting the sampling rate."""
+        load = self._queue.qsize()
+        if load >= self._queue.maxsize // 2:
+            self.keep_every = min(MAX_SAMPLE, self.keep_every * 2)
+        elif load == 0 and self.keep_every > 1:
+            self.keep_every //= 2
+        try:
+            self._queue.put_nowait(batch)
+        except queue.Full:
+            self.n_dropped += len(batch)
+
+    def _run(self):
+        """Write batches until told to stop (by None)."""
+        while True:
+            try:
+                batch = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                with self._lock:  # write what there is
+                    batch = self._take()
+            if batch is None:
+                break
+            if batch:
+                try:
+                    self._write(batch)
+                except Exception:  # keep draining the queue
+                    log.exception('writing telemetry failed')
+        if self._gz is not None:
+            self._gz.close()
+            self._raw.close()
+
+    def _write(self, batch):
+        if self._gz is None:
+            path = os.path.join(self.directory, FILE_NAME.format(
+                session=self.session, index=len(self.path_list)))
+            self._raw = open(path, 'wb')
+            self._gz = gzip.GzipFile(fileobj=self._raw, mode='wb')
+            self.path_list.append(path)
+        session = self.session
+        for fields in batch:
+            fields['session'] = session
+        self._gz.write(''.join(
+            json.dumps(fields, separators=(',', ':')) + '\n'
+            for fields in batch).encode('utf-8'))
+        if self._raw.tell() >= self.max_bytes:  # rotate
+            self._gz.close()
+            self._raw.close()
+            self._gz = self._raw = None
+        return
+
+    def close(self):
+        """Write everything batched and stop the thread."""
+        if self.closed:
+            return
+        self.closed = True
+        with self._lock:
+            batch = self._take()
+        if batch:
+            self._queue.put(batch)
+        self._queue.put(None)
+        self._thread.join()
+        if self.n_dropped:
+            log.warning('dropped {} telemetry events'.format(self.n_dropped))
+        return
+
+
+def start(directory=None, **kwargs):
+    """Start writing telemetry (to PATH, by default); return the writer."""
+    global active
+    stop()
+    active = TelemetryWriter(directory or PATH, **kwargs)
+    atexit.register(active.close)
+    return active
+
+
+def stop():
+    """Write what's batched, and stop."""
+    global active
+    if active is not None:
+        active.close()
+        active = None
+    return
+
+
+def emit(event, **fields):
+    """Record an event (see the module docstring)."""
+    if active is None:
+        if not PATH:
+            return
+        start(PATH)
+    active.emit(event, fields)
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""Synthesize simple tones for the mixer.
+
+Tones are generated with NumPy and converted with pygame.sndarray, so
+there is no file I/O or decoding. The mixer must be initialized first.
+
+    sound = tones.tone(440, 0.4, waveform=tones.SQUARE)
+    name = tones.register(440, 0.4)  # or play through sounds.bank
+    sounds.bank.play(name)
+"""
+
+import functools
+import logging
+
+import numpy
+import pygame
+from gamelib import sounds
+
+log = logging.getLogger(__name__)
+
+SINE = 'sine'
+SQUARE = 'square'
+
+VOLUME = 0.5
+
+# envelope: attack, decay and release in seconds; sustain as a level
+ADSR = (0.01, 0.05, 0.7, 0.1)
+
+# semitone offsets of the major pentatonic scale; any two notes sound ok
+PENTATONIC = (0, 2, 4, 7, 9)
+ROOT_FREQUENCY = 261.63  # middle C
+
+# mixer sample size --> (dtype, amplitude, offset)
+SAMPLE_FORMATS = {
+    8: (numpy.uint8, 127, 128),
+    -8: (numpy.int8, 127, 0),
+    16: (numpy.uint16, 32767, 32768),
+    -16: (numpy.int16, 32767, 0),
+    32: (numpy.float32, 1.0, 0),
+}
+
+
+def envelope(n_samples, rate, adsr=ADSR):
+    """Return an ADSR envelope with values from 0 to 1.
+
+    Arguments:
+        n_samples: The length of the envelope.
+        rate: Samples per second.
+        adsr: A tuple of (attack, decay, sustain, release). Attack,
+            decay and release are in seconds; sustain is the level held
+            between decay and release.
+    Return:
+        A float numpy array of length n_samples.
+    """
+    attack, decay, sustain, release = adsr
+    n_attack = min(int(attack * rate), n_samples)
+    n_decay = min(int(decay * rate), n_samples - n_attack)
+    n_release = min(int(release * rate), n_samples - n_attack - n_decay)
+    n_sustain = n_samples - n_attack - n_decay - n_release
+
+    return numpy.concatenate((
+        numpy.linspace(0, 1, n_attack, endpoint=False),
+        numpy.linspace(1, sustain, n_decay, endpoint=False),
+        numpy.full(n_sustain, sustain),
+        numpy.linspace(sustain, 0, n_release),
+    ))
+
+
+def synth(frequency, duration, waveform=SINE, volume=VOLUME, adsr=ADSR,
+          mixer_format=None):
+    """Synthesize a tone as an array of samples.
+
+    Arguments:
+        frequency: The pitch, in Hz.
+        duration: The length, in seconds.
+        waveform: SINE or SQUARE.
+        volume: The peak amplitude, from 0 to 1.
+        adsr: The envelope (see `envelope`).
+        mixer_format: The (rate, size, channels) of the samples. Defaults
+            to that of the running mixer (pygame.mixer.get_init()).
+    Return:
+        A numpy array of samples, shaped (n,) for mono or (n, channels).
+    Raises:
+        ValueError for an unknown waveform or sample size.
+    """
+    rate, size, n_channels = mixer_format or pygame.mixer.get_init()
+    try:
+        dtype, amplitude, offset = SAMPLE_FORMATS[size]
+    except KeyError:
+        raise ValueError('Unsupported sample size: {}'.format(size))
+
+    n_samples = int(duration * rate)
+    phase = 2 * numpy.pi * frequency * numpy.arange(n_samples) / rate
+    if waveform == SINE:
+        wave = numpy.sin(phase)
+    elif waveform == SQUARE:
+        wave = numpy.sign(numpy.sin(phase)) * 0.5  # square is much louder
+    else:
+        raise ValueError('Unknown waveform: {}'.format(waveform))
+
+    wave *= envelope(n_samples, rate, adsr) * volume
+    samples = (wave * amplitude + offset).astype(dtype)
+    if n_channels > 1:
+        samples = numpy.repeat(samples[:, None], n_channels, axis=1)
+    return numpy.ascontiguousarray(samples)
+
+
+@functools.lru_cache(maxsize=128)
+def tone(frequency, duration, waveform=SINE, volume=VOLUME, adsr=ADSR):
+    """Return a (cached) pygame.mixer.Sound of a synthesized tone.
+
+    Tones are cached by all of their arguments, so asking for the same
+    frequency and duration again costs nothing. See `synth`.
+    """
+    return pygame.sndarray.make_sound(
+        synth(frequency, duration, waveform, volume, adsr))
+
+
+def tone_name(frequency, duration, waveform=SINE, volume=VOLUME, adsr=ADSR):
+    """Return the sounds.bank name for a tone (from all of `tone`'s args)."""
+    return 'tone_{}_{:g}_{:g}_{:g}_{}'.format(
+        waveform, frequency, duration, volume,
+        '_'.join('{:g}'.format(value) for value in adsr))
+
+
+def register(frequency, duration, waveform=SINE, bank=None, **kwargs):
+    """Add a tone to a sound bank so it can be played by name.
+
+    Arguments:
+        frequency, duration, waveform: See `synth`.
+        bank: A sounds.SoundBank. Defaults to sounds.bank.
+        kwargs: Passed to `tone` (and part of the name).
+    Return:
+        The name of the tone in the bank.
+    """
+    bank = bank if bank is not None else sounds.bank
+    name = tone_name(frequency, duration, waveform, **kwargs)
+    if name not in bank:
+        bank.add(name, tone(frequency, duration, waveform, **kwargs))
+    return name
+
+
+def scale(n_notes, root=ROOT_FREQUENCY, steps=PENTATONIC):
+    """Return the frequencies of n notes up a scale, wrapping octaves.
+
+    Arguments:
+        n_notes: The number of frequencies.
+        root: The frequency of the first note, in Hz.
+        steps: Semitone offsets of the notes within an octave.
+    Return:
+        A list of frequencies, in Hz, rounded to 0.01.
+    """
+    freq_list = []
+    for i in range(n_notes):
+        octave, degree = divmod(i, len(steps))
+        semitones = 12 * octave + steps[degree]
+        freq_list.append(round(root * 2 ** (semitones / 12), 2))
+    return freq_list
@@ -3,6 +3,7 @@
 import sys
 
 import pygame
+from gamelib import replay
 from pygame.locals import K_ESCAPE, KEYUP, QUIT
 
 
@@ -12,10 +13,10 @@ def terminate():
 
 
 def check_for_quit():
-    for event in pygame.event.get(QUIT):
+    for event in replay.get_events(QUIT):
         terminate()  # any quit event exits
-    for event in pygame.event.get(KEYUP):
+    for event in replay.get_events(KEYUP):
         if event.key == K_ESCAPE:
             terminate()  # quit on escape key
-        pygame.event.post(event)  # put the object back
+        replay.post_event(event)  # put the object back
     return
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""Export the frames a game draws as video.
+
+A VideoExporter blits each frame into one of a few reusable buffers (an
+RGB24 Surface over a NumPy array, so SDL does the conversion) and hands
+it to writer threads, so the game draws the next frame while the last
+ones are written (zlib and pipe writes release the GIL). The game only
+waits when every buffer is in use.
+
+The output is picked by path:
+
+    a directory       a PNG per frame (FRAME_NAME)
+    *.rgb, or '-'     raw RGB24 frames, to the file (or stdout)
+    anything else     raw RGB24 frames piped to ENCODER (ffmpeg), which
+                      writes the video file
+
+Games take --export PATH (see replay.add_arguments); with --replay and
+--headless, that renders a recorded session as fast as it can be encoded:
+
+    python ch7/blocks.py --replay bug.glrp --headless --export bug.mp4
+
+Anything else that draws to a Surface can write frames itself:
+
+    with VideoExporter('run.mp4', env.display.size, fps) as video:
+        ...
+        video.write(env.render())
+"""
+
+import logging
+import os
+import queue
+import shlex
+import struct
+import subprocess
+import sys
+import threading
+import zlib
+
+import numpy
+import pygame
+
+log = logging.getLogger(__name__)
+
+N_BUFFERS = 8  # frames in flight
+PNG_LEVEL = 1  # zlib level: the fastest; flat game frames compress anyway
+FRAME_NAME = 'frame{:06d}.png'
+
+# {width}, {height}, {fps} and {path} are filled in
+ENCODER = (
+    'ffmpeg -loglevel error -y -f rawvideo -pix_fmt rgb24'
+    ' -s {width}x{height} -r {fps} -i - -pix_fmt yuv420p {path}'
+)
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+def png_chunk(kind, data):
+    """Return a PNG chunk: length, type, data, CRC."""
+    return b''.join((
+        struct.pack('>I', len(data)), kind, data,
+        struct.pack('>I', zlib.crc32(data, zlib.crc32(kind))),
+    ))
+
+
+def encode_png(rows, width, height, level=PNG_LEVEL):
+    """Return an RGB PNG.
+
+    Arguments:
+        rows: The image, (height, 1 + width * 3) bytes: each row starts
+            with its filter type (0, none).
+    """
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return b''.join((
+        PNG_SIGNATURE,
+        png_chunk(b'IHDR', header),
+        png_chunk(b'IDAT', zlib.compress(rows, level)),
+        png_chunk(b'IEND', b''),
+    ))
+
+
+class VideoExporter():
+    """Write frames to PNGs, a raw RGB file or an encoder, in threads."""
+
+    def __init__(self, path, size, fps, n_buffers=N_BUFFERS, n_threads=None,
+                 command=ENCODER, png_level=PNG_LEVEL):
+        """Start the writer thread(s) (and the encoder).
+
+        Arguments:
+            path: Where to write (see the module docstring).
+            size: The (width, height) of the frames.
+            fps: Frames per second, for the encoder.
+            n_buffers: Frames that can wait to be written.
+            n_threads: Writer threads for PNGs (default: up to 4, one
+                per CPU); raw frames have one, to keep them in order.
+            command: The encoder command line (see ENCODER).
+            png_level: The zlib compression level for PNGs.
+        """
+        self.path = path
+        self.width, self.height = size
+        self.fps = fps
+        self.png_level = png_level
+        self.n_frames = 0
+        self.error = None
+        self.closed = False
+
+        self.proc = None
+        self.fh = None
+        self.png = os.path.isdir(path)
+        if self.png:
+            n_threads = n_threads or min(4, os.cpu_count() or 1)
+        else:
+            n_threads = 1
+            if path == '-':
+                self.fh = sys.stdout.buffer
+            elif path.endswith('.rgb'):
+                self.fh = open(path, 'wb')
+            else:
+                args = [
+                    arg.format(width=self.width, height=self.height,
+                               fps=fps, path=path)
+                    for arg in shlex.split(command)
+                ]
+                try:
+                    self.proc = subprocess.Popen(args, stdin=subprocess.PIPE)
+                except OSError as e:
+                    raise RuntimeError(
+                        'Could not start the encoder ({}): {}'.format(
+                            args[0], e)) from e
+                self.fh = self.proc.stdin
+
+        # (array, Surface) pairs, sharing their pixels
+        self._free = queue.Queue()
+        for _ in range(n_buffers):
+            array = numpy.zeros((self.height, self.width * 3), numpy.uint8)
+            surface = pygame.image.frombuffer(array, size, 'RGB')
+            self._free.put((array, surface))
+        self._full = queue.Queue()
+
+        self._threads = [
+            threading.Thread(target=self._run, name='video-{}'.format(i),
+                             daemon=True)  # joined by close, even at exit
+            for i in range(n_threads)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _run(self):
+        """Write frames until told to stop (by None)."""
+        rows = None
+        if self.png:  # each row starts with a filter byte (0)
+            rows = numpy.zeros((self.height, 1 + self.width * 3), numpy.uint8)
+        while True:
+            item = self._full.get()
+            if item is None:
+                return
+            index, buffer = item
+            try:
+                if self.error is None:
+                    self._write(index, buffer[0], rows)
+            except Exception as e:  # keep draining; write() will raise
+                log.exception('writing frame {} failed'.format(index))
+                self.error = e
+            self._free.put(buffer)
+
+    def _write(self, index, array, rows):
+        if self.png:
+            rows[:, 1:] = array
+            data = encode_png(
+                rows, self.width, self.height, level=self.png_level)
+            name = os.path.join(self.path, FRAME_NAME.format(index))
+            with open(name, 'wb') as fh:
+                fh.write(data)
+        else:
+            self.fh.write(array)  # contiguous: no copy
+        return
+
+    def write(self, surface):
+        """Queue a frame (waiting for a free buffer, if need be).
+
+        Raises:
+            RuntimeError: Writing an earlier frame failed.
+        """
+        if self.error is not None:
+            raise RuntimeError('Video export failed') from self.error
+        buffer = self._free.get()
+        buffer[1].blit(surface, (0, 0))
+        self._full.put((self.n_frames, buffer))
+        self.n_frames += 1
+        return
+
+    def close(self):
+        """Write the queued frames and wait for the encoder to finish."""
+        if self.closed:
+            return
+        self.closed = True
+        for _ in self._threads:
+            self._full.put(None)
+        for thread in self._threads:
+            thread.join()
+        if self.fh is not None and self.fh is not sys.stdout.buffer:
+            try:
+                self.fh.close()
+            except OSError as e:  # e.g., the encoder died
+                self.error = self.error or e
+        if self.proc is not None and self.proc.wait():
+            self.error = self.error or RuntimeError(
+                'The encoder exited with {}'.format(self.proc.returncode))
+        if self.error is not None:
+            log.error('video export to {} failed: {}'.format(
+                self.path, self.error))
+        else:
+            log.info('exported {} frames to {}'.format(
+                self.n_frames, self.path))
+        return